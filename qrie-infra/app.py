@@ -14,6 +14,7 @@ core = CoreStack(
     app, "QrieCore",
     viewer_trusted_account_id = app.node.try_get_context("viewer_trusted_account_id"),
     customer_org_id           = app.node.try_get_context("customer_org_id"),
+    ordered_events            = str(app.node.try_get_context("ordered_events") or "false").lower() == "true",
     **env_kwargs,
 )
 
@@ -0,0 +1,115 @@
+"""
+Process-wide pool of boto3 clients for customer accounts.
+
+Building a client per call repeats endpoint resolution, model loading and TLS handshakes.
+Pooled clients are keyed by (account, region, service) - and role, as two roles in one
+account have different credentials - and persist across warm invocations. Each client keeps
+its own connection pool sized for the handlers' concurrent workers (boto3 clients are
+thread-safe), and is paced by the account's rate governor.
+
+Sessions come from the credential cache; when it hands out a new session (the credentials
+were refreshed) the clients built on the previous one are evicted and rebuilt. Clients for
+every region of an account share one session (the region is applied to the client), and the
+cache keys credentials by account, role and external ID only, so neither regional clients nor
+regional sessions (cross_account.get_cross_account_session) cost an extra AssumeRole.
+
+Usage:
+    from common.client_pool import CLIENT_POOL
+
+    s3_client = CLIENT_POOL.get_client('s3', account_id, role_arn, session_name=...)
+
+Environment Variables:
+    CLIENT_MAX_POOL_CONNECTIONS - HTTP connections per pooled client (default: 32, at least
+                                  the largest worker pool: EVENT_CONCURRENCY, SCAN_CONCURRENCY)
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from botocore.config import Config
+from common.logger import debug, info
+from common.credential_cache import CREDENTIAL_CACHE, CredentialCache
+from common.rate_governor import govern_client
+
+DEFAULT_MAX_POOL_CONNECTIONS = int(os.environ.get('CLIENT_MAX_POOL_CONNECTIONS', '32'))
+
+PoolKey = Tuple[str, Optional[str], str, str]  # (account_id, region, service, role_arn)
+
+
+class ClientPool:
+    """Reusable, connection-pooled clients per account, region, service and role"""
+
+    def __init__(self, max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+                 credential_cache: Optional[CredentialCache] = None):
+        self.max_pool_connections = max_pool_connections
+        self.credential_cache = credential_cache or CREDENTIAL_CACHE
+        self._clients: Dict[PoolKey, tuple] = {}  # key -> (session, client)
+        self._stats = {'created': 0, 'reused': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+
+    def get_client(self, service: str, account_id: str, role_arn: str, region: Optional[str] = None,
+                   session_name: Optional[str] = None, external_id: Optional[str] = None):
+        """
+        Pooled client for a service in a customer account.
+
+        Args:
+            service: boto3 service name (s3, ec2, iam)
+            account_id: Customer account ID
+            role_arn: Role the client's credentials come from
+            region: Client region (None: the default region)
+            session_name: RoleSessionName used when the role is assumed
+            external_id: ExternalId required by the role's trust policy
+
+        Returns:
+            Thread-safe boto3 client (calls paced by the account's rate governor)
+
+        Raises:
+            ClientError: If the role cannot be assumed
+        """
+        session = self.credential_cache.get_session(account_id, role_arn,
+                                                    session_name=session_name, external_id=external_id)
+        key = (account_id, region, service, role_arn)
+        with self._lock:
+            pooled = self._clients.get(key)
+            if pooled and pooled[0] is session:
+                self._stats['reused'] += 1
+                return pooled[1]
+            if pooled:
+                # Credentials rotated: the old client would keep using the previous ones
+                self._stats['evicted'] += 1
+                debug(f"Evicting {service} client for {account_id} ({region or 'default region'}) - credentials rotated")
+            # Sessions are not thread-safe, so clients are built under the lock
+            client = govern_client(
+                session.client(service, region_name=region,
+                               config=Config(max_pool_connections=self.max_pool_connections)),
+                account_id
+            )
+            self._clients[key] = (session, client)
+            self._stats['created'] += 1
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: created, reused, evicted"""
+        with self._lock:
+            return dict(self._stats)
+
+    def log_stats(self, prefix: str = '') -> None:
+        """Log the process-lifetime counters"""
+        stats = self.stats()
+        if stats['created']:
+            info(f"{prefix}Client pool (process totals): {stats}")
+
+    def evict(self, account_id: Optional[str] = None) -> None:
+        """Drop pooled clients for one account (or all)"""
+        with self._lock:
+            for key in [key for key in self._clients if account_id is None or key[0] == account_id]:
+                del self._clients[key]
+
+    def reset(self) -> None:
+        """Drop all clients and counters"""
+        with self._lock:
+            self._clients.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+# Process-wide pool shared by every cross-account caller
+CLIENT_POOL = ClientPool()
@@ -0,0 +1,211 @@
+"""
+Process-wide cache of assumed-role sessions for calls into customer accounts.
+
+Every describe, inventory page and scan used to call sts:AssumeRole for its own session,
+which at scan volume means thousands of AssumeRole calls and STS throttling. Credentials are
+cached per (account, role, external ID) - one AssumeRole serves every region, the region is
+applied to the session built from them - and reused until shortly before they expire:
+inside the refresh margin the cached session is still returned while a background thread
+assumes the role again, so callers only wait on STS for the first use (or when a refresh did
+not land before the credentials got close to expiring).
+
+Usage:
+    from common.credential_cache import CREDENTIAL_CACHE
+
+    session = CREDENTIAL_CACHE.get_session(account_id, role_arn, region='us-east-1',
+                                           external_id=EXTERNAL_ID)
+
+Environment Variables:
+    CREDENTIAL_REFRESH_MARGIN_SECONDS - Refresh cached credentials this long before they
+                                        expire (default: 300)
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import boto3
+from common.logger import debug, info, error
+
+DEFAULT_REFRESH_MARGIN_SECONDS = int(os.environ.get('CREDENTIAL_REFRESH_MARGIN_SECONDS', '300'))
+
+# Credentials closer than this to expiring are never handed out (refreshed synchronously)
+MIN_REMAINING_SECONDS = 60
+
+CacheKey = Tuple[str, str, Optional[str]]  # (account_id, role_arn, external_id)
+
+
+class _CachedSession:
+    """Assumed-role credentials, their expiry (epoch seconds) and the sessions built from them per region"""
+
+    def __init__(self, credentials: Dict, expires_at: float):
+        self.credentials = credentials
+        self.expires_at = expires_at
+        self._sessions: Dict[Optional[str], boto3.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(self, region: Optional[str]) -> boto3.Session:
+        """The session for a region (built once per region from these credentials)"""
+        with self._lock:
+            session = self._sessions.get(region)
+            if session is None:
+                session = boto3.Session(
+                    aws_access_key_id=self.credentials['AccessKeyId'],
+                    aws_secret_access_key=self.credentials['SecretAccessKey'],
+                    aws_session_token=self.credentials['SessionToken'],
+                    region_name=region
+                )
+                self._sessions[region] = session
+            return session
+
+
+class CredentialCache:
+    """Assumed-role credentials keyed by (account, role, external ID) with proactive refresh"""
+
+    def __init__(self, refresh_margin_seconds: int = DEFAULT_REFRESH_MARGIN_SECONDS,
+                 min_remaining_seconds: int = MIN_REMAINING_SECONDS):
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.min_remaining_seconds = min_remaining_seconds
+        self._entries: Dict[CacheKey, _CachedSession] = {}
+        self._key_locks: Dict[CacheKey, threading.Lock] = {}
+        self._refreshing: Dict[CacheKey, threading.Thread] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_failures': 0}
+        self._lock = threading.Lock()
+        self._sts = None
+
+    def get_session(self, account_id: str, role_arn: str, region: Optional[str] = None,
+                    session_name: Optional[str] = None, external_id: Optional[str] = None,
+                    duration_seconds: int = 3600) -> boto3.Session:
+        """
+        Session for a role in a customer account, assuming the role only when no cached
+        credentials are usable.
+
+        Args:
+            account_id: Customer account ID
+            role_arn: Role to assume
+            region: Session region (None: the default region)
+            session_name: RoleSessionName (default: qrie-<account_id>)
+            external_id: ExternalId required by the role's trust policy
+            duration_seconds: Requested credential lifetime
+
+        Returns:
+            boto3 Session with the role's credentials
+
+        Raises:
+            ClientError: If the role cannot be assumed
+        """
+        key = (account_id, role_arn, external_id)
+        assume_args = (session_name or f"qrie-{account_id}", duration_seconds)
+
+        entry = self._usable(key, assume_args=assume_args)
+        if entry:
+            return entry.session(region)
+
+        # One AssumeRole per key when concurrent callers miss together
+        with self._key_lock(key):
+            entry = self._usable(key, count=False)
+            if entry:
+                self._count('hits')
+                return entry.session(region)
+            self._count('misses')
+            entry = self._assume(key, *assume_args)
+            with self._lock:
+                self._entries[key] = entry
+            return entry.session(region)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: hits, misses (synchronous AssumeRole), refreshes (background), refresh_failures"""
+        with self._lock:
+            return dict(self._stats)
+
+    def log_stats(self, prefix: str = '') -> None:
+        """Log the process-lifetime counters"""
+        stats = self.stats()
+        if stats['misses'] or stats['refreshes']:
+            info(f"{prefix}Credential cache (process totals): {stats}")
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """Block until in-flight background refreshes finish"""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def invalidate(self, account_id: Optional[str] = None) -> None:
+        """Drop cached sessions for one account (or all), e.g. after the role was changed"""
+        with self._lock:
+            for key in [key for key in self._entries if account_id is None or key[0] == account_id]:
+                del self._entries[key]
+
+    def reset(self) -> None:
+        """Forget all sessions, counters and the STS client"""
+        self.wait_for_refreshes()
+        with self._lock:
+            self._entries.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+            self._sts = None
+
+    def _usable(self, key: CacheKey, count: bool = True,
+                assume_args: Optional[tuple] = None) -> Optional[_CachedSession]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry.expires_at - time.time()
+        if remaining <= self.min_remaining_seconds:
+            return None
+        if count:
+            self._count('hits')
+        if remaining <= self.refresh_margin_seconds and assume_args is not None:
+            self._refresh_in_background(key, assume_args)
+        return entry
+
+    def _refresh_in_background(self, key: CacheKey, assume_args: tuple) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(target=self._refresh, args=(key, assume_args), daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+
+    def _refresh(self, key: CacheKey, assume_args: tuple) -> None:
+        try:
+            entry = self._assume(key, *assume_args)
+            with self._lock:
+                self._entries[key] = entry
+                self._stats['refreshes'] += 1
+            debug(f"Refreshed credentials for {key[1]}")
+        except Exception as e:
+            # The cached credentials stay in use until they get too close to expiring
+            self._count('refresh_failures')
+            error(f"Background credential refresh failed for {key[1]}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def _assume(self, key: CacheKey, session_name: str, duration_seconds: int) -> _CachedSession:
+        account_id, role_arn, external_id = key
+        params = {'RoleArn': role_arn, 'RoleSessionName': session_name, 'DurationSeconds': duration_seconds}
+        if external_id:
+            params['ExternalId'] = external_id
+        credentials = self._sts_client().assume_role(**params)['Credentials']
+        return _CachedSession(credentials, credentials['Expiration'].timestamp())
+
+    def _sts_client(self):
+        # Created once, under the lock, from a session of its own: boto3's default session is
+        # not safe to create clients from concurrently (background refreshes run on threads)
+        with self._lock:
+            if self._sts is None:
+                self._sts = boto3.Session().client('sts')
+            return self._sts
+
+    def _key_lock(self, key: CacheKey) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+
+# Process-wide cache shared by every cross-account caller
+CREDENTIAL_CACHE = CredentialCache()
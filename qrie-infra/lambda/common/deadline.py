@@ -0,0 +1,39 @@
+"""
+Lambda deadline tracking for long-running handlers.
+
+Usage:
+    from common.deadline import Deadline
+
+    deadline = Deadline(context)
+    for unit in work:
+        if deadline.near():
+            # checkpoint and continue in a new invocation
+            ...
+
+Environment Variables:
+    CHECKPOINT_RESERVE_MS - Time (ms) left before the timeout at which handlers stop
+                            taking new work and checkpoint (default: 120000)
+"""
+import os
+from typing import Optional
+
+DEFAULT_RESERVE_MS = int(os.getenv('CHECKPOINT_RESERVE_MS', '120000'))
+
+
+class Deadline:
+    """Wraps a Lambda context's remaining time; never expires without a Lambda context"""
+
+    def __init__(self, context, reserve_ms: Optional[int] = None):
+        self._remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        self.reserve_ms = DEFAULT_RESERVE_MS if reserve_ms is None else reserve_ms
+
+    def remaining_ms(self) -> Optional[int]:
+        """Milliseconds left in this invocation (None when not running under Lambda)"""
+        if self._remaining is None:
+            return None
+        return self._remaining()
+
+    def near(self) -> bool:
+        """True once the remaining time drops to the reserve"""
+        remaining = self.remaining_ms()
+        return remaining is not None and remaining <= self.reserve_ms
@@ -0,0 +1,240 @@
+"""
+Per-account API rate governor for calls into customer accounts.
+
+Event processing, inventory and scans share one token bucket per (customer account, API
+family) within a process, so bursts are smoothed by delaying calls instead of letting
+them fail with throttling errors (and trigger SQS redeliveries). Governed clients wait
+for a token before every API call; a throttling response from AWS drains the bucket so
+the calls that follow back off too.
+
+Usage:
+    from common.rate_governor import govern_client, govern_session
+
+    s3_client = govern_client(session.client('s3'), account_id)
+    session = govern_session(session, account_id)  # Every client created from it is governed
+
+API families are botocore service ids ('s3', 'iam', 'ec2'); a single operation can get
+its own bucket by configuring '<service>.<Operation>'. Buckets are per Lambda container,
+so the effective account-wide rate scales with concurrent containers.
+
+Environment Variables:
+    API_RATE_LIMITS - Overrides as 'family=rate:burst,...' in calls per second, e.g.
+                      's3=50:100,iam=5:10,s3.GetBucketLocation=100:200'
+                      (rate 0 disables governing for the family)
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from common.logger import debug, info, error
+
+# Default (calls/second, burst) per API family and customer account
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    's3': (50.0, 100.0),
+    'iam': (10.0, 20.0),  # IAM read APIs throttle well below most services
+    'ec2': (20.0, 40.0),
+    'default': (20.0, 40.0),
+}
+
+# Error codes AWS returns when a caller is throttled
+THROTTLING_ERROR_CODES = frozenset([
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestLimitExceeded',
+    'TooManyRequestsException', 'SlowDown', 'RequestThrottled', 'RequestThrottledException',
+    'ProvisionedThroughputExceededException',
+])
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                # Tolerance for float error in the refill, which would otherwise leave a
+                # wait too small to advance the clock
+                if self._tokens >= 1.0 - 1e-9:
+                    self._tokens = max(self._tokens - 1.0, 0.0)
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def drain(self) -> None:
+        """Drop all tokens (the service is throttling us) so callers wait for the refill"""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateGovernor:
+    """Token buckets keyed by (account, API family) with throttle-wait metrics per family"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.limits = dict(DEFAULT_RATE_LIMITS if limits is None else limits)
+        self._buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'RateGovernor':
+        """Governor with DEFAULT_RATE_LIMITS overridden by API_RATE_LIMITS"""
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits.update(parse_rate_limits(os.environ.get('API_RATE_LIMITS', '')))
+        return cls(limits)
+
+    def family(self, service: str, operation: str) -> str:
+        """API family a call is governed under (operation-specific when configured)"""
+        operation_family = f"{service}.{operation}"
+        return operation_family if operation_family in self.limits else service
+
+    def acquire(self, account_id: str, service: str, operation: str) -> float:
+        """
+        Wait for a call slot in the account's bucket for this API.
+
+        Returns:
+            Seconds spent waiting
+        """
+        family = self.family(service, operation)
+        bucket = self._bucket(account_id, family)
+        waited = bucket.acquire() if bucket else 0.0
+        with self._lock:
+            stats = self._family_stats(family)
+            stats['calls'] += 1
+            if waited > 0:
+                stats['delayed_calls'] += 1
+                stats['wait_ms'] += waited * 1000
+                stats['max_wait_ms'] = max(stats['max_wait_ms'], waited * 1000)
+        if waited > 0:
+            debug(f"Delayed {service}.{operation} for account {account_id} by {waited * 1000:.0f}ms")
+        return waited
+
+    def throttled(self, account_id: str, service: str, operation: str) -> None:
+        """Record a throttling response and make subsequent calls wait for the refill"""
+        family = self.family(service, operation)
+        bucket = self._bucket(account_id, family)
+        if bucket:
+            bucket.drain()
+        with self._lock:
+            self._family_stats(family)['throttle_errors'] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-family counters: calls, delayed_calls, wait_ms, max_wait_ms, throttle_errors"""
+        with self._lock:
+            return {family: dict(stats) for family, stats in self._stats.items()}
+
+    def log_stats(self, prefix: str = '') -> None:
+        """Log the process-lifetime counters when any call was delayed or throttled"""
+        stats = self.stats()
+        if any(family['delayed_calls'] or family['throttle_errors'] for family in stats.values()):
+            info(f"{prefix}API rate governor (process totals): {stats}")
+
+    def reset(self) -> None:
+        """Forget all buckets and metrics"""
+        with self._lock:
+            self._buckets.clear()
+            self._stats.clear()
+
+    def _bucket(self, account_id: str, family: str) -> Optional[TokenBucket]:
+        key = (account_id, family)
+        bucket = self._buckets.get(key)
+        if bucket is None and key not in self._buckets:
+            with self._lock:
+                if key not in self._buckets:
+                    rate, burst = self.limits.get(family) or self.limits.get('default', (0.0, 0.0))
+                    self._buckets[key] = TokenBucket(rate, burst) if rate > 0 else None
+                bucket = self._buckets[key]
+        return bucket
+
+    def _family_stats(self, family: str) -> Dict[str, float]:
+        if family not in self._stats:
+            self._stats[family] = {'calls': 0, 'delayed_calls': 0, 'wait_ms': 0.0, 'max_wait_ms': 0.0,
+                                   'throttle_errors': 0}
+        return self._stats[family]
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse 'family=rate:burst,...' (burst defaults to twice the rate).
+
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            family, values = entry.split('=', 1)
+            rate, _, burst = values.partition(':')
+            limits[family.strip()] = (float(rate), float(burst) if burst else float(rate) * 2)
+        except ValueError:
+            raise ValueError(f"Invalid API_RATE_LIMITS entry '{entry}' (expected family=rate[:burst])")
+    return limits
+
+
+# Process-wide governor shared by every governed client
+try:
+    RATE_GOVERNOR = RateGovernor.from_env()
+except ValueError as e:
+    error(f"{str(e)} - using default API rate limits")
+    RATE_GOVERNOR = RateGovernor()
+
+
+def govern_client(client, account_id: str, governor: Optional[RateGovernor] = None):
+    """
+    Make a boto3 client wait for the account's rate governor before each API call.
+
+    Returns:
+        The same client
+    """
+    _register(client.meta.events, account_id, governor or RATE_GOVERNOR)
+    return client
+
+
+def govern_session(session, account_id: str, governor: Optional[RateGovernor] = None):
+    """
+    Govern every client subsequently created from a boto3 Session.
+
+    Returns:
+        The same session
+    """
+    _register(session.events, account_id, governor or RATE_GOVERNOR)
+    return session
+
+
+def _register(events, account_id: str, governor: RateGovernor) -> None:
+    def before_call(event_name, **kwargs):
+        _, service, operation = event_name.split('.', 2)
+        governor.acquire(account_id, service, operation)
+
+    def needs_retry(event_name, response=None, **kwargs):
+        # Observe only: returning None leaves the retry decision to botocore
+        if response is None:
+            return None
+        parsed = response[1] or {}
+        if parsed.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+            _, service, operation = event_name.split('.', 2)
+            governor.throttled(account_id, service, operation)
+        return None
+
+    events.register('before-call', before_call, unique_id=f"qrie-rate-governor-{id(governor)}")
+    # First, because botocore's retry handler ends the event by returning a delay
+    events.register_first('needs-retry', needs_retry, unique_id=f"qrie-rate-governor-retry-{id(governor)}")
@@ -69,6 +69,13 @@ def get_account_from_arn(arn: str) -> str:
         raise ValueError(f"Invalid ARN format: {arn}")
     return parts[4]
 
+def get_account_from_arn_or_unknown(arn: str) -> str:
+    """Extract account ID from ARN, or 'unknown' for malformed ARNs (as evaluators record them)."""
+    try:
+        return get_account_from_arn(arn)
+    except ValueError:
+        return 'unknown'
+
 def get_service_from_arn(arn: str) -> str:
     """Extract service name from ARN (e.g., 's3', 'ec2', 'iam')."""
     parts = arn.split(':')
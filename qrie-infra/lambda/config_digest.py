@@ -0,0 +1,145 @@
+"""
+Canonical configuration hashing for change detection.
+Produces stable digests of resource configurations (independent of key order and of
+DynamoDB's Decimal round trip), per-section digests stored alongside them so changed
+sections are found without loading the old configuration, structural diffs, and the
+evaluation fingerprints used by incremental scans.
+"""
+import hashlib
+import json
+import re
+from dataclasses import asdict, is_dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+# Top-level keys that change without the resource configuration changing
+VOLATILE_KEYS = frozenset(['LastSeenAt', 'Metadata', 'LastModified'])
+
+# Hex characters kept from each SHA-256 digest (128 bits)
+DIGEST_LENGTH = 32
+
+
+def canonical_json(config: Dict[str, Any]) -> str:
+    """Serialize a configuration deterministically (sorted keys, no volatile fields)"""
+    if not config:
+        return '{}'
+    filtered = {k: v for k, v in config.items() if k not in VOLATILE_KEYS}
+    return json.dumps(filtered, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+
+def config_digest(config: Dict[str, Any]) -> str:
+    """Stable digest of a resource configuration"""
+    return _hash(canonical_json(config))
+
+
+def section_digests(config: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Digest of each top-level section (key) of a configuration, volatile keys excluded"""
+    return {key: _hash(_canonical(value)) for key, value in (config or {}).items() if key not in VOLATILE_KEYS}
+
+
+def changed_sections(old_digests: Dict[str, str], new_digests: Dict[str, str]) -> List[str]:
+    """Top-level sections added, removed or changed between two section_digests() maps"""
+    return sorted(key for key in old_digests.keys() | new_digests.keys()
+                  if old_digests.get(key) != new_digests.get(key))
+
+
+def policy_version(launched_policy) -> str:
+    """
+    Version of a launched policy's evaluation inputs.
+    Changes whenever the launched record is updated (UpdatedAt) or its severity/scope differ.
+    """
+    scope = launched_policy.scope
+    payload = [
+        launched_policy.policy_id,
+        launched_policy.updated_at,
+        launched_policy.severity,
+        asdict(scope) if is_dataclass(scope) else scope
+    ]
+    return _hash(json.dumps(payload, sort_keys=True, default=_json_default))
+
+
+def evaluation_fingerprint(config_digest_value: str, policy_version_value: str) -> str:
+    """Fingerprint of one (resource configuration, launched policy) evaluation"""
+    return _hash(f"{config_digest_value}|{policy_version_value}")
+
+
+def changed_paths(old_config: Optional[Dict[str, Any]], new_config: Optional[Dict[str, Any]],
+                  only_sections: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Dotted paths whose values differ between two configurations.
+    Nested dicts are compared key by key; lists and scalars are compared whole (with the same
+    normalization as the digest, so DynamoDB Decimals equal live ints). Volatile keys are ignored.
+    
+    Args:
+        old_config: Stored configuration
+        new_config: Fresh configuration
+        only_sections: Top-level sections known to differ (see changed_sections) - the others
+                       are not walked
+    
+    Returns:
+        Sorted changed paths (e.g. ['PublicAccessBlockConfiguration.BlockPublicAcls', 'Versioning'])
+    """
+    keys = None if only_sections is None else set(only_sections)
+    old_config = {k: v for k, v in (old_config or {}).items()
+                  if k not in VOLATILE_KEYS and (keys is None or k in keys)}
+    new_config = {k: v for k, v in (new_config or {}).items()
+                  if k not in VOLATILE_KEYS and (keys is None or k in keys)}
+    changed: List[str] = []
+    _diff(old_config, new_config, '', changed)
+    return sorted(changed)
+
+
+def paths_overlap(read_paths: Iterable[str], changed: Iterable[str]) -> bool:
+    """
+    Whether any path read (e.g. by a policy) is affected by a changed path - equal, below or
+    above it. List indexes in read paths ('Rules[0].Status') match the list as a whole.
+    """
+    changed_steps = [_path_steps(path) for path in changed]
+    for read_path in read_paths:
+        read_steps = _path_steps(read_path)
+        for steps in changed_steps:
+            common = min(len(read_steps), len(steps))
+            if read_steps[:common] == steps[:common]:
+                return True
+    return False
+
+
+_LIST_INDEX = re.compile(r'\[\d+\]')
+
+
+def _path_steps(path: str) -> tuple:
+    return tuple(_LIST_INDEX.sub('', path).split('.'))
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any], prefix: str, changed: List[str]) -> None:
+    for key in old.keys() | new.keys():
+        path = f"{prefix}{key}"
+        old_value = old.get(key, _ABSENT)
+        new_value = new.get(key, _ABSENT)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            _diff(old_value, new_value, f"{path}.", changed)
+        elif old_value is _ABSENT or new_value is _ABSENT or _canonical(old_value) != _canonical(new_value):
+            changed.append(path)
+
+
+# Marker for keys present on one side of a diff only
+_ABSENT = object()
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+
+def _hash(payload: str) -> str:
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:DIGEST_LENGTH]
+
+
+def _json_default(obj):
+    """Normalize types that differ between live API responses and DynamoDB reads"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
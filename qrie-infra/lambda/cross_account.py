@@ -5,6 +5,9 @@ import boto3
 import os
 from typing import Dict, Optional
 from botocore.exceptions import ClientError
+from common.rate_governor import govern_session
+from common.credential_cache import CREDENTIAL_CACHE
+from common.client_pool import CLIENT_POOL
 
 
 # Set external ID at module load time
@@ -12,41 +15,68 @@ _qop_account_id = boto3.client('sts').get_caller_identity()['Account']
 EXTERNAL_ID = f"qrie-{_qop_account_id}-2024"
 
 def get_cross_account_session(customer_account_id: str, region: str) -> boto3.Session:
-    
-    role_arn = f"arn:aws:iam::{customer_account_id}:role/QrieReadOnly-{customer_account_id}"
-    
-    sts_client = boto3.client('sts')
-    
+    """
+    Session in a customer account; its clients are paced by the account's rate governor.
+    Sessions come from the process-wide credential cache, which shares its credentials with
+    the pooled clients (get_cross_account_client), so the role is only assumed again shortly
+    before the cached credentials expire.
+    """
     try:
-        response = sts_client.assume_role(
-            RoleArn=role_arn,
-            RoleSessionName=f"qrie-policy-eval-{customer_account_id}",
-            ExternalId=EXTERNAL_ID,
-            DurationSeconds=3600  # 1 hour
+        session = CREDENTIAL_CACHE.get_session(
+            customer_account_id,
+            _role_arn(customer_account_id),
+            region=region,
+            session_name=_session_name(customer_account_id),
+            external_id=EXTERNAL_ID
         )
         
-        credentials = response['Credentials']
+        # Registration is idempotent, so cached sessions are governed once
+        return govern_session(session, customer_account_id)
         
-        return boto3.Session(
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'],
-            region_name=region
+    except ClientError as e:
+        raise _translate_error(e, customer_account_id)
+
+
+def get_cross_account_client(customer_account_id: str, service: str, region: str):
+    """
+    Pooled client for a service in a customer account (reused across calls and warm
+    invocations; rebuilt when the cached credentials are refreshed).
+    """
+    try:
+        return CLIENT_POOL.get_client(
+            service,
+            customer_account_id,
+            _role_arn(customer_account_id),
+            region=region,
+            session_name=_session_name(customer_account_id),
+            external_id=EXTERNAL_ID
         )
-        
     except ClientError as e:
-        error_code = e.response['Error']['Code']
-        if error_code == 'AccessDenied':
-            raise ClientError(
-                error_response={
-                    'Error': {
-                        'Code': 'CrossAccountAccessDenied',
-                        'Message': f'Failed to assume role in customer account {customer_account_id}. Check role trust policy and external ID.'
-                    }
-                },
-                operation_name='AssumeRole'
-            )
-        raise
+        raise _translate_error(e, customer_account_id)
+
+
+def _role_arn(customer_account_id: str) -> str:
+    return f"arn:aws:iam::{customer_account_id}:role/QrieReadOnly-{customer_account_id}"
+
+
+def _session_name(customer_account_id: str) -> str:
+    return f"qrie-policy-eval-{customer_account_id}"
+
+
+def _translate_error(e: ClientError, customer_account_id: str) -> ClientError:
+    """Explain AccessDenied on AssumeRole; other errors are returned unchanged"""
+    error_code = e.response['Error']['Code']
+    if error_code == 'AccessDenied':
+        return ClientError(
+            error_response={
+                'Error': {
+                    'Code': 'CrossAccountAccessDenied',
+                    'Message': f'Failed to assume role in customer account {customer_account_id}. Check role trust policy and external ID.'
+                }
+            },
+            operation_name='AssumeRole'
+        )
+    return e
 
 
 # Alias for backward compatibility with tests
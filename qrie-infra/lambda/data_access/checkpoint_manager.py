@@ -0,0 +1,77 @@
+"""
+CheckpointManager - Resumable scan cursors.
+Persists the progress of scans that continue across Lambda invocations in the summary table.
+"""
+import os
+import time
+import datetime
+from decimal import Decimal
+from typing import Dict, Optional
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common_utils import get_summary_table
+from common.logger import debug
+
+# Checkpoints outlive any realistic scan, then expire via the summary table TTL
+CHECKPOINT_TTL_SECONDS = 2 * 24 * 3600
+
+
+class CheckpointManager:
+    """Manages scan checkpoints stored as "<kind>_checkpoint#<checkpoint_id>" summary items"""
+
+    def __init__(self):
+        self.table = get_summary_table()
+
+    def save_checkpoint(self, kind: str, checkpoint_id: str, cursor: Dict) -> int:
+        """
+        Save (overwrite) a scan's cursor.
+
+        Args:
+            kind: Scan kind (e.g. "policy_scan", "inventory_scan")
+            checkpoint_id: Scan identifier (scan_id, or scan_id#shard for shards)
+            cursor: Handler-specific progress (must be DynamoDB-serializable)
+
+        Returns:
+            Number of invocations the scan has checkpointed so far
+        """
+        response = self.table.update_item(
+            Key={'Type': self._key(kind, checkpoint_id)},
+            UpdateExpression='SET #cursor = :cursor, updated_at = :now, expires_at = :expires ADD invocations :one',
+            ExpressionAttributeNames={'#cursor': 'cursor'},
+            ExpressionAttributeValues={
+                ':cursor': cursor,
+                ':now': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                ':expires': int(time.time()) + CHECKPOINT_TTL_SECONDS,
+                ':one': 1
+            },
+            ReturnValues='UPDATED_NEW'
+        )
+        invocations = int(response['Attributes']['invocations'])
+        debug(f"Saved {kind} checkpoint {checkpoint_id} (invocation {invocations})")
+        return invocations
+
+    def load_checkpoint(self, kind: str, checkpoint_id: str) -> Optional[Dict]:
+        """Load a scan's cursor (numbers converted back to int/float), or None if absent"""
+        response = self.table.get_item(Key={'Type': self._key(kind, checkpoint_id)})
+        item = response.get('Item')
+        if not item:
+            return None
+        return self._convert_decimals(item['cursor'])
+
+    def delete_checkpoint(self, kind: str, checkpoint_id: str) -> None:
+        """Remove a finished scan's checkpoint"""
+        self.table.delete_item(Key={'Type': self._key(kind, checkpoint_id)})
+
+    def _key(self, kind: str, checkpoint_id: str) -> str:
+        return f"{kind}_checkpoint#{checkpoint_id}"
+
+    def _convert_decimals(self, obj):
+        """Recursively convert Decimal objects to int/float"""
+        if isinstance(obj, Decimal):
+            return int(obj) if obj % 1 == 0 else float(obj)
+        elif isinstance(obj, dict):
+            return {key: self._convert_decimals(value) for key, value in obj.items()}
+        elif isinstance(obj, list):
+            return [self._convert_decimals(item) for item in obj]
+        return obj
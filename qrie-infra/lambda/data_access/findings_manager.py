@@ -74,11 +74,12 @@ class FindingsManager:
                     "#accountService = :acct, "
                     "#firstSeen = if_not_exists(#firstSeen, :firstSeen)"
                 ),
-                # Allow if new item, or existing is older, or missing DescribeTime
+                # Allow if new item, or existing is not newer, or missing DescribeTime
+                # (equal describe times come from the same config, so the latest evaluation wins)
                 ConditionExpression=(
                     "attribute_not_exists(#arn) OR "
                     "attribute_not_exists(#describeTime) OR "
-                    "#describeTime < :now"
+                    "#describeTime <= :now"
                 ),
                 ExpressionAttributeNames={
                     "#arn": "ARN",
@@ -105,38 +106,95 @@ class FindingsManager:
             # Item exists and has more recent describe time - this is expected
             debug(f"Skipping update for {resource_arn}#{policy_id} - existing describe time is more recent than {describe_time_ms}")
 
-    def close_finding(self, resource_arn: str, policy_id: str) -> None:
-        """Close a finding (mark as resolved)"""
+    def close_finding(self, resource_arn: str, policy_id: str, describe_time_ms: Optional[int] = None) -> None:
+        """
+        Close a finding (mark as resolved).
+        
+        Args:
+            resource_arn: Resource ARN
+            policy_id: Policy ID
+            describe_time_ms: Timestamp (milliseconds) when the compliant config was captured.
+                When given, the close is conditional: it is skipped if there is no finding
+                (so compliant resources never get RESOLVED stubs) or the stored finding comes
+                from a newer config, and it records the describe time so an older outcome
+                cannot reopen the finding.
+        """
         finding_key = {'ARN': resource_arn, 'Policy': policy_id}
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
         
-        self.table.update_item(
-            Key=finding_key,
-            UpdateExpression='SET #state = :state, #lastEvaluated = :now',
-            ExpressionAttributeNames={
-                '#state': 'State',
-                '#lastEvaluated': 'LastEvaluated'
-            },
-            ExpressionAttributeValues={
-                ':state': 'RESOLVED',
-                ':now': now
-            }
-        )
+        if describe_time_ms is None:
+            self.table.update_item(
+                Key=finding_key,
+                UpdateExpression='SET #state = :state, #lastEvaluated = :now',
+                ExpressionAttributeNames={
+                    '#state': 'State',
+                    '#lastEvaluated': 'LastEvaluated'
+                },
+                ExpressionAttributeValues={
+                    ':state': 'RESOLVED',
+                    ':now': now
+                }
+            )
+            return
+        
+        try:
+            self.table.update_item(
+                Key=finding_key,
+                UpdateExpression='SET #state = :state, #lastEvaluated = :now, #describeTime = :describeTime',
+                # Only existing findings are closed (no RESOLVED stubs), and never from an older config
+                ConditionExpression=(
+                    "attribute_exists(#arn) AND "
+                    "(attribute_not_exists(#describeTime) OR #describeTime <= :describeTime)"
+                ),
+                ExpressionAttributeNames={
+                    '#arn': 'ARN',
+                    '#state': 'State',
+                    '#lastEvaluated': 'LastEvaluated',
+                    '#describeTime': 'DescribeTime'
+                },
+                ExpressionAttributeValues={
+                    ':state': 'RESOLVED',
+                    ':now': now,
+                    ':describeTime': describe_time_ms
+                }
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            # No finding to close, or it has a more recent describe time - this is expected
+            debug(f"Skipping close for {resource_arn}#{policy_id} - no finding, or existing describe time is more recent than {describe_time_ms}")
 
-    def delete_findings_for_resource(self, resource_arn: str) -> None:
+    def delete_findings_for_resource(self, resource_arn: str) -> int:
         """Delete all findings for a resource (when resource goes out of scope)"""
-        # Query all findings for this resource
-        response = self.table.query(
-            KeyConditionExpression='ARN = :arn',
-            ExpressionAttributeValues={':arn': resource_arn}
-        )
+        return self.delete_findings_for_resources([resource_arn])
+    
+    def delete_findings_for_resources(self, resource_arns: List[str]) -> int:
+        """
+        Delete all findings for resources (e.g. deleted in the customer account).
+        Queries every page of each ARN's findings (keys only) and deletes them with batch writes.
         
-        # Delete each finding
-        for item in response.get('Items', []):
-            self.table.delete_item(Key={
-                'ARN': item['ARN'],
-                'Policy': item['Policy']
-            })
+        Args:
+            resource_arns: Resource ARNs
+            
+        Returns:
+            Number of findings deleted
+        """
+        deleted = 0
+        with self.table.batch_writer() as batch:
+            for resource_arn in resource_arns:
+                query_kwargs = {
+                    'KeyConditionExpression': 'ARN = :arn',
+                    'ExpressionAttributeValues': {':arn': resource_arn},
+                    'ProjectionExpression': 'ARN, #policy',
+                    'ExpressionAttributeNames': {'#policy': 'Policy'}
+                }
+                while True:
+                    response = self.table.query(**query_kwargs)
+                    for item in response.get('Items', []):
+                        batch.delete_item(Key={'ARN': item['ARN'], 'Policy': item['Policy']})
+                        deleted += 1
+                    if 'LastEvaluatedKey' not in response:
+                        break
+                    query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return deleted
     
     def purge_findings_for_policy(self, policy_id: str) -> int:
         """
@@ -236,6 +294,43 @@ class FindingsManager:
         response = self.table.query(**query_params)
         return [self._item_to_finding(item) for item in response.get('Items', [])]
 
+    def get_finding_states_for_account_service(self, account_service: str) -> Dict[tuple, Dict]:
+        """
+        Load current state of every finding in an AccountService partition using the GSI.
+        Used by the scanner to decide which evaluations actually need a write.
+        
+        Args:
+            account_service: Account and service (e.g., "123456789012_s3")
+            
+        Returns:
+            Dict keyed by (ARN, Policy) with State, Severity, Evidence and DescribeTime
+        """
+        query_params = {
+            'IndexName': 'AccountService-State-index',
+            'KeyConditionExpression': 'AccountService = :account_service',
+            'ProjectionExpression': 'ARN, #policy, #state, Severity, Evidence, DescribeTime',
+            'ExpressionAttributeNames': {'#policy': 'Policy', '#state': 'State'},
+            'ExpressionAttributeValues': {':account_service': account_service}
+        }
+        
+        states = {}
+        while True:
+            response = self.table.query(**query_params)
+            for item in response.get('Items', []):
+                states[(item['ARN'], item['Policy'])] = {
+                    'State': item.get('State'),
+                    'Severity': int(item['Severity']) if item.get('Severity') is not None else None,
+                    'Evidence': self._convert_decimals_to_int(item.get('Evidence', {})),
+                    'DescribeTime': int(item['DescribeTime']) if item.get('DescribeTime') is not None else None
+                }
+            
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+            query_params['ExclusiveStartKey'] = last_key
+        
+        return states
+
     def get_findings_paginated(self, account_id: Optional[str] = None, policy_id: Optional[str] = None,
                              state_filter: Optional[str] = None, severity_filter: Optional[str] = None,
                              page_size: int = 50, next_token: Optional[str] = None) -> Dict:
@@ -0,0 +1,205 @@
+"""
+FindingsWriter - Buffered finding persistence shared by the policy scanner and event processor.
+Collects evaluation outcomes in memory and flushes them in batches on parallel workers.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_access.findings_manager import FindingsManager
+from common.logger import debug, error
+
+# Operations per flush batch (one batch per flush worker task)
+DEFAULT_BATCH_SIZE = 25
+# Parallel flush workers
+DEFAULT_FLUSH_WORKERS = 4
+# Buffered operations that trigger an automatic flush
+DEFAULT_AUTO_FLUSH_THRESHOLD = 500
+
+
+class FindingsFlushError(Exception):
+    """Raised by FindingsWriter.flush when finding writes failed (all other operations were written)"""
+
+    def __init__(self, failed: List[Tuple[str, str]], stats: Dict[str, int]):
+        super().__init__(f"{len(failed)} finding writes failed")
+        self.failed = failed  # (ARN, Policy) keys whose outcome was not written
+        self.stats = stats
+
+    @property
+    def failed_arns(self) -> Set[str]:
+        """Resources with at least one unwritten finding"""
+        return {arn for arn, _ in self.failed}
+
+
+class FindingsWriter:
+    """
+    Buffers finding puts/closes and flushes them in batches.
+
+    Operations are coalesced per (ARN, Policy) key, keeping only the outcome with the
+    newest describe time. Each flushed put or close still goes through FindingsManager,
+    whose condition expressions enforce the DescribeTime monotonic guarantee
+    (BatchWriteItem cannot carry condition expressions, so batches fan out to
+    conditional UpdateItem calls on the flush workers instead).
+
+    Failed writes are collected across flushes (including automatic ones) and raised by the
+    next explicit flush() as FindingsFlushError, so callers can retry the resources they cover.
+
+    Thread-safe: scan workers may record outcomes concurrently.
+    """
+
+    def __init__(self, findings_manager: Optional[FindingsManager] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_workers: int = DEFAULT_FLUSH_WORKERS,
+                 auto_flush_threshold: int = DEFAULT_AUTO_FLUSH_THRESHOLD):
+        self.findings_manager = findings_manager or FindingsManager()
+        self.batch_size = max(1, batch_size)
+        self.flush_workers = max(1, flush_workers)
+        self.auto_flush_threshold = auto_flush_threshold
+        self._buffer: Dict[Tuple[str, str], Dict] = {}
+        self._failed: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self.stats = {
+            'puts': 0,
+            'closes': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'flushes': 0
+        }
+
+    # ============================================================================
+    # RECORDING
+    # ============================================================================
+
+    def put_finding(self, resource_arn: str, policy_id: str, account_service: str,
+                    severity: int, state: str, evidence: Dict, describe_time_ms: int) -> None:
+        """Buffer a create/update of a finding (same arguments as FindingsManager.put_finding)"""
+        self._enqueue({
+            'op': 'put',
+            'resource_arn': resource_arn,
+            'policy_id': policy_id,
+            'account_service': account_service,
+            'severity': severity,
+            'state': state,
+            'evidence': evidence,
+            'describe_time_ms': describe_time_ms
+        })
+
+    def close_finding(self, resource_arn: str, policy_id: str, describe_time_ms: int) -> None:
+        """Buffer closing a finding (describe time is used to order against other outcomes)"""
+        self._enqueue({
+            'op': 'close',
+            'resource_arn': resource_arn,
+            'policy_id': policy_id,
+            'describe_time_ms': describe_time_ms
+        })
+
+    def pending_count(self) -> int:
+        """Number of buffered (not yet flushed) operations"""
+        with self._lock:
+            return len(self._buffer)
+
+    # ============================================================================
+    # FLUSHING
+    # ============================================================================
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Write all buffered operations in batches on parallel workers.
+
+        Returns:
+            Cumulative writer stats
+
+        Raises:
+            FindingsFlushError: If any write failed since the last flush (the keys not written)
+        """
+        self._write_buffered()
+        with self._lock:
+            failed, self._failed = self._failed, []
+            stats = dict(self.stats)
+        if failed:
+            raise FindingsFlushError(failed, stats)
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+        return False
+
+    # ============================================================================
+    # INTERNAL HELPERS
+    # ============================================================================
+
+    def _write_buffered(self) -> None:
+        """Write the buffer in batches on parallel workers (failures collected for flush())"""
+        with self._lock:
+            operations = list(self._buffer.values())
+            self._buffer = {}
+
+        if operations:
+            batches = [operations[i:i + self.batch_size] for i in range(0, len(operations), self.batch_size)]
+            workers = min(self.flush_workers, len(batches))
+
+            if workers == 1:
+                for batch in batches:
+                    self._write_batch(batch)
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(self._write_batch, batches))
+
+            with self._lock:
+                self.stats['flushes'] += 1
+            debug(f"Flushed {len(operations)} finding operations in {len(batches)} batches")
+
+    def _enqueue(self, operation: Dict) -> None:
+        """Add operation to buffer, coalescing with any pending operation for the same key"""
+        key = (operation['resource_arn'], operation['policy_id'])
+
+        with self._lock:
+            pending = self._buffer.get(key)
+            if pending is not None:
+                self.stats['coalesced'] += 1
+                if pending['describe_time_ms'] > operation['describe_time_ms']:
+                    # Pending outcome was captured from a newer config - keep it
+                    return
+            self._buffer[key] = operation
+            should_flush = len(self._buffer) >= self.auto_flush_threshold
+
+        if should_flush:
+            self._write_buffered()
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        """Write one batch of operations (runs on a flush worker)"""
+        puts = closes = 0
+        failed = []
+        for operation in batch:
+            try:
+                if operation['op'] == 'put':
+                    self.findings_manager.put_finding(
+                        resource_arn=operation['resource_arn'],
+                        policy_id=operation['policy_id'],
+                        account_service=operation['account_service'],
+                        severity=operation['severity'],
+                        state=operation['state'],
+                        evidence=operation['evidence'],
+                        describe_time_ms=operation['describe_time_ms']
+                    )
+                    puts += 1
+                else:
+                    self.findings_manager.close_finding(
+                        operation['resource_arn'], operation['policy_id'], operation['describe_time_ms']
+                    )
+                    closes += 1
+            except Exception as e:
+                error(f"Error writing finding {operation['resource_arn']}#{operation['policy_id']}: {str(e)}")
+                failed.append((operation['resource_arn'], operation['policy_id']))
+
+        with self._lock:
+            self.stats['puts'] += puts
+            self.stats['closes'] += closes
+            self.stats['errors'] += len(failed)
+            self._failed.extend(failed)
@@ -6,7 +6,7 @@ import os
 import boto3
 import datetime
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 from functools import lru_cache
 from decimal import Decimal
 from botocore.exceptions import ClientError
@@ -18,6 +18,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import shared tables from common
 from common_utils import get_resources_table, get_summary_table
 from common.logger import debug, info, error
+from config_digest import config_digest, section_digests
+
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+# Attempts (with exponential backoff) to resolve UnprocessedKeys before giving up on them
+BATCH_GET_MAX_ATTEMPTS = 5
 
 class InventoryManager:
     """Manages all inventory data access operations with caching"""
@@ -51,6 +57,80 @@ class InventoryManager:
             error(f"Error getting resource by ARN {arn}: {e}")
             return None
     
+    def get_resource_snapshots(self, resources: List[Tuple[str, str]],
+                               include_configuration: bool = False) -> Dict[str, Optional[Dict]]:
+        """
+        Fetch the snapshot time and config digests of many resources with BatchGetItem.
+        Reads are projected to LastSeenAt/ConfigDigest/SectionDigests, ceil(N/100) requests per call,
+        with UnprocessedKeys retried under exponential backoff.
+        
+        Args:
+            resources: (arn, account_id) pairs - account_id is needed for S3 ARNs, which
+                       carry none (duplicates ignored)
+            include_configuration: Also return the stored Configuration (read capacity is
+                                   charged per item, so this only adds transfer)
+            
+        Returns:
+            ARN -> {'LastSeenAt': int, 'ConfigDigest': Optional[str], 'SectionDigests': Optional[dict]
+            [, 'Configuration': dict]}, or None when the resource is not in inventory. ARNs that stayed unprocessed after all attempts
+            are omitted (callers fall back to get_resource).
+        """
+        keys = {}
+        for arn, account_id in resources:
+            keys[arn] = {'AccountService': f"{account_id}_{self._get_service_from_arn(arn)}", 'ARN': arn}
+        
+        # The table's client (de)serializes attribute values like the Table resource does
+        client = self.resource_table.meta.client
+        table_name = self.resource_table.name
+        snapshots: Dict[str, Optional[Dict]] = {}
+        unresolved = set()
+        
+        projection = '#arn, #lastSeen, #digest, #sections'
+        attribute_names = {'#arn': 'ARN', '#lastSeen': 'LastSeenAt', '#digest': 'ConfigDigest',
+                           '#sections': 'SectionDigests'}
+        if include_configuration:
+            projection += ', #config'
+            attribute_names['#config'] = 'Configuration'
+        
+        key_list = list(keys.values())
+        for start in range(0, len(key_list), BATCH_GET_MAX_KEYS):
+            chunk = key_list[start:start + BATCH_GET_MAX_KEYS]
+            request = {table_name: {
+                'Keys': chunk,
+                'ProjectionExpression': projection,
+                'ExpressionAttributeNames': attribute_names
+            }}
+            for key in chunk:
+                snapshots[key['ARN']] = None  # Absent unless returned below
+            
+            for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+                response = client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(table_name, []):
+                    last_seen = item.get('LastSeenAt')
+                    snapshot = {
+                        'LastSeenAt': int(last_seen) if last_seen is not None else 0,
+                        'ConfigDigest': item.get('ConfigDigest'),
+                        'SectionDigests': item.get('SectionDigests')
+                    }
+                    if include_configuration:
+                        snapshot['Configuration'] = item.get('Configuration')
+                    snapshots[item['ARN']] = snapshot
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                if attempt < BATCH_GET_MAX_ATTEMPTS - 1:
+                    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            
+            for key in request.get(table_name, {}).get('Keys', []):
+                arn = key['ARN']
+                unresolved.add(arn)
+                snapshots.pop(arn, None)
+        
+        if unresolved:
+            error(f"BatchGetItem left {len(unresolved)} of {len(keys)} resources unprocessed after {BATCH_GET_MAX_ATTEMPTS} attempts")
+        debug(f"Fetched {len(snapshots)} resource snapshots in {-(-len(key_list) // BATCH_GET_MAX_KEYS)} batch reads")
+        return snapshots
+    
     # ============================================================================
     # WRITE OPERATIONS
     # ============================================================================
@@ -68,12 +148,38 @@ class InventoryManager:
             configuration: Resource configuration dict
             describe_time_ms: Timestamp (milliseconds) when describe call was made (REQUIRED)
         """
+        self._upsert(account_id, service, arn, configuration, describe_time_ms, return_previous=False)
+
+    def upsert_resource_returning_previous(self, account_id: str, service: str, arn: str, configuration: Dict,
+                                           describe_time_ms: int) -> Tuple[bool, Optional[Dict]]:
+        """
+        Conditional upsert (see upsert_resource) that also returns the snapshot it replaced, so
+        change detection needs no read before the write.
+        
+        Args:
+            account_id: AWS account ID
+            service: Service name (s3, ec2, iam, etc.)
+            arn: Resource ARN
+            configuration: Resource configuration dict
+            describe_time_ms: Timestamp (milliseconds) when describe call was made
+            
+        Returns:
+            (written, previous) - written is False when the row holds a more recent describe;
+            previous holds the replaced Configuration/ConfigDigest/SectionDigests/LastSeenAt
+            (None for a new resource)
+        """
+        return self._upsert(account_id, service, arn, configuration, describe_time_ms, return_previous=True)
+
+    def _upsert(self, account_id: str, service: str, arn: str, configuration: Dict, describe_time_ms: int,
+                return_previous: bool) -> Tuple[bool, Optional[Dict]]:
         account_service = f"{account_id}_{service}"
+        previous = None
         
         try:
-            self.resource_table.update_item(
+            response = self.resource_table.update_item(
                 Key={'AccountService': account_service, 'ARN': arn},
-                UpdateExpression='SET #config = :config, #describeTime = :now, #lastSeen = :now',
+                UpdateExpression=('SET #config = :config, #digest = :digest, #sections = :sections, '
+                                  '#describeTime = :now, #lastSeen = :now'),
                 ConditionExpression=(
                     'attribute_not_exists(ARN) OR '
                     'attribute_not_exists(#describeTime) OR '
@@ -81,22 +187,153 @@ class InventoryManager:
                 ),
                 ExpressionAttributeNames={
                     '#config': 'Configuration',
+                    '#digest': 'ConfigDigest',
+                    '#sections': 'SectionDigests',
                     '#describeTime': 'DescribeTime',
                     '#lastSeen': 'LastSeenAt'
                 },
                 ExpressionAttributeValues={
                     ':config': configuration,
+                    ':digest': config_digest(configuration),
+                    ':sections': section_digests(configuration),
                     ':now': describe_time_ms
                 },
-                ReturnValues='NONE'
+                # Old values of the updated attributes only (not charged as a read)
+                ReturnValues='UPDATED_OLD' if return_previous else 'NONE'
             )
+            previous = response.get('Attributes') or None
             debug(f"Updated resource {arn} with describe time {describe_time_ms}")
+            written = True
         except self.resource_table.meta.client.exceptions.ConditionalCheckFailedException:
             # Item exists and has more recent describe time - this is expected
             debug(f"Skipping update for {arn} - existing describe time is more recent than {describe_time_ms}")
+            written = False
         
         # Clear relevant caches
         self._clear_resource_cache(account_id, service)
+        return written, previous
+
+    def revert_upsert(self, account_id: str, service: str, arn: str, describe_time_ms: int,
+                      previous: Optional[Dict]) -> bool:
+        """
+        Undo an upsert_resource_returning_previous write (e.g. its findings could not be written),
+        unless the row was written again since.
+        
+        Args:
+            account_id: AWS account ID
+            service: Service name (s3, ec2, iam, etc.)
+            arn: Resource ARN
+            describe_time_ms: Describe time of the write to undo
+            previous: Snapshot it returned (None: the write created the row, which is deleted)
+            
+        Returns:
+            True if reverted, False if the row no longer holds that write
+        """
+        account_service = f"{account_id}_{service}"
+        key = {'AccountService': account_service, 'ARN': arn}
+        condition = {
+            'ConditionExpression': '#DescribeTime = :written',
+            'ExpressionAttributeNames': {'#DescribeTime': 'DescribeTime'},
+            'ExpressionAttributeValues': {':written': describe_time_ms}
+        }
+        try:
+            if not previous or 'LastSeenAt' not in previous:
+                self.resource_table.delete_item(Key=key, **condition)
+            else:
+                names = ('Configuration', 'ConfigDigest', 'SectionDigests', 'DescribeTime', 'LastSeenAt')
+                restored = [name for name in names if name in previous]
+                removed = [name for name in names if name not in previous]
+                expression = 'SET ' + ', '.join(f"#{name} = :{name}" for name in restored)
+                if removed:
+                    expression += ' REMOVE ' + ', '.join(f"#{name}" for name in removed)
+                self.resource_table.update_item(
+                    Key=key,
+                    UpdateExpression=expression,
+                    ConditionExpression=condition['ConditionExpression'],
+                    ExpressionAttributeNames={f"#{name}": name for name in names},
+                    ExpressionAttributeValues={':written': describe_time_ms,
+                                               **{f":{name}": previous[name] for name in restored}}
+                )
+        except self.resource_table.meta.client.exceptions.ConditionalCheckFailedException:
+            debug(f"Not reverting {arn} - written again since describe time {describe_time_ms}")
+            return False
+        
+        self._clear_resource_cache(account_id, service)
+        return True
+
+    def update_resource_configuration(self, account_id: str, service: str, arn: str, configuration: Dict,
+                                      expected_last_seen_ms: int, expected_digest: str) -> bool:
+        """
+        Replace a resource's configuration only if the row still holds the snapshot it was
+        derived from (used for partial refreshes merged into the stored configuration).
+        LastSeenAt/DescribeTime are kept: sections that were not re-described are still as of
+        the last full describe, so events after it must not be treated as stale.
+        
+        Args:
+            account_id: AWS account ID
+            service: Service name (s3, ec2, iam, etc.)
+            arn: Resource ARN
+            configuration: Merged resource configuration
+            expected_last_seen_ms: LastSeenAt of the snapshot the configuration was merged into
+            expected_digest: ConfigDigest of that snapshot
+            
+        Returns:
+            True if updated, False if the row changed (or was deleted) since it was read
+        """
+        account_service = f"{account_id}_{service}"
+        try:
+            self.resource_table.update_item(
+                Key={'AccountService': account_service, 'ARN': arn},
+                UpdateExpression='SET #config = :config, #digest = :digest, #sections = :sections',
+                ConditionExpression='attribute_exists(ARN) AND #lastSeen = :expectedLastSeen AND #digest = :expectedDigest',
+                ExpressionAttributeNames={
+                    '#config': 'Configuration',
+                    '#digest': 'ConfigDigest',
+                    '#sections': 'SectionDigests',
+                    '#lastSeen': 'LastSeenAt'
+                },
+                ExpressionAttributeValues={
+                    ':config': configuration,
+                    ':digest': config_digest(configuration),
+                    ':sections': section_digests(configuration),
+                    ':expectedLastSeen': expected_last_seen_ms,
+                    ':expectedDigest': expected_digest
+                },
+                ReturnValues='NONE'
+            )
+        except self.resource_table.meta.client.exceptions.ConditionalCheckFailedException:
+            debug(f"Skipping configuration update for {arn} - resource changed since it was read")
+            return False
+        
+        self._clear_resource_cache(account_id, service)
+        return True
+
+    def set_evaluation_fingerprints(self, account_service: str, arn: str, fingerprints: Dict[str, str]) -> bool:
+        """
+        Record the evaluation fingerprints for a resource (used by incremental policy scans).
+        Only updates existing rows so a resource deleted mid-scan is not recreated as a stub.
+        
+        Args:
+            account_service: Partition key (e.g., "123456789012_s3")
+            arn: Resource ARN
+            fingerprints: Map of policy_id -> evaluation fingerprint
+            
+        Returns:
+            True if the row was updated, False if the resource no longer exists
+        """
+        try:
+            self.resource_table.update_item(
+                Key={'AccountService': account_service, 'ARN': arn},
+                UpdateExpression='SET #fingerprints = :fingerprints',
+                ConditionExpression='attribute_exists(ARN)',
+                ExpressionAttributeNames={'#fingerprints': 'EvaluationFingerprints'},
+                ExpressionAttributeValues={':fingerprints': fingerprints},
+                ReturnValues='NONE'
+            )
+            return True
+        except self.resource_table.meta.client.exceptions.ConditionalCheckFailedException:
+            debug(f"Skipping fingerprint update for {arn} - resource no longer in inventory")
+            return False
 
     def delete_resource(self, arn: str, account_id: Optional[str] = None) -> None:
         """Delete a resource from inventory
@@ -119,6 +356,23 @@ class InventoryManager:
         # Clear relevant caches
         self._clear_resource_cache(account_id, service)
 
+    def delete_resources(self, resources: List[Tuple[str, str]]) -> None:
+        """
+        Delete resources from inventory with batch writes.
+        
+        Args:
+            resources: (arn, account_id) pairs
+        """
+        affected = set()
+        with self.resource_table.batch_writer(overwrite_by_pkeys=['AccountService', 'ARN']) as batch:
+            for arn, account_id in resources:
+                service = self._get_service_from_arn(arn)
+                batch.delete_item(Key={'AccountService': f"{account_id}_{service}", 'ARN': arn})
+                affected.add((account_id, service))
+        
+        for account_id, service in affected:
+            self._clear_resource_cache(account_id, service)
+
     def bulk_upsert_resources(self, resources: List[Dict]) -> None:
         """Bulk upsert multiple resources for efficiency"""
         with self.resource_table.batch_writer() as batch:
@@ -188,6 +442,37 @@ class InventoryManager:
         response = self.resource_table.query(**query_params)
         return response.get('Items', [])
 
+    def iter_resource_pages(self, account_service: str, exclusive_start_key: Optional[Dict] = None,
+                            page_size: Optional[int] = None) -> Iterator[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        Stream all resources for an account/service one query page at a time (uncached).
+        Use this for full-partition passes (e.g. policy scans) so each partition is read once.
+        
+        Args:
+            account_service: Partition key (e.g., "123456789012_s3")
+            exclusive_start_key: Optional LastEvaluatedKey to resume from
+            page_size: Optional query page Limit
+            
+        Yields:
+            (items, last_evaluated_key) tuples - last_evaluated_key is None on the final page
+        """
+        query_params = {
+            'KeyConditionExpression': 'AccountService = :account_service',
+            'ExpressionAttributeValues': {':account_service': account_service}
+        }
+        if page_size:
+            query_params['Limit'] = page_size
+        
+        last_key = exclusive_start_key
+        while True:
+            if last_key:
+                query_params['ExclusiveStartKey'] = last_key
+            response = self.resource_table.query(**query_params)
+            last_key = response.get('LastEvaluatedKey')
+            yield response.get('Items', []), last_key
+            if not last_key:
+                break
+
     def get_resources_paginated(self, account_id: Optional[str] = None, service: Optional[str] = None,
                               page_size: int = 50, next_token: Optional[str] = None) -> Dict:
         """Get paginated resources with optional filtering"""
@@ -8,14 +8,32 @@ import datetime
 import importlib
 import importlib.util
 import inspect
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from functools import lru_cache
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from policy_definition import PolicyDefinition, Policy, ScopeConfig
+from policy_definition import PolicyDefinition, Policy, ScopeConfig, EvaluationContext, PolicyEvaluator
+from policy_rules import compile_rule_evaluator
 from common_utils import get_policies_table
-from common.logger import error
+from common.logger import debug, error
+
+# Process-wide evaluators by policy ID, tagged with the launched policy's UpdatedAt.
+# PolicyManager is created per invocation, so this is what survives warm Lambda
+# invocations; an entry is reused only while UpdatedAt (bumped by every launch/update)
+# is unchanged, and is evicted when this process changes or deletes the launched policy.
+_evaluator_cache: Dict[str, Tuple[str, PolicyEvaluator]] = {}
+_evaluator_cache_lock = threading.Lock()
+
+
+def clear_evaluator_cache(policy_id: Optional[str] = None) -> None:
+    """Evict cached evaluators for one policy (or all policies)"""
+    with _evaluator_cache_lock:
+        if policy_id is None:
+            _evaluator_cache.clear()
+        else:
+            _evaluator_cache.pop(policy_id, None)
 
 class PolicyManager:
     """Manages all policy data access operations with caching"""
@@ -71,6 +89,10 @@ class PolicyManager:
         if not policy_def:
             raise ValueError(f"Policy {policy_id} not found")
         
+        # Declarative policies compile to an evaluator; no evaluator module needed
+        if policy_def.rule is not None:
+            return compile_rule_evaluator(policy_def)
+        
         module_path = f"policies.{policy_def.evaluation_module}"
         try:
             module = importlib.import_module(module_path)
@@ -86,16 +108,41 @@ class PolicyManager:
         except ImportError as e:
             raise ValueError(f"Could not import evaluation module {module_path}: {str(e)}")
 
-    def create_policy_evaluator(self, policy_id: str, launched_policy: Policy):
-        """Create a policy evaluator instance with launched policy configuration"""
-        policy_def = self.get_policy_definition(policy_id)
-        if not policy_def:
-            raise ValueError(f"Policy {policy_id} not found")
+    def create_policy_evaluator(self, policy_id: str, launched_policy: Policy,
+                                context: Optional[EvaluationContext] = None):
+        """Create a policy evaluator instance with launched policy configuration
+        
+        Evaluators are cached process-wide per (policy_id, launched policy UpdatedAt), so
+        repeated calls skip definition lookup and evaluator class resolution. Evaluators
+        bound to a context are copies; the cached instance is never bound.
         
-        evaluator_class = self.get_policy_evaluator_class(policy_id)
-        severity = launched_policy.severity or policy_def.severity
+        Args:
+            policy_id: Policy ID
+            launched_policy: Launched policy (scope/severity overrides)
+            context: Optional evaluation context (e.g. shared buffered findings writer)
+        """
+        version = launched_policy.updated_at
+        cached = _evaluator_cache.get(policy_id)
+        if cached is not None and version is not None and cached[0] == version:
+            evaluator = cached[1]
+        else:
+            policy_def = self.get_policy_definition(policy_id)
+            if not policy_def:
+                raise ValueError(f"Policy {policy_id} not found")
+            
+            evaluator_class = self.get_policy_evaluator_class(policy_id)
+            severity = launched_policy.severity or policy_def.severity
+            
+            evaluator = evaluator_class(policy_id, severity, launched_policy.scope)
+            # Launched policies without UpdatedAt have no version to validate a cache entry
+            if version is not None:
+                with _evaluator_cache_lock:
+                    _evaluator_cache[policy_id] = (version, evaluator)
+                debug(f"Cached evaluator for {policy_id} at version {version}")
         
-        return evaluator_class(policy_id, severity, launched_policy.scope)
+        if context is not None:
+            evaluator = evaluator.with_context(context)
+        return evaluator
 
     def get_policies_by_service(self, service: str) -> List[PolicyDefinition]:
         """Get all available policies for a specific service"""
@@ -326,3 +373,5 @@ class PolicyManager:
         self.list_launched_policies.cache_clear()
         # Clear applicable policies cache since it depends on launched policies
         self.get_applicable_policies.cache_clear()
+        # Evict the process-wide evaluator built from the old launched policy
+        clear_evaluator_cache(policy_id)
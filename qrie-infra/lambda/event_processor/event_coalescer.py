@@ -0,0 +1,107 @@
+"""
+Event coalescing for the event processor.
+A single console change emits a burst of CloudTrail events for one resource; each would
+otherwise trigger its own describe. Records are grouped by resource ARN within a batch, and
+ARNs already described after an event's time are remembered across warm invocations.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+# How long a describe is remembered for suppressing later events it already covers
+DEFAULT_COALESCE_WINDOW_SECONDS = int(os.environ.get('EVENT_COALESCE_WINDOW_SECONDS', '300'))
+
+# Upper bound on remembered ARNs per process (oldest evicted first)
+MAX_RECENT_DESCRIBES = 10000
+
+
+@dataclass
+class ResourceEvent:
+    """All records of a batch that refer to one resource, represented by the latest event"""
+    resource_arn: str
+    account_id: str
+    service: str
+    event_time: int  # Latest eventTime (ms) across the coalesced records
+    event_id: str  # messageId of the latest record (used in logs)
+    message_ids: List[str] = field(default_factory=list)
+    event_names: Set[str] = field(default_factory=set)
+    latest_event_name: Optional[str] = None  # eventName of the latest record (decides deletions)
+
+    def merge(self, other: 'ResourceEvent') -> None:
+        """Fold another record for the same resource into this group"""
+        self.message_ids.extend(other.message_ids)
+        self.event_names |= other.event_names
+        if other.event_time > self.event_time:
+            self.event_time = other.event_time
+            self.event_id = other.event_id
+            self.latest_event_name = other.latest_event_name
+
+
+def coalesce_events(events: Iterable[ResourceEvent]) -> List[ResourceEvent]:
+    """
+    Group parsed records by resource ARN, keeping the latest eventTime per resource.
+
+    Returns:
+        One ResourceEvent per distinct ARN, in first-seen order
+    """
+    groups: Dict[str, ResourceEvent] = {}
+    for event in events:
+        group = groups.get(event.resource_arn)
+        if group is None:
+            groups[event.resource_arn] = event
+        else:
+            group.merge(event)
+    return list(groups.values())
+
+
+class RecentDescribes:
+    """
+    Remembers the latest snapshot time (ms) per ARN for a bounded window.
+
+    An event whose eventTime is at or before a remembered snapshot is already reflected in
+    inventory, so it needs neither the inventory read nor a new describe.
+    """
+
+    def __init__(self, window_seconds: int = DEFAULT_COALESCE_WINDOW_SECONDS,
+                 max_entries: int = MAX_RECENT_DESCRIBES):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # arn -> (snapshot_ms, remembered_at)
+        self._lock = threading.Lock()
+
+    def covers(self, resource_arn: str, event_time: int) -> bool:
+        """True if a snapshot remembered within the window already reflects the event"""
+        if self.window_seconds <= 0:
+            return False
+        with self._lock:
+            entry = self._entries.get(resource_arn)
+            if entry is None:
+                return False
+            snapshot_ms, remembered_at = entry
+            if time.monotonic() - remembered_at > self.window_seconds:
+                del self._entries[resource_arn]
+                return False
+            return event_time <= snapshot_ms
+
+    def record(self, resource_arn: str, snapshot_ms: int) -> None:
+        """Remember a resource's latest snapshot time (older snapshots never replace newer ones)"""
+        if self.window_seconds <= 0:
+            return
+        with self._lock:
+            entry = self._entries.pop(resource_arn, None)
+            if entry is not None and entry[0] > snapshot_ms:
+                snapshot_ms = entry[0]
+            self._entries[resource_arn] = (snapshot_ms, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, resource_arn: Optional[str] = None) -> None:
+        """Forget one ARN (or everything)"""
+        with self._lock:
+            if resource_arn is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(resource_arn, None)
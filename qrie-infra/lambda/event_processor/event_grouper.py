@@ -0,0 +1,72 @@
+"""
+EventBridge Pipe enrichment for the ordered (FIFO) events pipeline.
+
+The pipe reads CloudTrail events from the standard ingress queue (customer EventBridge rules
+cannot set a per-event MessageGroupId), and this function tags each event with the resource it
+refers to. The pipe uses that tag as the FIFO MessageGroupId, so events for one resource are
+delivered to the event processor in order while different resources are processed in parallel.
+"""
+import os, json, sys, hashlib
+from typing import Optional
+
+# Add lambda directory to path for shared modules
+lambda_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if lambda_dir not in sys.path:
+    sys.path.append(lambda_dir)
+
+from common.logger import debug, error
+from services import extract_arn_from_event
+
+# Key added to each event; the pipe's MessageGroupId is read from it
+GROUP_KEY = 'qrieResourceArn'
+
+# MessageGroupId limit
+MAX_GROUP_ID_LENGTH = 128
+
+# Group for events no resource can be extracted from (the event processor drops them)
+UNGROUPED = 'unresolved'
+
+
+def lambda_handler(event, context):
+    """
+    Tag each SQS record of a pipe batch with its message group.
+
+    Args:
+        event: List of SQS records (pipe enrichment input)
+
+    Returns:
+        The parsed event bodies with GROUP_KEY set, in input order
+    """
+    enriched = []
+    for rec in event:
+        message_id = rec.get('messageId', 'unknown')
+        try:
+            body = json.loads(rec['body'])
+        except (KeyError, TypeError, ValueError) as e:
+            error(f"[{message_id}] Unparseable record body, forwarding ungrouped: {str(e)}")
+            body = {'unparsed': rec.get('body')}
+        body[GROUP_KEY] = message_group_id(_resource_arn(body))
+        enriched.append(body)
+    debug(f"Grouped {len(enriched)} events into {len({body[GROUP_KEY] for body in enriched})} message groups")
+    return enriched
+
+
+def message_group_id(resource_arn: Optional[str]) -> str:
+    """
+    MessageGroupId for a resource (ARNs longer than the limit are hashed).
+    """
+    if not resource_arn:
+        return UNGROUPED
+    if len(resource_arn) <= MAX_GROUP_ID_LENGTH:
+        return resource_arn
+    return hashlib.sha256(resource_arn.encode('utf-8')).hexdigest()
+
+
+def _resource_arn(body: dict) -> Optional[str]:
+    """Resource ARN of a CloudTrail event, or None if unsupported (same extractors as the event processor)"""
+    detail = body.get('detail') or {}
+    service = detail.get('eventSource', '').split('.amazonaws.com')[0]
+    try:
+        return extract_arn_from_event(service, detail)
+    except Exception:
+        return None
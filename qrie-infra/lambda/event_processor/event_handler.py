@@ -1,4 +1,7 @@
 import os, json, boto3, datetime, traceback, sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
 
 # Add lambda directory to path for shared modules
 lambda_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -6,136 +9,639 @@ if lambda_dir not in sys.path:
     sys.path.append(lambda_dir)
 
 from common.logger import debug, info, error
+from common.rate_governor import RATE_GOVERNOR
+from common.credential_cache import CREDENTIAL_CACHE
+from common.client_pool import CLIENT_POOL
 from data_access.policy_manager import PolicyManager
 from data_access.inventory_manager import InventoryManager
+from data_access.findings_writer import FindingsWriter, FindingsFlushError
+from policy_definition import EvaluationContext
 from common_utils import get_account_from_arn, get_service_from_arn
+from config_digest import config_digest, section_digests, changed_sections, changed_paths, paths_overlap
+from event_processor.event_coalescer import ResourceEvent, RecentDescribes, coalesce_events
+from services import is_delete_event, accepts_event
 
 DDB = boto3.resource('dynamodb')
 RES = DDB.Table(os.environ['RESOURCES_TABLE'])
 FND = DDB.Table(os.environ['FINDINGS_TABLE'])
 
+# Records processed concurrently per SQS batch (bounded so describe calls stay within API limits)
+DEFAULT_EVENT_CONCURRENCY = int(os.environ.get('EVENT_CONCURRENCY', '10'))
+
+# Events arrive in order per resource (FIFO queue grouped by resource ARN)
+EVENTS_ORDERED = os.environ.get('EVENTS_ORDERED', 'false').lower() == 'true'
+
+# CloudTrail eventSource -> service
+EVENT_SOURCE_SERVICES = {
+    's3.amazonaws.com': 's3',
+    'ec2.amazonaws.com': 'ec2',
+    'iam.amazonaws.com': 'iam'
+}
+
+# Snapshots described by this process, kept across warm invocations
+RECENT_DESCRIBES = RecentDescribes()
+
+# Process-lifetime coalescing counters (also logged per invocation)
+COALESCE_STATS = {
+    'records': 0,
+    'resources': 0,
+    'describes_saved_batch': 0,  # Records folded into another record for the same ARN
+    'describes_saved_window': 0,  # Records already covered by a recent describe
+}
+
+# Process-lifetime policy evaluation counters for changed resources
+EVALUATION_STATS = {
+    'evaluated': 0,
+    'skipped_unaffected': 0,  # Policies whose declared inputs the change did not touch
+}
+
+# Process-lifetime counts of events dropped by the services' event filters, by eventName
+FILTERED_EVENTS: Dict[str, int] = {}
+_stats_lock = threading.Lock()
+
+
 def process_event(event, context):
     """
     Process EventBridge events from customer accounts.
     Updates inventory and evaluates policies for changed resources.
+    
+    Records are grouped by resource ARN (latest eventTime wins) so a burst of events for one
+    resource costs a single describe, and events already covered by a describe made in the
+    last EVENT_COALESCE_WINDOW_SECONDS are skipped. Events the service maps to config sections
+    (EVENT_SECTIONS) re-describe only those sections, merged into the stored configuration.
+    A changed resource is re-evaluated only against policies whose declared config paths
+    intersect the changed paths. Resources whose latest event deletes them (DELETE_EVENTS) are
+    removed from inventory with their findings in batch, without calling the customer account.
+    With EVENTS_ORDERED (FIFO queue grouped by resource) full refreshes skip the inventory read.
+    Events a service's EventFilter rejects (read-only calls, events outside the inventoried
+    config) are dropped before any lookup and counted per eventName.
+    Inventory changes are committed only after the findings evaluated from them are written;
+    resources whose findings fail to write, or whose evaluation fails for any policy, are left
+    as they were and their records redelivered.
+    Resources are processed concurrently on a
+    bounded pool. The response reports failed records as batchItemFailures (the event source
+    mapping has ReportBatchItemFailures enabled) so SQS redelivers only those - every record
+    of a failed resource group; records that can never succeed (malformed or unsupported
+    events) are logged and dropped instead of retried.
     """
     debug(f"Processing event: {event}")
     try:
         policy_manager = PolicyManager()
         inventory_manager = InventoryManager()
         
-        for rec in event.get("Records", []):
+        # Evaluators persist findings through a buffered writer flushed once per batch
+        findings_writer = FindingsWriter()
+        evaluation_context = EvaluationContext(findings_writer=findings_writer)
+        
+        records = event.get("Records", [])
+        failed_ids = []
+        skipped_before = EVALUATION_STATS['skipped_unaffected']
+        
+        parsed = []
+        filtered = {}
+        for rec in records:
             event_id = rec.get('messageId', 'unknown')
             try:
                 msg = json.loads(rec["body"])
-                
-                # Extract resource info from CloudTrail event (raises if invalid)
-                resource_arn = _extract_arn_from_event(msg)
-                account_id = get_account_from_arn(resource_arn)
-                service = get_service_from_arn(resource_arn)
-                
-                info(f"[{event_id}] Processing {service} resource: {resource_arn}")
-                
-                # Extract event timestamp (raises if invalid)
-                try: 
-                    event_time = _extract_event_time(msg)
-                except Exception as e:
-                    error(f"[{event_id}] Error extracting event time: {str(e)}")
-                    event_time = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
-                
-                # Check if event is stale compared to existing inventory
-                existing_resource = inventory_manager.get_resource_by_arn(resource_arn)
-                if existing_resource:
-                    existing_snapshot_time = existing_resource['LastSeenAt']
-                    if event_time <= existing_snapshot_time:
-                        debug(f"[{event_id}] Skipping stale event for {resource_arn} - event time {event_time} <= existing snapshot {existing_snapshot_time}")
-                        continue
-                
-                # Check if there is any change in the resource configuration
-                # Capture the time WHEN we fetch the config - this is our snapshot time (milliseconds)
-                describe_time_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
-                new_config = _describe_resource(resource_arn, account_id, service)
-                existing_config = existing_resource['Configuration'] if existing_resource else None
-                
-                if not _configs_differ(existing_config, new_config):
-                    debug(f"[{event_id}] No config change for {resource_arn}, skipping")
+                if not isinstance(msg, dict):
+                    raise ValueError(f"Record body is not an event: {type(msg).__name__}")
+                # Events that cannot change evaluated state are dropped before any lookup
+                event_name = msg.get('detail', {}).get('eventName')
+                service = EVENT_SOURCE_SERVICES.get(msg.get('detail', {}).get('eventSource'))
+                if service and not accepts_event(service, event_name):
+                    filtered[event_name] = filtered.get(event_name, 0) + 1
                     continue
-                
-                info(f"[{event_id}] Config changed for {resource_arn}, updating inventory and evaluating policies")
-                    
-                # Update inventory with describe time (when we fetched the config)
-                inventory_manager.upsert_resource(
-                    account_id=account_id,
-                    service=service,
-                    arn=resource_arn,
-                    configuration=new_config,
-                    describe_time_ms=describe_time_ms
-                )
-                    
-                # Get active policies for this service
-                service_policies = policy_manager.get_active_policies_for_service(service)
-                    
-                # Evaluate each policy with the same describe time
-                for policy in service_policies:
+                parsed.extend(_parse_record(rec, msg))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # Malformed record (no body, non-JSON or non-object body/detail) or unsupported
+                # event - permanent, redelivery would fail the same way
+                error(f"[{event_id}] Dropping unprocessable record: {type(e).__name__}: {str(e)}")
+        if filtered:
+            _record_filtered_events(filtered)
+        
+        groups = coalesce_events(parsed)
+        pending = []
+        window_saved = 0
+        for group in groups:
+            if RECENT_DESCRIBES.covers(group.resource_arn, group.event_time):
+                debug(f"[{group.event_id}] {group.resource_arn} already described after event time {group.event_time}, skipping")
+                window_saved += len(group.message_ids)
+            else:
+                pending.append(group)
+        
+        # One bulk read replaces a GetItem per resource for the stale/change checks
+        snapshots = _prefetch_snapshots(inventory_manager, pending) if pending else {}
+        
+        deletions = [group for group in pending if is_delete_event(group.service, group.latest_event_name)]
+        if deletions:
+            pending = [group for group in pending if not is_delete_event(group.service, group.latest_event_name)]
+            failed_ids.extend(_process_deletions(deletions, snapshots, inventory_manager, findings_writer))
+        
+        inventory_writes = []
+        if pending:
+            workers = max(1, min(DEFAULT_EVENT_CONCURRENCY, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_process_resource, group, snapshots, policy_manager, inventory_manager,
+                                    evaluation_context): group
+                    for group in pending
+                }
+                for future in as_completed(futures):
+                    group = futures[future]
                     try:
-                        evaluator = policy_manager.create_policy_evaluator(policy.policy_id, policy)
-                        result = evaluator.evaluate(resource_arn, new_config, describe_time_ms)
-                        debug(f"[{event_id}] Evaluated {resource_arn} against {policy.policy_id}: compliant={result['compliant']}, scoped={result.get('scoped', True)}")
+                        write = future.result()
+                        if write:
+                            inventory_writes.append((group, write))
+                    except ValueError as e:
+                        error(f"[{group.event_id}] Dropping unprocessable resource event: {str(e)}")
                     except Exception as e:
-                        error(f"[{event_id}] Error evaluating {resource_arn} with policy {policy.policy_id}: {str(e)}\n{traceback.format_exc()}")
-            except Exception as e:
-                error(f"[{event_id}] Error processing record: {str(e)}\n{traceback.format_exc()}")
-                continue
+                        error(f"[{group.event_id}] Error processing {group.resource_arn}: {str(e)}\n{traceback.format_exc()}")
+                        failed_ids.extend(group.message_ids)
+        
+        _record_coalesce_stats(len(parsed), len(groups), window_saved)
+        skipped_evaluations = EVALUATION_STATS['skipped_unaffected'] - skipped_before
+        if skipped_evaluations:
+            info(f"Skipped {skipped_evaluations} policy evaluations unaffected by the config changes "
+                 f"(process totals: {dict(EVALUATION_STATS)})")
         
-        return {"ok": True}
+        # Findings first: resources whose findings failed keep their old inventory row, so the
+        # redelivered records are not skipped as stale and re-evaluate
+        try:
+            write_stats = findings_writer.flush()
+            unwritten = set()
+        except FindingsFlushError as e:
+            write_stats = e.stats
+            unwritten = e.failed_arns
+        debug(f"Finding writes: {write_stats}")
+        failed_ids.extend(_finish_inventory_writes(inventory_writes, unwritten))
+        RATE_GOVERNOR.log_stats()
+        CREDENTIAL_CACHE.log_stats()
+        CLIENT_POOL.log_stats()
+        
+        # A record naming several resources is reported once, however many of them failed
+        failed_ids = list(dict.fromkeys(failed_ids))
+        if failed_ids:
+            info(f"Reporting {len(failed_ids)} of {len(records)} records for redelivery")
+        return {"batchItemFailures": [{"itemIdentifier": event_id} for event_id in failed_ids]}
     except Exception as e:
         error(f"Error processing event: {str(e)}\n{traceback.format_exc()}")
         raise  # Let Lambda runtime handle the error
 
 
-def _extract_arn_from_event(event: dict) -> str:
+class _InventoryWrite:
+    """
+    A changed resource's inventory write, settled once the findings evaluated from it are
+    flushed: committed if they were written, otherwise reverted (ordered mode writes before
+    evaluating, as the write returns the previous snapshot).
+    """
+    
+    def __init__(self, commit: Optional[Callable[[], None]] = None, revert: Optional[Callable[[], None]] = None):
+        self.commit = commit
+        self.revert = revert
+
+
+def _finish_inventory_writes(inventory_writes: List[tuple], unwritten: set) -> List[str]:
+    """
+    Commit (or revert) the inventory writes of processed resources after the findings flush.
+    
+        Args:
+            inventory_writes: (ResourceEvent, _InventoryWrite) per changed resource
+            unwritten: ARNs with findings that were not written
+    
+        Returns:
+            messageIds to redeliver (resources with unwritten findings or a failed commit)
+    """
+    failed_ids = []
+    for group, write in inventory_writes:
+        try:
+            if group.resource_arn in unwritten:
+                error(f"[{group.event_id}] Findings for {group.resource_arn} were not written, redelivering its records")
+                failed_ids.extend(group.message_ids)
+                if write.revert:
+                    write.revert()
+            elif write.commit:
+                write.commit()
+        except Exception as e:
+            error(f"[{group.event_id}] Error writing inventory for {group.resource_arn}: {str(e)}\n{traceback.format_exc()}")
+            if group.resource_arn not in unwritten:
+                failed_ids.extend(group.message_ids)
+    return failed_ids
+
+
+def _prefetch_snapshots(inventory_manager: InventoryManager, pending: List[ResourceEvent]) -> Dict[str, Optional[Dict]]:
+    """
+    Bulk-read the inventory snapshots of pending resources. Stored configurations are only
+    read for resources whose events allow a partial refresh (the base they merge into); the
+    others are compared by digest alone. With ordered events only the partial-refresh bases
+    are read - full refreshes get the previous snapshot back from the inventory write.
+    """
+    from services import get_event_sections
+    with_config, digests_only = [], []
+    for group in pending:
+        key = (group.resource_arn, group.account_id)
+        (with_config if get_event_sections(group.service, group.event_names) else digests_only).append(key)
+    
+    if EVENTS_ORDERED:
+        digests_only = []
+    
+    snapshots = {}
+    try:
+        if with_config:
+            snapshots.update(inventory_manager.get_resource_snapshots(with_config, include_configuration=True))
+        if digests_only:
+            snapshots.update(inventory_manager.get_resource_snapshots(digests_only))
+    except Exception as e:
+        error(f"Bulk inventory read failed, falling back to per-resource reads: {str(e)}")
+    return snapshots
+
+
+def _process_deletions(deletions: List[ResourceEvent], snapshots: Dict[str, Optional[Dict]],
+                       inventory_manager: InventoryManager, findings_writer: FindingsWriter) -> List[str]:
+    """
+    Delete the findings of deleted resources, then remove them from inventory, in batch and
+    without a describe (the resource is gone). A snapshot taken after the deletion event means the resource
+    was re-created and described since, so that deletion is skipped.
+    
+        Returns:
+            messageIds to redeliver (every deletion record if the batch writes failed)
+    """
+    deleted = []
+    for group in deletions:
+        existing = snapshots.get(group.resource_arn)
+        if existing and group.event_time <= existing['LastSeenAt']:
+            debug(f"[{group.event_id}] Skipping stale {group.latest_event_name} for {group.resource_arn} - "
+                  f"event time {group.event_time} <= existing snapshot {existing['LastSeenAt']}")
+            continue
+        deleted.append(group)
+    if not deleted:
+        return []
+    
+    try:
+        # Findings first: if the inventory delete then fails, the redelivered records find the
+        # rows still there and delete again (both deletes are idempotent). The reverse order
+        # would leave orphaned findings once the rows are gone.
+        findings_deleted = findings_writer.findings_manager.delete_findings_for_resources(
+            [group.resource_arn for group in deleted])
+        inventory_manager.delete_resources([(group.resource_arn, group.account_id) for group in deleted])
+    except Exception as e:
+        error(f"Error deleting {len(deleted)} resources: {str(e)}\n{traceback.format_exc()}")
+        return [message_id for group in deleted for message_id in group.message_ids]
+    
+    for group in deleted:
+        RECENT_DESCRIBES.clear(group.resource_arn)
+        info(f"[{group.event_id}] {group.latest_event_name}: removed {group.resource_arn} from inventory")
+    info(f"Deleted {len(deleted)} resources and {findings_deleted} findings without describes")
+    return []
+
+
+def _parse_record(rec: dict, msg: dict) -> List[ResourceEvent]:
+    """
+    Parse an SQS record into the resource events it refers to (one per resource the
+    CloudTrail event names, e.g. every instance of a TerminateInstances call).
+    
+        Args:
+            rec: SQS record
+            msg: The record's parsed body (EventBridge event)
+    
+        Raises:
+            ValueError: If the record is malformed or the event unsupported
+    """
+    event_id = rec.get('messageId', 'unknown')
+    
+    # Extract resource info from CloudTrail event (raises if invalid)
+    resource_arns = _extract_arns_from_event(msg)
+    
+    # Extract event timestamp (raises if invalid)
+    try: 
+        event_time = _extract_event_time(msg)
+    except Exception as e:
+        error(f"[{event_id}] Error extracting event time: {str(e)}")
+        event_time = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    
+    event_name = msg.get('detail', {}).get('eventName')
+    events = []
+    for resource_arn in resource_arns:
+        events.append(ResourceEvent(
+            resource_arn=resource_arn,
+            # S3 ARNs carry no account - use the account the event was recorded in
+            account_id=get_account_from_arn(resource_arn) or _extract_account_from_event(msg),
+            service=get_service_from_arn(resource_arn),
+            event_time=event_time,
+            event_id=event_id,
+            message_ids=[event_id],
+            event_names={event_name} if event_name else set(),
+            latest_event_name=event_name
+        ))
+    return events
+
+
+def _process_resource(resource_event: ResourceEvent, snapshots: Dict[str, Optional[Dict]],
+                      policy_manager: PolicyManager, inventory_manager: InventoryManager,
+                      evaluation_context: EvaluationContext) -> Optional[_InventoryWrite]:
+    """
+    Refresh one resource's inventory and evaluate its policies (once for all coalesced records).
+    
+        Args:
+            snapshots: Prefetched inventory snapshots by ARN (see get_resource_snapshots);
+                       resources missing from it are read individually (not at all when
+                       EVENTS_ORDERED)
+    
+        Returns:
+            The inventory write to settle after the findings flush (None if unchanged)
+    
+        Raises:
+            ValueError: If the resource can never be processed
+            Exception: Any other failure (e.g. describe throttled) - the records should be retried
+    """
+    event_id = resource_event.event_id
+    resource_arn = resource_event.resource_arn
+    account_id = resource_event.account_id
+    service = resource_event.service
+    event_time = resource_event.event_time
+    
+    coalesced = len(resource_event.message_ids)
+    info(f"[{event_id}] Processing {service} resource: {resource_arn}"
+         + (f" ({coalesced} events: {', '.join(sorted(resource_event.event_names))})" if coalesced > 1 else ""))
+    
+    # Current inventory snapshot (prefetched in bulk, or read individually if the bulk read missed it)
+    if resource_arn in snapshots:
+        existing = snapshots[resource_arn]
+    elif EVENTS_ORDERED:
+        # Earlier events for this resource were already processed - skip the read
+        return _process_ordered_resource(resource_event, policy_manager, inventory_manager, evaluation_context)
+    else:
+        existing = _snapshot_of(inventory_manager.get_resource(resource_arn, account_id))
+    
+    # Check if event is stale compared to existing inventory
+    if existing:
+        existing_snapshot_time = existing['LastSeenAt']
+        if event_time <= existing_snapshot_time:
+            debug(f"[{event_id}] Skipping stale event for {resource_arn} - event time {event_time} <= existing snapshot {existing_snapshot_time}")
+            RECENT_DESCRIBES.record(resource_arn, existing_snapshot_time)
+            return
+    
+    # Events that only touch some config sections re-describe just those sections
+    sections = _sections_to_refresh(resource_event, existing)
+    if sections is not None and not sections:
+        debug(f"[{event_id}] Events {sorted(resource_event.event_names)} do not affect inventoried config of {resource_arn}, skipping")
+        return
+    
+    # Capture the time WHEN we fetch the config - this is our snapshot time (milliseconds)
+    describe_time_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    if sections:
+        debug(f"[{event_id}] Refreshing {sorted(sections)} of {resource_arn}")
+        refreshed = _describe_resource(resource_arn, account_id, service, sections=sections,
+                                       stored_config=existing['Configuration'])
+        new_config = {**existing['Configuration'], **refreshed}
+    else:
+        # The stored configuration (when it was read) carries routing hints such as the bucket region
+        new_config = _describe_resource(resource_arn, account_id, service,
+                                        stored_config=existing.get('Configuration') if existing else None)
+    
+    # Check if there is any change in the resource configuration (digests only, no old config needed)
+    if existing and existing['ConfigDigest'] == config_digest(new_config):
+        debug(f"[{event_id}] No config change for {resource_arn}, skipping")
+        if not sections:
+            RECENT_DESCRIBES.record(resource_arn, describe_time_ms)
+        return
+    
+    info(f"[{event_id}] Config changed for {resource_arn}, evaluating policies and updating inventory")
+    
+    def commit():
+        if sections:
+            # Merged into the snapshot that was read; LastSeenAt stays at the last full describe
+            # so events for the sections not re-described are never treated as stale
+            if not inventory_manager.update_resource_configuration(
+                account_id=account_id,
+                service=service,
+                arn=resource_arn,
+                configuration=new_config,
+                expected_last_seen_ms=existing['LastSeenAt'],
+                expected_digest=existing['ConfigDigest']
+            ):
+                # Redelivery re-reads the row and merges into the newer snapshot
+                raise RuntimeError(f"Inventory row for {resource_arn} changed during partial refresh")
+        else:
+            # Update inventory with describe time (when we fetched the config)
+            inventory_manager.upsert_resource(
+                account_id=account_id,
+                service=service,
+                arn=resource_arn,
+                configuration=new_config,
+                describe_time_ms=describe_time_ms
+            )
+            RECENT_DESCRIBES.record(resource_arn, describe_time_ms)
+    
+    _evaluate_policies(resource_event, existing, new_config, describe_time_ms, policy_manager, evaluation_context)
+    return _InventoryWrite(commit=commit)
+
+
+def _process_ordered_resource(resource_event: ResourceEvent, policy_manager: PolicyManager,
+                              inventory_manager: InventoryManager,
+                              evaluation_context: EvaluationContext) -> Optional[_InventoryWrite]:
+    """
+    Full refresh when events arrive in order per resource (FIFO message groups): the resource's
+    earlier events were processed before this one, so no inventory read is needed before the
+    describe. The conditional upsert rejects a describe older than the stored one and returns
+    the replaced snapshot for change detection; it is reverted if the findings are not written.
+    """
+    event_id = resource_event.event_id
+    resource_arn = resource_event.resource_arn
+    
+    describe_time_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    new_config = _describe_resource(resource_arn, resource_event.account_id, resource_event.service)
+    
+    written, previous = inventory_manager.upsert_resource_returning_previous(
+        account_id=resource_event.account_id,
+        service=resource_event.service,
+        arn=resource_arn,
+        configuration=new_config,
+        describe_time_ms=describe_time_ms
+    )
+    if not written:
+        debug(f"[{event_id}] Inventory for {resource_arn} already holds a more recent describe, skipping")
+        return None
+    RECENT_DESCRIBES.record(resource_arn, describe_time_ms)
+    
+    existing = _snapshot_of(previous) if previous and 'LastSeenAt' in previous else None
+    if existing and existing['ConfigDigest'] == config_digest(new_config):
+        debug(f"[{event_id}] No config change for {resource_arn}, skipping")
+        return None
+    
+    def revert():
+        RECENT_DESCRIBES.clear(resource_arn)
+        inventory_manager.revert_upsert(resource_event.account_id, resource_event.service, resource_arn,
+                                        describe_time_ms, previous)
+    
+    info(f"[{event_id}] Config changed for {resource_arn}, evaluating policies")
+    try:
+        _evaluate_policies(resource_event, existing, new_config, describe_time_ms, policy_manager, evaluation_context)
+    except Exception:
+        # The redelivered records must not find this describe already in inventory
+        revert()
+        raise
+    return _InventoryWrite(revert=revert)
+
+
+def _evaluate_policies(resource_event: ResourceEvent, existing: Optional[Dict], new_config: dict,
+                       describe_time_ms: int, policy_manager: PolicyManager,
+                       evaluation_context: EvaluationContext) -> None:
+    """
+    Evaluate a changed resource against the service's active policies.
+    
+        Raises:
+            RuntimeError: If any policy failed to evaluate (after evaluating the others), so the
+                          resource's records are redelivered and its inventory left unchanged
+    """
+    event_id = resource_event.event_id
+    resource_arn = resource_event.resource_arn
+    service = resource_event.service
+    
+    # Only policies whose declared inputs intersect the changed paths are re-evaluated
+    changed = _changed_config_paths(existing, new_config)
+    service_policies = policy_manager.get_active_policies_for_service(service)
+    evaluated = 0
+    failed_policies = []
+    
+    # Evaluate each policy with the same describe time
+    for policy in service_policies:
+        if changed is not None and not _policy_reads_changes(policy_manager, policy.policy_id, changed):
+            continue
+        evaluated += 1
+        try:
+            evaluator = policy_manager.create_policy_evaluator(policy.policy_id, policy, context=evaluation_context)
+            result = evaluator.evaluate(resource_arn, new_config, describe_time_ms)
+            debug(f"[{event_id}] Evaluated {resource_arn} against {policy.policy_id}: compliant={result['compliant']}, scoped={result.get('scoped', True)}")
+        except Exception as e:
+            error(f"[{event_id}] Error evaluating {resource_arn} with policy {policy.policy_id}: {str(e)}\n{traceback.format_exc()}")
+            failed_policies.append(policy.policy_id)
+    
+    skipped = len(service_policies) - evaluated
+    if skipped:
+        debug(f"[{event_id}] Skipped {skipped} of {len(service_policies)} policies unaffected by changes to {changed}")
+    with _stats_lock:
+        EVALUATION_STATS['evaluated'] += evaluated
+        EVALUATION_STATS['skipped_unaffected'] += skipped
+    if failed_policies:
+        raise RuntimeError(f"Evaluation of {resource_arn} failed for policies {failed_policies}")
+
+
+def _changed_config_paths(existing: Optional[Dict], new_config: dict) -> Optional[list]:
+    """
+    Paths changed relative to the stored snapshot (None if unknown).
+    Stored section digests narrow the change to top-level sections without the old
+    configuration; when it was read (partial refresh) only those sections are diffed for
+    nested paths.
+    """
+    if not existing:
+        return None
+    old_config = existing.get('Configuration')
+    if existing.get('SectionDigests'):
+        sections = changed_sections(existing['SectionDigests'], section_digests(new_config))
+        if isinstance(old_config, dict):
+            return changed_paths(old_config, new_config, only_sections=sections)
+        return sections
+    if isinstance(old_config, dict):
+        return changed_paths(old_config, new_config)
+    return None
+
+
+def _policy_reads_changes(policy_manager: PolicyManager, policy_id: str, changed: list) -> bool:
+    """Whether a policy's declared inputs overlap the changed paths (True if undeclared)"""
+    definition = policy_manager.get_policy_definition(policy_id)
+    input_paths = definition.input_paths() if definition else None
+    return input_paths is None or paths_overlap(input_paths, changed)
+
+
+def _sections_to_refresh(resource_event: ResourceEvent, existing: Optional[Dict]) -> Optional[set]:
     """
-    Extract resource ARN from CloudTrail event using service-specific extractors.
+    Config sections to re-describe for a resource's coalesced events.
+    
+        Returns:
+            Sections affected by the events (empty if none touch inventoried config), or None
+            for a full describe - new resources, rows without a stored configuration/digest and
+            events the service does not map to sections
+    """
+    if not existing or not existing.get('ConfigDigest') or not isinstance(existing.get('Configuration'), dict):
+        return None
+    from services import get_event_sections
+    return get_event_sections(resource_event.service, resource_event.event_names)
+
+
+def _record_filtered_events(filtered: Dict[str, int]) -> None:
+    """Accumulate and log events dropped by the event filters"""
+    with _stats_lock:
+        for event_name, count in filtered.items():
+            FILTERED_EVENTS[event_name] = FILTERED_EVENTS.get(event_name, 0) + count
+        totals = dict(FILTERED_EVENTS)
+    info(f"Dropped {sum(filtered.values())} events that cannot change evaluated state: {filtered} "
+         f"(process totals: {totals})")
+
+
+def _record_coalesce_stats(records: int, resources: int, window_saved: int) -> None:
+    """Accumulate and log how many describes coalescing saved"""
+    batch_saved = records - resources
+    with _stats_lock:
+        COALESCE_STATS['records'] += records
+        COALESCE_STATS['resources'] += resources
+        COALESCE_STATS['describes_saved_batch'] += batch_saved
+        COALESCE_STATS['describes_saved_window'] += window_saved
+        totals = dict(COALESCE_STATS)
+    if batch_saved or window_saved:
+        info(f"Coalesced {records} records into {resources} resources: saved {batch_saved} in-batch "
+             f"and {window_saved} recently-described describes (process totals: {totals})")
+
+
+def _extract_arns_from_event(event: dict) -> List[str]:
+    """
+    Extract resource ARNs from CloudTrail event using service-specific extractors.
     
         Args:
             event: CloudTrail event dict (the parsed 'body' from SQS message)
             
         Returns:
-            Resource ARN string
+            Resource ARNs (at least one)
             
         Raises:
-            ValueError: If ARN cannot be extracted from event
+            ValueError: If no ARN can be extracted from event
     """
     try:
         detail = event.get('detail', {})
         event_source = detail.get('eventSource', '')
         
         # Map event source to service name
-        service_map = {
-            's3.amazonaws.com': 's3',
-            'ec2.amazonaws.com': 'ec2',
-            'iam.amazonaws.com': 'iam'
-        }
-        
-        service = service_map.get(event_source)
+        service = EVENT_SOURCE_SERVICES.get(event_source)
         if not service:
             raise ValueError(f"Unsupported event source: {event_source}")
         
         # Use service-specific ARN extractor
-        from services import extract_arn_from_event as service_extract_arn
-        arn = service_extract_arn(service, detail)
+        from services import extract_arns_from_event as service_extract_arns
+        arns = service_extract_arns(service, detail)
         
-        if not arn:
+        if not arns:
             event_name = detail.get('eventName', '')
             raise ValueError(f"Could not extract ARN from event: source={event_source}, name={event_name}")
         
-        return arn
+        return arns
     
     except Exception as e:
         error(f"Error extracting ARN from event: {str(e)}")
         raise ValueError(f"Failed to extract ARN: {str(e)}")
 
 
+def _extract_account_from_event(event: dict) -> str:
+    """
+    Extract the account a CloudTrail event was recorded in (for ARNs without an account).
+    
+        Raises:
+            ValueError: If the event names no account
+    """
+    account_id = event.get('detail', {}).get('recipientAccountId') or event.get('account')
+    if not account_id:
+        raise ValueError("No recipientAccountId or account in event")
+    return account_id
+
+
 def _extract_event_time(event: dict) -> int:
     """
     Extract event timestamp from CloudTrail event.
@@ -167,7 +673,8 @@ def _extract_event_time(event: dict) -> int:
         raise ValueError(f"Failed to extract event time: {str(e)}")
 
 
-def _describe_resource(arn: str, account_id: str, service: str) -> dict:
+def _describe_resource(arn: str, account_id: str, service: str, sections: Optional[set] = None,
+                       stored_config: Optional[dict] = None) -> dict:
     """
     Describe resource using service-specific describe functions.
     
@@ -175,33 +682,35 @@ def _describe_resource(arn: str, account_id: str, service: str) -> dict:
             arn: Resource ARN
             account_id: AWS account ID
             service: Service name (s3, ec2, iam, etc.)
+            sections: Optional config sections to describe (default: full configuration)
+            stored_config: Stored configuration, if read (routing hints such as the S3 bucket region)
             
         Returns:
-            Resource configuration dict
+            Resource configuration dict (only the requested sections for a partial describe)
             
         Raises:
-            ValueError: If resource cannot be described
+            ValueError: If resource cannot be described (including services without describe support)
             ClientError: If AWS API call fails
     """
     try:
         from services import describe_resource as service_describe
-        return service_describe(service, arn, account_id)
+        return service_describe(service, arn, account_id, sections=sections, stored_config=stored_config)
     
+    except NotImplementedError as e:
+        # Permanent - the service has no describe support, so redelivery would fail the same way
+        raise ValueError(f"Cannot describe {service} resource {arn}: {str(e)}") from e
     except Exception as e:
         error(f"Error describing resource {arn}: {str(e)}")
         raise
 
 
-def _configs_differ(old_config: dict, new_config: dict) -> bool:
-    """Compare two configs to see if they differ"""
-    if not old_config:
-        return True  # No existing config, so it's new
-    
-    # Normalize configs by removing timestamps and metadata
-    def normalize(c):
-        if not c:
-            return {}
-        filtered = {k: v for k, v in c.items() if k not in ['LastSeenAt', 'Metadata', 'LastModified']}
-        return json.dumps(filtered, sort_keys=True, default=str)
-    
-    return normalize(old_config) != normalize(new_config)
+def _snapshot_of(resource: Optional[dict]) -> Optional[dict]:
+    """Reduce a full inventory row to the snapshot shape returned by get_resource_snapshots"""
+    if not resource:
+        return None
+    return {
+        'LastSeenAt': int(resource['LastSeenAt']),
+        'ConfigDigest': resource.get('ConfigDigest'),  # None for rows written before digests
+        'SectionDigests': resource.get('SectionDigests'),
+        'Configuration': resource.get('Configuration')
+    }
@@ -13,9 +13,8 @@ def generate_ec2_inventory(account_id: str, inventory_manager, cached: bool = Fa
     start_time = time.time()
     
     try:
-        from cross_account import get_session
-        session = get_session(account_id, 'us-east-1')  # Default region
-        ec2_client = session.client('ec2')
+        from cross_account import get_cross_account_client
+        ec2_client = get_cross_account_client(account_id, 'ec2', 'us-east-1')  # Default region
         
         # Get all EC2 instances
         response = ec2_client.describe_instances()
@@ -14,9 +14,8 @@ def generate_iam_inventory(account_id: str, inventory_manager, cached: bool = Fa
     start_time = time.time()
     
     try:
-        from cross_account import get_session
-        session = get_session(account_id, 'us-east-1')  # IAM is global but needs a region
-        iam_client = session.client('iam')
+        from cross_account import get_cross_account_client
+        iam_client = get_cross_account_client(account_id, 'iam', 'us-east-1')  # IAM is global but needs a region
         
         resources_found = 0
         
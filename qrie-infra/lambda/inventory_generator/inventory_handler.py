@@ -2,14 +2,25 @@
 Dedicated Inventory Generation Lambda
 Handles inventory generation for all services across customer accounts.
 Tracks inventory scan metrics for anti-entropy monitoring.
+
+Regional services (services declaring REGIONAL) are listed in every region of an account
+concurrently: the regions configured on the account's row in the accounts table (Regions),
+or else the regions enabled in the account (ec2:DescribeRegions). Global services (IAM, S3)
+are listed in a single pass.
+
+Environment Variables:
+    INVENTORY_REGION_CONCURRENCY - Regions listed concurrently per (service, account) (default: 8)
 """
 import os
 import sys
 import json
+import threading
 import traceback
 import datetime
+import time
 import boto3
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from common.logger import info, error
 
 # Add lambda directory to path for shared modules
@@ -17,13 +28,34 @@ lambda_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if lambda_dir not in sys.path:
     sys.path.append(lambda_dir)
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from data_access.inventory_manager import InventoryManager
+from data_access.checkpoint_manager import CheckpointManager
+from common.deadline import Deadline
+from common.rate_governor import RATE_GOVERNOR
+from common.credential_cache import CREDENTIAL_CACHE
+from common.client_pool import CLIENT_POOL
 from inventory_generator.s3_inventory import generate_s3_inventory
 from inventory_generator.ec2_inventory import generate_ec2_inventory
 from inventory_generator.iam_inventory import generate_iam_inventory
 from common_utils import get_customer_accounts, SUPPORTED_SERVICES, get_summary_table
 
+# Checkpoint kind for inventory scans continued across invocations near the Lambda deadline
+INVENTORY_SCAN_CHECKPOINT = 'inventory_scan'
+
+# Function re-invoked to continue a checkpointed scan when the context does not name one
+DEFAULT_INVENTORY_FUNCTION = 'qrie_inventory_generator'
+
+# Regions of a regional service listed concurrently per (service, account)
+REGION_CONCURRENCY = int(os.environ.get('INVENTORY_REGION_CONCURRENCY', '8'))
+
+# Region inventoried when an account's regions are neither configured nor discoverable
+DEFAULT_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# Enabled regions discovered per account, kept for the process lifetime
+_discovered_regions: Dict[str, List[str]] = {}
+_regions_lock = threading.Lock()
+
 
 def lambda_handler(event, context):
     """
@@ -36,12 +68,19 @@ def lambda_handler(event, context):
         "cached": false,
         "scan_type": "bootstrap|anti-entropy"  # bootstrap=initial/manual, anti-entropy=scheduled
     }
+    
+    All-account scans that near the Lambda timeout checkpoint their (service, account)
+    cursor to the summary table and continue in a new invocation of this handler
+    carrying "scan_id" and "resume": true.
     """
-    # Generate unique scan ID for traceability
-    scan_id = str(uuid.uuid4())
+    is_resume = bool(event.get('resume'))
+    
+    # Generate unique scan ID for traceability (continuations keep the original)
+    scan_id = event.get('scan_id') if is_resume else str(uuid.uuid4())
     
     # Capture scan start time (milliseconds)
     scan_start_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    deadline = Deadline(context)
     
     try:
         service = event.get('service', 'all')
@@ -49,7 +88,20 @@ def lambda_handler(event, context):
         cached = event.get('cached', False)
         scan_type = event.get('scan_type', 'bootstrap')  # Default to bootstrap for safety
         
-        info(f"[{scan_id}] Starting inventory generation: service={service}, account={account_id or 'all'}, scan_type={scan_type}")
+        checkpoint_manager = CheckpointManager()
+        checkpoint = None
+        if is_resume:
+            checkpoint = checkpoint_manager.load_checkpoint(INVENTORY_SCAN_CHECKPOINT, scan_id)
+            if not checkpoint:
+                info(f"[{scan_id}] No checkpoint found, nothing to resume")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({'message': 'No checkpoint to resume', 'scan_id': scan_id})
+                }
+            scan_start_ms = checkpoint['started_ms']
+        
+        info(f"[{scan_id}] Starting inventory generation: service={service}, account={account_id or 'all'}, scan_type={scan_type}"
+             + (f", resuming at {checkpoint['cursor']}" if checkpoint else ""))
         
         if account_id:
             # Generate for specific account
@@ -58,11 +110,21 @@ def lambda_handler(event, context):
             else:
                 results = [generate_inventory_for_account_service(account_id, service, cached)]
         else:
-            # Generate for all accounts
-            if service == 'all':
-                results = generate_inventory_all_services(cached)
-            else:
-                results = generate_inventory_for_service(service, cached)
+            # Generate for all accounts, stopping at the deadline
+            if service != 'all' and service not in SUPPORTED_SERVICES:
+                raise ValueError(f"Unsupported service: {service}")
+            services = list(SUPPORTED_SERVICES) if service == 'all' else [service]
+            progress = _generate_inventory_resumable(services, cached, deadline, checkpoint)
+            
+            if progress['cursor'] is not None:
+                return _checkpoint_and_continue(scan_id, event, context, checkpoint_manager, {
+                    **progress,
+                    'started_ms': scan_start_ms
+                })
+            if checkpoint:
+                checkpoint_manager.delete_checkpoint(INVENTORY_SCAN_CHECKPOINT, scan_id)
+            
+            results = progress['totals'] if service == 'all' else progress['totals'][service]
         
         # Calculate scan duration and save metrics
         scan_end_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
@@ -74,12 +136,10 @@ def lambda_handler(event, context):
             for result in results:
                 if isinstance(result, dict):
                     total_resources += result.get('resources_found', 0)
-        elif isinstance(results, dict):
-            for service_results in results.values():
-                if isinstance(service_results, list):
-                    for result in service_results:
-                        if isinstance(result, dict):
-                            total_resources += result.get('resources_found', 0)
+        elif 'resources_found' in results:
+            total_resources = results['resources_found']
+        else:
+            total_resources = sum(totals['resources_found'] for totals in results.values())
         
         # Only save drift metrics for anti-entropy scans (not bootstrap/manual)
         if scan_type == 'anti-entropy':
@@ -100,6 +160,9 @@ def lambda_handler(event, context):
                 error(f"Error saving inventory scan metrics: {str(e)}\n{traceback.format_exc()}")
         else:
             info(f"[{scan_id}] Skipping drift metrics for {scan_type} scan: {total_resources} resources found in {scan_duration_ms}ms")
+        RATE_GOVERNOR.log_stats(f"[{scan_id}] ")
+        CREDENTIAL_CACHE.log_stats(f"[{scan_id}] ")
+        CLIENT_POOL.log_stats(f"[{scan_id}] ")
         
         return {
             'statusCode': 200,
@@ -123,6 +186,32 @@ def lambda_handler(event, context):
         }
 
 
+def _checkpoint_and_continue(scan_id: str, event: Dict, context, checkpoint_manager: CheckpointManager,
+                             cursor: Dict) -> Dict:
+    """Persist the (service, account) cursor and re-invoke this handler to continue the scan"""
+    invocations = checkpoint_manager.save_checkpoint(INVENTORY_SCAN_CHECKPOINT, scan_id, cursor)
+    service_index, account_index = cursor['cursor']
+    info(f"[{scan_id}] Approaching Lambda timeout - checkpointed at service={cursor['services'][service_index]}, "
+         f"account {account_index + 1}/{len(cursor['accounts'])} (invocation {invocations}), continuing in a new invocation")
+    
+    lambda_client = boto3.client('lambda')
+    lambda_client.invoke(
+        FunctionName=getattr(context, 'function_name', None) or DEFAULT_INVENTORY_FUNCTION,
+        InvocationType='Event',  # Async invocation
+        Payload=json.dumps({**event, 'scan_id': scan_id, 'resume': True})
+    )
+    
+    return {
+        'statusCode': 202,
+        'body': json.dumps({
+            'message': 'Inventory generation continuing in a new invocation',
+            'scan_id': scan_id,
+            'cursor': cursor['cursor'],
+            'invocations': invocations
+        })
+    }
+
+
 def generate_inventory_for_account(account_id: str, cached: bool = False) -> List[Dict]:
     """Generate inventory for all services in a specific account"""
     # Validate account exists in our list
@@ -132,12 +221,12 @@ def generate_inventory_for_account(account_id: str, cached: bool = False) -> Lis
     if account_id not in valid_account_ids:
         raise ValueError(f"Account {account_id} not found in customer accounts list. Valid accounts: {valid_account_ids}")
     
-    inventory_manager = InventoryManager()
+    regions = _configured_regions(customer_accounts, id_key='AccountId').get(account_id)
     results = []
     
     for service in SUPPORTED_SERVICES:
         try:
-            result = generate_inventory_for_account_service(account_id, service, cached)
+            result = generate_inventory_for_account_service(account_id, service, cached, regions=regions)
             results.append(result)
         except Exception as e:
             error(f"Error generating inventory for {service} in account {account_id}: {str(e)}\n{traceback.format_exc()}")
@@ -152,7 +241,8 @@ def generate_inventory_for_account(account_id: str, cached: bool = False) -> Lis
     return results
 
 
-def generate_inventory_for_account_service(account_id: str, service: str, cached: bool = False) -> Dict:
+def generate_inventory_for_account_service(account_id: str, service: str, cached: bool = False,
+                                           regions: Optional[List[str]] = None) -> Dict:
     """
     Generate inventory for a specific service in a specific account using service registry.
     
@@ -160,9 +250,10 @@ def generate_inventory_for_account_service(account_id: str, service: str, cached
         account_id: AWS account ID
         service: Service name (s3, ec2, iam)
         cached: Whether to use cached inventory (for testing)
+        regions: Regions to list a regional service in (default: the account's enabled regions)
         
     Returns:
-        Dict with resource_count and resources list
+        Dict with resource_count and resources list (and per-region timings for regional services)
     """
     if service not in SUPPORTED_SERVICES:
         raise ValueError(f"Unsupported service: {service}")
@@ -170,18 +261,23 @@ def generate_inventory_for_account_service(account_id: str, service: str, cached
     inventory_manager = InventoryManager()
     
     # Use service registry to list resources
-    from services import list_resources
+    from services import list_resources, is_regional
     
     info(f"Generating {service} inventory for account {account_id} (cached={cached})")
     
     failed_count = 0
+    region_timings = None
     
     if cached:
         # For cached mode, retrieve from inventory table
         resources = inventory_manager.get_resources_by_account_service(f"{account_id}_{service}")
     else:
-        # Fresh scan - use service-specific list_resources
-        result = list_resources(service, account_id)
+        # Fresh scan - use service-specific list_resources (once per region for regional services)
+        if is_regional(service):
+            result = _list_regional_resources(account_id, service, regions or get_account_regions(account_id))
+            region_timings = result['regions']
+        else:
+            result = list_resources(service, account_id)
         resources = result['resources']
         failed_count = result.get('failed_count', 0)
         
@@ -197,58 +293,160 @@ def generate_inventory_for_account_service(account_id: str, service: str, cached
                 describe_time_ms=describe_time_ms
             )
     
-    return {
+    summary = {
         'resource_count': len(resources),
         'failed_count': failed_count,
         'resources': resources
     }
+    if region_timings is not None:
+        summary['regions'] = region_timings
+    return summary
 
 
-def generate_inventory_for_service(service: str, cached: bool = False) -> List[Dict]:
-    """Generate inventory for a specific service across all customer accounts"""
-    if service not in SUPPORTED_SERVICES:
-        raise ValueError(f"Unsupported service: {service}")
+def get_account_regions(account_id: str) -> List[str]:
+    """
+    Regions enabled in a customer account (ec2:DescribeRegions, looked up once per process).
+    Falls back to DEFAULT_REGION when the regions cannot be listed.
+    """
+    with _regions_lock:
+        regions = _discovered_regions.get(account_id)
+    if regions:
+        return regions
     
-    customer_accounts = get_customer_accounts()
-    results = []
+    from services.ec2_support import list_regions
+    try:
+        regions = list_regions(account_id) or [DEFAULT_REGION]
+    except Exception as e:
+        error(f"Could not list regions of account {account_id}, inventorying {DEFAULT_REGION} only: {str(e)}")
+        return [DEFAULT_REGION]
+    with _regions_lock:
+        _discovered_regions[account_id] = regions
+    return regions
+
+
+def _list_regional_resources(account_id: str, service: str, regions: List[str]) -> Dict:
+    """
+    List a regional service in every given region of an account concurrently.
+    A region that fails is recorded and skipped; if every region fails its first error is raised.
     
-    for account in customer_accounts:
-        account_id = account.get('account_id')
-        if not account_id:
-            continue
-            
+    Returns:
+        Dict with 'resources', 'failed_count' and 'regions' - per region, duration_ms and
+        resource_count (or error)
+    """
+    from services import list_resources
+    if not regions:
+        raise ValueError(f"No regions to inventory {service} in for account {account_id}")
+    
+    def list_region(region: str) -> tuple:
+        start = time.monotonic()
         try:
-            result = generate_inventory_for_account_service(account_id, service, cached)
-            results.append({
-                'account_id': account_id,
-                'service': service,
-                'status': 'success',
-                'resources_found': result.get('resources_found', 0)
-            })
+            return list_resources(service, account_id, region=region), None, time.monotonic() - start
         except Exception as e:
-            error(f"Error generating inventory for {service} in account {account_id}: {str(e)}\n{traceback.format_exc()}")
-            results.append({
-                'account_id': account_id,
-                'service': service,
-                'status': 'error',
-                'error': str(e)
-            })
+            return None, e, time.monotonic() - start
     
-    return results
+    with ThreadPoolExecutor(max_workers=max(1, min(REGION_CONCURRENCY, len(regions)))) as executor:
+        outcomes = list(zip(regions, executor.map(list_region, regions)))
+    
+    resources = []
+    failed_count = 0
+    timings = {}
+    errors = []
+    for region, (result, exc, seconds) in outcomes:
+        timings[region] = {'duration_ms': int(seconds * 1000)}
+        if exc is not None:
+            error(f"Error listing {service} in {region} for account {account_id}: {str(exc)}")
+            timings[region]['error'] = str(exc)
+            errors.append(exc)
+        else:
+            resources.extend(result['resources'])
+            failed_count += result.get('failed_count', 0)
+            timings[region]['resource_count'] = len(result['resources'])
+    
+    if len(errors) == len(regions):
+        raise errors[0]
+    
+    slowest = max(timings, key=lambda region: timings[region]['duration_ms'])
+    info(f"Listed {service} in {len(regions)} regions of account {account_id}: {len(resources)} resources, "
+         f"{len(errors)} regions failed, slowest {slowest} ({timings[slowest]['duration_ms']}ms)")
+    info(f"Region timings for {service} in account {account_id}: {json.dumps(timings)}")
+    return {
+        'resources': resources,
+        'failed_count': failed_count,
+        'regions': timings
+    }
+
+
+def _configured_regions(accounts: List[Dict], id_key: str = 'account_id') -> Dict[str, List[str]]:
+    """Regions configured on accounts table rows (Regions list or string set), by account ID"""
+    return {
+        account[id_key]: sorted(account['Regions'])
+        for account in accounts if account.get(id_key) and account.get('Regions')
+    }
+
+
+def generate_inventory_for_service(service: str, cached: bool = False) -> List[Dict]:
+    """Generate inventory for a specific service across all customer accounts"""
+    if service not in SUPPORTED_SERVICES:
+        raise ValueError(f"Unsupported service: {service}")
+    
+    return _generate_inventory_resumable([service], cached)['totals'][service]
 
 
 def generate_inventory_all_services(cached: bool = False) -> Dict:
     """Generate inventory for all services across all customer accounts"""
-    results = {}
+    return _generate_inventory_resumable(list(SUPPORTED_SERVICES), cached)['totals']
+
+
+def _generate_inventory_resumable(services: List[str], cached: bool = False, deadline: Deadline = None,
+                                  checkpoint: Dict = None) -> Dict:
+    """
+    Generate inventory for services x customer accounts, in service order then account order.
     
-    for service in SUPPORTED_SERVICES:
-        try:
-            results[service] = generate_inventory_for_service(service, cached)
-        except Exception as e:
-            error(f"Error generating inventory for service {service}: {str(e)}\n{traceback.format_exc()}")
-            results[service] = {
-                'status': 'error',
-                'error': str(e)
-            }
+    Args:
+        services: Services to inventory
+        cached: Whether to use cached inventory (for testing)
+        deadline: Optional deadline - checked before each (service, account) pair
+        checkpoint: Optional cursor from a previous invocation to resume from
+        
+    Returns:
+        Dict with per-service totals (accounts_succeeded, accounts_failed, resources_found),
+        the services and account list being scanned, and "cursor": [service_index,
+        account_index] of the next pair (None when complete). The dict is checkpointed as-is,
+        so per-account and per-region detail is logged rather than kept in it.
+    """
+    if checkpoint:
+        services = checkpoint['services']
+        account_ids = checkpoint['accounts']
+        totals = checkpoint['totals']
+        service_index, account_index = checkpoint['cursor']
+    else:
+        accounts = get_customer_accounts()
+        account_ids = [a.get('account_id') for a in accounts if a.get('account_id')]
+        totals = {service: {'accounts_succeeded': 0, 'accounts_failed': 0, 'resources_found': 0}
+                  for service in services}
+        service_index, account_index = 0, 0
     
-    return results
+    from services import is_regional
+    if any(is_regional(service) for service in services[service_index:]):
+        # Regions configured per account (accounts without them use their enabled regions)
+        configured_regions = _configured_regions(get_customer_accounts() if checkpoint else accounts)
+    else:
+        configured_regions = {}
+    
+    for si in range(service_index, len(services)):
+        service = services[si]
+        for ai in range(account_index if si == service_index else 0, len(account_ids)):
+            if deadline and deadline.near():
+                return {'services': services, 'accounts': account_ids, 'totals': totals, 'cursor': [si, ai]}
+            
+            account_id = account_ids[ai]
+            try:
+                result = generate_inventory_for_account_service(account_id, service, cached,
+                                                                regions=configured_regions.get(account_id))
+                totals[service]['accounts_succeeded'] += 1
+                totals[service]['resources_found'] += result.get('resource_count', 0)
+            except Exception as e:
+                error(f"Error generating inventory for {service} in account {account_id}: {str(e)}\n{traceback.format_exc()}")
+                totals[service]['accounts_failed'] += 1
+    
+    return {'services': services, 'accounts': account_ids, 'totals': totals, 'cursor': None}
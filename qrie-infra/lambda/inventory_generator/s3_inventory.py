@@ -18,9 +18,8 @@ def generate_s3_inventory(account_id: str, inventory_manager, cached: bool = Fal
     
     start_time = time.time()
     try:
-        from cross_account import get_cross_account_session
-        session = get_cross_account_session(account_id, 'us-east-1')
-        s3_client = session.client('s3')
+        from cross_account import get_cross_account_client
+        s3_client = get_cross_account_client(account_id, 's3', 'us-east-1')
         
         # List all buckets
         response = s3_client.list_buckets()
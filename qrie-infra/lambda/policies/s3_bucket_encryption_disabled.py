@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from policy_definition import PolicyDefinition
+from policy_rules import PolicyRule
 
 # Policy Definition
 S3BucketEncryptionDisabled = PolicyDefinition(
@@ -70,5 +71,14 @@ aws s3api put-bucket-policy --bucket BUCKET_NAME --policy '{
 - [AWS S3 Default Encryption](https://docs.aws.amazon.com/AmazonS3/latest/userguide/default-bucket-encryption.html)
 - [CIS AWS Foundations Benchmark 2.1.1](https://www.cisecurity.org/benchmark/amazon_web_services)
 """,
-    evaluation_module="s3_bucket_encryption_disabled"
+    evaluation_module="s3_bucket_encryption_disabled",
+    rule=PolicyRule(
+        compliant_when={'path': 'Encryption.Rules', 'op': 'not_empty'},
+        evidence={
+            'bucket_name': ['Name', '$name'],
+            'sse_algorithm': 'Encryption.Rules[0].ApplyServerSideEncryptionByDefault.SSEAlgorithm'
+        },
+        messages=("Bucket '{bucket_name}' has default encryption ({sse_algorithm})",
+                  "Bucket '{bucket_name}' has no default encryption")
+    )
 )
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from policy_definition import PolicyDefinition
+from policy_rules import PolicyRule
 
 # Policy Definition
 S3BucketMfaDeleteDisabled = PolicyDefinition(
@@ -52,5 +53,19 @@ aws s3api get-bucket-versioning --bucket BUCKET_NAME
 - [AWS S3 MFA Delete](https://docs.aws.amazon.com/AmazonS3/latest/userguide/MultiFactorAuthenticationDelete.html)
 - [CIS AWS Foundations Benchmark 2.1.3](https://www.cisecurity.org/benchmark/amazon_web_services)
 """,
-    evaluation_module="s3_bucket_mfa_delete_disabled"
+    evaluation_module="s3_bucket_mfa_delete_disabled",
+    rule=PolicyRule(
+        # Only versioned buckets can (and should) enable MFA delete
+        compliant_when={'any': [
+            {'path': 'Versioning', 'op': 'ne', 'value': 'Enabled'},
+            {'path': 'MFADelete', 'op': 'eq', 'value': 'Enabled'}
+        ]},
+        evidence={
+            'bucket_name': ['Name', '$name'],
+            'versioning': {'path': 'Versioning', 'default': 'Disabled'},
+            'mfa_delete': {'path': 'MFADelete', 'default': 'Disabled'}
+        },
+        messages=("Bucket '{bucket_name}' is protected by MFA delete or is not versioned",
+                  "Bucket '{bucket_name}' is versioned without MFA delete")
+    )
 )
@@ -6,9 +6,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from policy_definition import PolicyDefinition, PolicyEvaluator
-from common_utils import get_account_from_arn
+from common_utils import get_account_from_arn_or_unknown
 
 # Policy Definition
 S3BucketPublic = PolicyDefinition(
@@ -38,22 +38,92 @@ aws s3api put-bucket-policy --bucket BUCKET_NAME --policy '{
 aws s3api put-public-access-block --bucket BUCKET_NAME --public-access-block-configuration "BlockPublicAcls=true,IgnorePublicAcls=true,BlockPublicPolicy=true,RestrictPublicBuckets=true"
 ```
 """,
-    evaluation_module="s3_bucket_public"
+    evaluation_module="s3_bucket_public",
+    config_paths=["Name", "PublicAccessBlockConfiguration"]
 )
 
 
+# PublicAccessBlockConfiguration flags that must all be True for a bucket to be private
+_BLOCK_FLAGS = ('BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets')
+
+
+def _check_public_access(resource_arn: str, config: Dict[str, Any]) -> Tuple[str, bool, Dict[str, Any]]:
+    """
+    Check a bucket's PublicAccessBlockConfiguration (shared by evaluate and evaluate_batch).
+    
+    Returns:
+        (bucket_name, compliant, evidence) - compliant only if every block flag is True.
+        A missing configuration (None, as stored by describe_resource) blocks nothing.
+    """
+    # Extract bucket name from ARN or config
+    bucket_name = config.get('Name') or resource_arn.split(':::')[-1]
+    public_access_block = config.get('PublicAccessBlockConfiguration') or {}
+    
+    # Bucket is public if ANY of the flags is False
+    flags = [public_access_block.get(flag, False) for flag in _BLOCK_FLAGS]
+    evidence = {
+        'bucket_name': bucket_name,
+        'public_access_block_configuration': public_access_block,
+        'block_public_acls': flags[0],
+        'ignore_public_acls': flags[1],
+        'block_public_policy': flags[2],
+        'restrict_public_buckets': flags[3]
+    }
+    return bucket_name, all(flags), evidence
+
+
 class S3BucketPublicEvaluator(PolicyEvaluator):
     """Evaluator for S3 bucket public access policy"""
     
+    def evaluate_batch(self, resources: List[Dict[str, Any]], default_describe_time_ms: int) -> List[Dict[str, Any]]:
+        """Check many S3 buckets for public read access (scope resolved once per account)"""
+        results: List[Dict[str, Any]] = [None] * len(resources)
+        account_ids = [get_account_from_arn_or_unknown(r['ARN']) for r in resources]
+        in_scope = self._scope_by_account(account_ids)
+        
+        outcomes = []
+        outcome_indexes = []
+        for i, resource in enumerate(resources):
+            account_id = account_ids[i]
+            if not in_scope[account_id]:
+                results[i] = {
+                    'scoped': False,
+                    'compliant': True,
+                    'message': 'Resource excluded by scope',
+                    'evidence': {},
+                    'finding_id': None
+                }
+                continue
+            
+            try:
+                resource_arn = resource['ARN']
+                bucket_name, compliant, evidence = _check_public_access(resource_arn, resource['Configuration'])
+            except Exception as e:
+                results[i] = {'error': str(e)}
+                continue
+            
+            results[i] = {
+                'scoped': True,
+                'compliant': compliant,
+                'message': f"Bucket '{bucket_name}' is {'private' if compliant else 'publicly accessible'}",
+                'evidence': evidence,
+                'finding_id': None
+            }
+            outcomes.append((resource_arn, f"{account_id}_s3", compliant, evidence,
+                             resource.get('DescribeTime', default_describe_time_ms)))
+            outcome_indexes.append(i)
+        
+        # Persist all outcomes for the batch in one pass
+        for i, finding_id in zip(outcome_indexes, self._persist_findings_batch(outcomes)):
+            results[i]['finding_id'] = finding_id
+        
+        return results
+    
     def evaluate(self, resource_arn: str, config: Dict[str, Any], describe_time_ms: int) -> Dict[str, Any]:
         """Check if S3 bucket has public read access"""
         
-        # Extract account from ARN
-        try:
-            account_id = get_account_from_arn(resource_arn)
-        except ValueError:
-            # S3 ARNs have special format (arn:aws:s3:::bucket-name)
-            account_id = 'unknown'
+        # Extract account from ARN (S3 ARNs have special format: arn:aws:s3:::bucket-name)
+        account_id = get_account_from_arn_or_unknown(resource_arn)
         
         # Check scope
         if not self._should_evaluate(account_id, resource_arn):
@@ -65,32 +135,7 @@ class S3BucketPublicEvaluator(PolicyEvaluator):
                 'finding_id': None
             }
         
-        # Extract bucket name from ARN or config
-        bucket_name = config.get('Name') or resource_arn.split(':::')[-1]
-        
-        # Check PublicAccessBlockConfiguration
-        public_access_block = config.get('PublicAccessBlockConfiguration', {})
-        
-        # Bucket is public if ANY of these are False
-        is_public = (
-            not public_access_block.get('BlockPublicAcls', False) or
-            not public_access_block.get('IgnorePublicAcls', False) or
-            not public_access_block.get('BlockPublicPolicy', False) or
-            not public_access_block.get('RestrictPublicBuckets', False)
-        )
-        
-        # Build evidence
-        evidence = {
-            'bucket_name': bucket_name,
-            'public_access_block_configuration': public_access_block,
-            'block_public_acls': public_access_block.get('BlockPublicAcls', False),
-            'ignore_public_acls': public_access_block.get('IgnorePublicAcls', False),
-            'block_public_policy': public_access_block.get('BlockPublicPolicy', False),
-            'restrict_public_buckets': public_access_block.get('RestrictPublicBuckets', False)
-        }
-        
-        # Determine compliance
-        compliant = not is_public
+        bucket_name, compliant, evidence = _check_public_access(resource_arn, config)
         message = f"Bucket '{bucket_name}' is {'private' if compliant else 'publicly accessible'}"
         
         # Persist finding
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from policy_definition import PolicyDefinition
+from policy_rules import PolicyRule
 
 # Policy Definition
 S3BucketVersioningDisabled = PolicyDefinition(
@@ -32,5 +33,14 @@ aws s3api put-bucket-versioning --bucket BUCKET_NAME --versioning-configuration
 aws s3api put-bucket-versioning --bucket BUCKET_NAME --versioning-configuration Status=Enabled,MfaDelete=Enabled --mfa "SERIAL_NUMBER TOKEN"
 ```
 """,
-    evaluation_module="s3_bucket_versioning"
+    evaluation_module="s3_bucket_versioning",
+    rule=PolicyRule(
+        compliant_when={'path': 'Versioning', 'op': 'eq', 'value': 'Enabled'},
+        evidence={
+            'bucket_name': ['Name', '$name'],
+            'versioning': {'path': 'Versioning', 'default': 'Disabled'}
+        },
+        messages=("Bucket '{bucket_name}' has versioning enabled",
+                  "Bucket '{bucket_name}' versioning is {versioning}")
+    )
 )
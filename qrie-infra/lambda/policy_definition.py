@@ -2,9 +2,12 @@
 Policy definition framework for qrie CSPM.
 Core abstractions for policies, scoping, and evaluation.
 """
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Union, Literal, Any
+import copy
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union, Literal, Any, Callable, Tuple
 from abc import ABC, abstractmethod
+from common.logger import error
 
 @dataclass
 class ScopeConfig:
@@ -15,15 +18,87 @@ class ScopeConfig:
     include_ou_paths: Optional[List[str]] = None  # ["/Production/", "/Security/"]
     exclude_ou_paths: Optional[List[str]] = None
 
+@dataclass
+class EvaluationContext:
+    """
+    Per-run state shared by evaluators (scanner or event processor invocation).
+    Evaluators bound to a context route finding persistence through its shared
+    buffered writer instead of issuing one DynamoDB call per evaluation.
+    
+    When a findings_state_loader is set, existing finding state is loaded once per
+    AccountService and writes are issued only on state transitions (new, re-opened,
+    resolved) or evidence/severity changes.
+    """
+    findings_writer: Optional[Any] = None  # data_access.findings_writer.FindingsWriter
+    findings_state_loader: Optional[Callable[[str], Dict[Tuple[str, str], Dict]]] = None
+    stats: Dict[str, int] = field(default_factory=lambda: {'writes_skipped': 0})
+    _known_findings: Dict[str, Optional[Dict]] = field(default_factory=dict, repr=False)
+    _load_locks: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: Any = field(default_factory=threading.Lock, repr=False)
+    
+    def preload_findings(self, account_service: str) -> Optional[Dict[Tuple[str, str], Dict]]:
+        """Load (once) the existing finding state for an AccountService. None means unknown."""
+        if self.findings_state_loader is None:
+            return None
+        
+        if account_service in self._known_findings:
+            return self._known_findings[account_service]
+        
+        # Per-partition lock so workers loading different partitions don't block each other
+        with self._lock:
+            load_lock = self._load_locks.setdefault(account_service, threading.Lock())
+        
+        with load_lock:
+            if account_service not in self._known_findings:
+                try:
+                    self._known_findings[account_service] = self.findings_state_loader(account_service)
+                except Exception as e:
+                    # Unknown state - fall back to writing every outcome
+                    error(f"Error preloading findings for {account_service}: {str(e)}")
+                    self._known_findings[account_service] = None
+            return self._known_findings[account_service]
+    
+    def needs_write(self, account_service: str, resource_arn: str, policy_id: str, compliant: bool,
+                    severity: int, evidence: Dict[str, Any]) -> bool:
+        """Whether an evaluation outcome changes stored finding state (counts skipped writes)"""
+        known = self.preload_findings(account_service)
+        if known is None:
+            return True
+        
+        prior = known.get((resource_arn, policy_id))
+        if compliant:
+            # Only resolve findings that are currently open
+            changed = prior is not None and prior['State'] == 'ACTIVE'
+        else:
+            changed = (
+                prior is None or
+                prior['State'] != 'ACTIVE' or
+                prior['Severity'] != severity or
+                prior['Evidence'] != evidence
+            )
+        
+        if not changed:
+            with self._lock:
+                self.stats['writes_skipped'] += 1
+        return changed
+
 class PolicyEvaluator(ABC):
     """Abstract base class for policy evaluation functions"""
     
+    context: Optional[EvaluationContext] = None
+    
     def __init__(self, policy_id: str, severity: int, scope: ScopeConfig):
         """Initialize evaluator with policy metadata"""
         self.policy_id = policy_id
         self.severity = severity
         self.scope = scope
     
+    def with_context(self, context: Optional[EvaluationContext]) -> 'PolicyEvaluator':
+        """Return a shallow copy of this evaluator bound to an evaluation context"""
+        bound = copy.copy(self)
+        bound.context = context
+        return bound
+    
     @abstractmethod
     def evaluate(self, resource_arn: str, config: Dict[str, Any], describe_time_ms: int) -> Dict[str, Any]:
         """
@@ -45,6 +120,35 @@ class PolicyEvaluator(ABC):
         """
         pass
     
+    def evaluate_batch(self, resources: List[Dict[str, Any]], default_describe_time_ms: int) -> List[Dict[str, Any]]:
+        """
+        Evaluate many resources against this policy in one call.
+        
+        The default implementation loops over evaluate(). Evaluators override it with a
+        vectorized version that amortizes scoping and finding persistence over the batch
+        (see _scope_by_account and _persist_findings_batch).
+        
+        Args:
+            resources: Inventory rows with 'ARN', 'Configuration' and optional 'DescribeTime'
+            default_describe_time_ms: Describe time for rows without DescribeTime
+            
+        Returns:
+            One result per resource, in input order, shaped like evaluate()'s result.
+            A resource whose evaluation raised yields {'error': str} instead, so one bad
+            configuration does not fail the rest of the batch.
+        """
+        results = []
+        for resource in resources:
+            try:
+                results.append(self.evaluate(
+                    resource['ARN'],
+                    resource['Configuration'],
+                    resource.get('DescribeTime', default_describe_time_ms)
+                ))
+            except Exception as e:
+                results.append({'error': str(e)})
+        return results
+    
     def _should_evaluate(self, account_id: str, resource_arn: str) -> bool:
         """Check if resource should be evaluated based on scope"""
         # Import here to avoid circular dependencies
@@ -55,6 +159,48 @@ class PolicyEvaluator(ABC):
         
         return should_evaluate_resource(account_id, resource_arn, self.scope)
     
+    def _scope_by_account(self, account_ids: List[str]) -> Dict[str, bool]:
+        """Resolve scope once per distinct account in a batch (scope is account-level)"""
+        return {account_id: self._should_evaluate(account_id, '') for account_id in set(account_ids)}
+    
+    def _persist_findings_batch(self, outcomes: List[Tuple[str, str, bool, Dict[str, Any], int]]) -> List[Optional[str]]:
+        """
+        Persist a batch of evaluation outcomes.
+        
+        Args:
+            outcomes: (resource_arn, account_service, compliant, evidence, describe_time_ms) tuples
+            
+        Returns:
+            Finding IDs aligned with outcomes (None for compliant resources)
+        """
+        if self.context is not None and self.context.findings_writer is not None:
+            return [self._persist_finding(*outcome) for outcome in outcomes]
+        
+        # Direct path - one FindingsManager for the whole batch
+        import sys
+        import os
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from data_access.findings_manager import FindingsManager
+        findings_manager = FindingsManager()
+        
+        finding_ids = []
+        for resource_arn, account_service, compliant, evidence, describe_time_ms in outcomes:
+            if compliant:
+                findings_manager.close_finding(resource_arn, self.policy_id, describe_time_ms)
+                finding_ids.append(None)
+            else:
+                findings_manager.put_finding(
+                    resource_arn=resource_arn,
+                    policy_id=self.policy_id,
+                    account_service=account_service,
+                    severity=self.severity,
+                    state='ACTIVE',
+                    evidence=evidence,
+                    describe_time_ms=describe_time_ms
+                )
+                finding_ids.append(f"{resource_arn}#{self.policy_id}")
+        return finding_ids
+    
     def _persist_finding(self, resource_arn: str, account_service: str, compliant: bool, 
                         evidence: Dict[str, Any], describe_time_ms: int) -> Optional[str]:
         """
@@ -70,6 +216,28 @@ class PolicyEvaluator(ABC):
         Returns:
             Finding ID if non-compliant finding was created/updated, None if compliant
         """
+        writer = self.context.findings_writer if self.context else None
+        if writer is not None:
+            # Skip writes that would not change stored state (when state is known)
+            if not self.context.needs_write(account_service, resource_arn, self.policy_id,
+                                            compliant, self.severity, evidence):
+                return None if compliant else f"{resource_arn}#{self.policy_id}"
+            
+            # Buffered path - outcome is flushed in batches by the context owner
+            if compliant:
+                writer.close_finding(resource_arn, self.policy_id, describe_time_ms)
+                return None
+            writer.put_finding(
+                resource_arn=resource_arn,
+                policy_id=self.policy_id,
+                account_service=account_service,
+                severity=self.severity,
+                state='ACTIVE',
+                evidence=evidence,
+                describe_time_ms=describe_time_ms
+            )
+            return f"{resource_arn}#{self.policy_id}"
+        
         # Import here to avoid circular dependencies
         import sys
         import os
@@ -79,7 +247,7 @@ class PolicyEvaluator(ABC):
         
         if compliant:
             # Resource is compliant - close any existing finding
-            findings_manager.close_finding(resource_arn, self.policy_id)
+            findings_manager.close_finding(resource_arn, self.policy_id, describe_time_ms)
             return None
         else:
             # Resource is non-compliant - create/update finding
@@ -104,6 +272,19 @@ class PolicyDefinition:
     severity: int  # 0-100 (can be overridden by customer)
     remediation: str  # markdown with remediation steps
     evaluation_module: str  # explicit module name for evaluator
+    rule: Optional[Any] = None  # policy_rules.PolicyRule; compiled in place of a hand-written evaluator
+    config_paths: Optional[List[str]] = None  # Configuration paths the evaluator reads (derived for rules)
+    
+    def input_paths(self) -> Optional[List[str]]:
+        """
+        Configuration paths this policy's evaluation depends on.
+        None means unknown - the policy must be re-evaluated on any configuration change.
+        """
+        if self.config_paths is not None:
+            return list(self.config_paths)
+        if self.rule is not None:
+            return self.rule.config_paths()
+        return None
 
 @dataclass
 class Policy:
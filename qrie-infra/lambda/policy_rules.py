@@ -0,0 +1,612 @@
+"""
+Declarative policy rules for qrie CSPM.
+Rules are plain data registered on a PolicyDefinition and compiled once into composed
+closures, so simple config predicates need no hand-written evaluator class.
+
+Rule format:
+
+    PolicyRule(
+        compliant_when={'all': [
+            {'path': 'PublicAccessBlockConfiguration.BlockPublicAcls', 'op': 'eq', 'value': True},
+            {'path': 'PublicAccessBlockConfiguration.IgnorePublicAcls', 'op': 'eq', 'value': True},
+        ]},
+        evidence={
+            'bucket_name': ['Name', '$name'],                       # first present path wins
+            'block_public_acls': {'path': 'PublicAccessBlockConfiguration.BlockPublicAcls', 'default': False},
+        },
+        messages=("Bucket '{bucket_name}' is private", "Bucket '{bucket_name}' is publicly accessible")
+    )
+
+Conditions:
+    {'all': [cond, ...]}, {'any': [cond, ...]}, {'not': cond}
+    {'path': <path>, 'op': <op>, 'value': <value>, 'default': <value if path is missing>}
+
+Paths are dotted keys with optional list indexes (e.g. 'Encryption.Rules[0].BucketKeyEnabled').
+'$arn' is the resource ARN and '$name' the last ARN segment (bucket/user/instance name).
+"""
+import copy
+import operator
+import re
+import string
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from policy_definition import PolicyEvaluator, ScopeConfig
+from common_utils import get_account_from_arn_or_unknown
+
+# Marker for paths that do not resolve in a configuration
+MISSING = object()
+
+# Result for resources excluded by the launched policy's scope
+_OUT_OF_SCOPE = {
+    'scoped': False,
+    'compliant': True,
+    'message': 'Resource excluded by scope',
+    'evidence': {},
+    'finding_id': None
+}
+
+_PATH_SEGMENT = re.compile(r'([^.\[\]]+)((?:\[\d+\])*)')
+_PATH_INDEX = re.compile(r'\[(\d+)\]')
+
+
+@dataclass
+class PolicyRule:
+    """Declarative compliance rule for a policy (see module docstring for the format)"""
+    compliant_when: Dict[str, Any]
+    evidence: Dict[str, Union[str, List[str], Dict[str, Any]]] = field(default_factory=dict)
+    messages: Optional[Tuple[str, str]] = None  # (compliant, non-compliant) format strings over evidence
+
+    def config_paths(self) -> List[str]:
+        """Configuration paths read by this rule (condition and evidence), excluding $-paths"""
+        paths = []
+        _collect_condition_paths(self.compliant_when, paths)
+        for spec in self.evidence.values():
+            if isinstance(spec, dict):
+                paths.append(spec['path'])
+            elif isinstance(spec, list):
+                paths.extend(spec)
+            else:
+                paths.append(spec)
+        return sorted({p for p in paths if not p.startswith('$')})
+
+
+# ============================================================================
+# COMPILATION
+# ============================================================================
+# A rule compiles to one evaluation loop over inventory rows, specialized on the rule's shape
+# so the common cases make no per-field Python calls:
+# - evidence starts as a copy of its scalar defaults; fields under the same top-level key
+#   share one dict.get of that key (nested fields are read from the value it returns), and
+#   only unusual fields (coalesced, $-paths, deep paths) get their own getter
+# - condition leaves that read an evidence field (same path and default) compare the built
+#   evidence value, and a rule that only checks evidence fields for equality is one
+#   itemgetter comparison; other leaves are direct dict.get comparisons where possible
+# - messages are constants or a prefix/field/suffix f-string; only templates with
+#   attribute access, conversions or format specs go through format_map
+# - scope is resolved once per account field of the ARNs, not per resource
+# Parsing and validation happen once per rule.
+
+# Comparison operators: fn(value, expected) over the resolved value (MISSING never matches)
+_BINARY_OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'in': lambda v, e: v in e,
+    'not_in': lambda v, e: v not in e,
+}
+
+# Ordering operators never match missing or null values
+_ORDERING_OPERATORS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+# Operators that ignore the rule's 'value' (except contains, which checks membership of it)
+_UNARY_OPERATORS = {
+    'exists': lambda v, e: v is not MISSING,
+    'missing': lambda v, e: v is MISSING,
+    'truthy': lambda v, e: v is not MISSING and bool(v),
+    'falsy': lambda v, e: v is MISSING or not v,
+    'empty': lambda v, e: _is_empty(v),
+    'not_empty': lambda v, e: not _is_empty(v),
+    'contains': lambda v, e: _contains(v, e),
+}
+
+OPERATORS = sorted(set(_BINARY_OPERATORS) | set(_ORDERING_OPERATORS) | set(_UNARY_OPERATORS))
+
+# (arn, config) -> value
+Getter = Callable[[str, Dict[str, Any]], Any]
+# (arn, config, evidence) -> bool
+Predicate = Callable[[str, Dict[str, Any], Dict[str, Any]], bool]
+
+
+def parse_path(path: str) -> Tuple[Union[str, int], ...]:
+    """
+    Split a path expression into dict keys and list indexes.
+
+    Raises:
+        ValueError: If the path is malformed
+    """
+    steps = []
+    for part in path.split('.'):
+        match = _PATH_SEGMENT.fullmatch(part)
+        if not match:
+            raise ValueError(f"Invalid path expression: {path}")
+        steps.append(match.group(1))
+        steps.extend(int(index) for index in _PATH_INDEX.findall(match.group(2)))
+    return tuple(steps)
+
+
+def _compile_getter(path: str, default=MISSING) -> Getter:
+    """
+    Getter for a path ($arn, $name or a config path) returning default when it does not
+    resolve (type mismatches included). Mutable defaults are copied per call.
+    """
+    if path == '$arn':
+        return lambda arn, config: arn
+    if path == '$name':
+        return lambda arn, config: arn[max(arn.rfind(':'), arn.rfind('/')) + 1:]
+
+    steps = parse_path(path)
+    if isinstance(default, (dict, list, set)):
+        # Fresh copy so results never share a mutable default
+        if len(steps) == 1:
+            key = steps[0]
+
+            def top_level(arn, config):
+                value = config.get(key, MISSING)
+                return copy.copy(default) if value is MISSING else value
+            return top_level
+        resolve = _compile_getter(path)
+
+        def resolve_or_copy(arn, config):
+            value = resolve(arn, config)
+            return copy.copy(default) if value is MISSING else value
+        return resolve_or_copy
+
+    first = steps[0]
+    if len(steps) == 1:
+        return lambda arn, config: config.get(first, default)
+    if len(steps) == 2 and isinstance(steps[1], str):
+        second = steps[1]
+
+        def nested(arn, config):
+            parent = config.get(first)
+            return parent.get(second, default) if isinstance(parent, dict) else default
+        return nested
+
+    rest = steps[1:]
+
+    def resolve(arn, config):
+        value = config.get(first, MISSING)
+        for step in rest:
+            if value is MISSING:
+                return default
+            if isinstance(step, int):
+                value = value[step] if isinstance(value, list) and len(value) > step else MISSING
+            else:
+                value = value.get(step, MISSING) if isinstance(value, dict) else MISSING
+        return default if value is MISSING else value
+    return resolve
+
+
+def _evidence_field_spec(spec) -> Tuple[List[str], Any]:
+    """(paths, default) of an evidence field spec"""
+    if isinstance(spec, dict):
+        paths, default = [spec['path']], spec.get('default')
+    elif isinstance(spec, list):
+        paths, default = spec, None
+    else:
+        paths, default = [spec], None
+    if not paths:
+        raise ValueError("Evidence field needs at least one path")
+    return paths, default
+
+
+def _compile_evidence(fields: Dict[str, Any]) -> Tuple[tuple, Dict[tuple, str]]:
+    """
+    Compile evidence fields into a build plan for compile_rule's evaluation loop.
+
+    Returns:
+        (plan, plain_fields): plain_fields maps (path, default) of single-path fields to
+        their evidence name
+    """
+    # Evidence starts as a copy of the scalar defaults (which also fixes field order)
+    template = {}
+    plain_fields = {}
+    reads: Dict[str, list] = {}  # top-level key -> [name, mutable default, $name fallback, children]
+    getters = []  # (name, getter) for $-paths, deep paths and other coalesced fields
+    for name, spec in fields.items():
+        paths, default = _evidence_field_spec(spec)
+        template[name] = default if _is_scalar(default) else None
+        keys = [parse_path(path) if not path.startswith('$') else None for path in paths]
+        if len(paths) == 1 and _is_scalar(default):
+            plain_fields.setdefault((paths[0], default), name)
+
+        name_fallback = len(paths) == 2 and paths[1] == '$name' and default is None
+        if (len(paths) == 1 or name_fallback) and keys[0] is not None and len(keys[0]) == 1:
+            read = reads.setdefault(keys[0][0], [None, None, False, []])
+            if read[0] is None:
+                read[:3] = name, None if _is_scalar(default) else default, name_fallback
+                continue
+        elif len(paths) == 1 and keys[0] is not None and len(keys[0]) == 2 \
+                and isinstance(keys[0][1], str) and _is_scalar(default):
+            reads.setdefault(keys[0][0], [None, None, False, []])[3].append((name, keys[0][1], default))
+            continue
+        if len(paths) > 1:
+            getters.append((name, _coalesce_getter([_compile_getter(path) for path in paths], default)))
+        else:
+            getters.append((name, _compile_getter(paths[0], default)))
+
+    reads = tuple((key, name, mutable_default, name_fallback, tuple(children))
+                  for key, (name, mutable_default, name_fallback, children) in reads.items())
+    return (template, reads, tuple(getters)), plain_fields
+
+
+def _coalesce_getter(getters: List[Getter], default) -> Getter:
+    """Getter for the first path that is present and not null"""
+    def coalesce(arn, config):
+        for getter in getters:
+            value = getter(arn, config)
+            if value is not MISSING and value is not None:
+                return value
+        return default
+    return coalesce
+
+
+def _compile_condition(condition: Dict[str, Any], plain_fields: Dict[tuple, str]) -> Tuple[Predicate, Optional[tuple]]:
+    """
+    Predicate over (arn, config, evidence) for a condition tree (all/any short-circuit).
+
+    Returns:
+        (predicate, evidence_comparison): evidence_comparison is (name, compare, expected)
+        when the predicate only compares an evidence value, so all/any can fold it
+    """
+    if not isinstance(condition, dict):
+        raise ValueError(f"Invalid rule condition: {condition}")
+    for combinator, short_circuit in (('all', False), ('any', True)):
+        if combinator in condition:
+            return _compile_combinator([_compile_condition(c, plain_fields) for c in condition[combinator]],
+                                       short_circuit), None
+    if 'not' in condition:
+        predicate, _ = _compile_condition(condition['not'], plain_fields)
+        return (lambda arn, config, evidence: not predicate(arn, config, evidence)), None
+    if 'path' not in condition or 'op' not in condition:
+        raise ValueError(f"Invalid rule condition: {condition}")
+
+    op = condition['op']
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown rule operator '{op}' (expected one of {OPERATORS})")
+
+    path = condition['path']
+    default = condition.get('default', MISSING)
+    expected = condition.get('value')
+    if op in _BINARY_OPERATORS:
+        compare = _BINARY_OPERATORS[op]
+    elif op in _ORDERING_OPERATORS:
+        ordering = _ORDERING_OPERATORS[op]
+
+        def compare(value, expected):
+            return value is not MISSING and value is not None and ordering(value, expected)
+    else:
+        compare = _UNARY_OPERATORS[op]
+
+    # Compare the evidence value when evidence reads the same path with the same default
+    name = plain_fields.get((path, default)) if _is_scalar(default) else None
+    if name is not None:
+        return (lambda arn, config, evidence: compare(evidence[name], expected)), (name, compare, expected)
+
+    steps = parse_path(path) if not path.startswith('$') else ()
+    if _is_scalar(default) and len(steps) == 1:
+        key = steps[0]
+        return (lambda arn, config, evidence: compare(config.get(key, default), expected)), None
+    if _is_scalar(default) and len(steps) == 2 and isinstance(steps[1], str):
+        key, child = steps
+
+        def nested(arn, config, evidence):
+            parent = config.get(key)
+            return compare(parent.get(child, default) if isinstance(parent, dict) else default, expected)
+        return nested, None
+
+    getter = _compile_getter(path, default)
+    return (lambda arn, config, evidence: compare(getter(arn, config), expected)), None
+
+
+def _compile_combinator(children: List[Tuple[Predicate, Optional[tuple]]], short_circuit: bool) -> Predicate:
+    """all (short_circuit=False) or any (short_circuit=True) over compiled children"""
+    comparisons = tuple(comparison for _, comparison in children)
+    if all(comparisons) and all(compare is operator.eq for _, compare, _ in comparisons):
+        # Only evidence equality checks - one loop, no per-child calls
+        expectations = tuple((name, expected) for name, _, expected in comparisons)
+
+        def evidence_equals(arn, config, evidence):
+            for name, expected in expectations:
+                if (evidence[name] == expected) is short_circuit:
+                    return short_circuit
+            return not short_circuit
+        return evidence_equals
+    if all(comparisons):
+        # Only evidence comparisons - one loop, no per-child calls
+        def over_evidence(arn, config, evidence):
+            for name, compare, expected in comparisons:
+                if compare(evidence[name], expected) is short_circuit:
+                    return short_circuit
+            return not short_circuit
+        return over_evidence
+
+    predicates = tuple(predicate for predicate, _ in children)
+
+    def combined(arn, config, evidence):
+        for predicate in predicates:
+            if bool(predicate(arn, config, evidence)) is short_circuit:
+                return short_circuit
+        return not short_circuit
+    return combined
+
+
+def _evidence_equality(condition: Dict[str, Any], plain_fields: Dict[tuple, str]) -> Optional[Tuple[Callable, Any]]:
+    """
+    (read, expected) when a condition only checks evidence values for equality (one eq leaf,
+    or all of eq leaves), so compliance is read(evidence) == expected without predicate calls.
+    """
+    leaves = condition['all'] if 'all' in condition else [condition]
+    names = []
+    expected = []
+    for leaf in leaves:
+        if not isinstance(leaf, dict) or leaf.get('op') != 'eq' or 'path' not in leaf:
+            return None
+        default = leaf.get('default', MISSING)
+        name = plain_fields.get((leaf['path'], default)) if _is_scalar(default) else None
+        if name is None:
+            return None
+        names.append(name)
+        expected.append(leaf.get('value'))
+    if not names:
+        return None
+    # itemgetter returns a bare value for one name and a tuple for several
+    return operator.itemgetter(*names), tuple(expected) if len(expected) > 1 else expected[0]
+
+
+def _compile_message(template: str) -> Tuple[Optional[str], Optional[str], Optional[Callable]]:
+    """
+    (prefix, field, suffix) for a message template: a constant is (text, None, ''), a single
+    plain field (prefix, name, suffix). Anything else (attribute/index access, conversions,
+    specs) is (None, None, format), formatting the whole template over the evidence.
+    """
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError:
+        return None, None, lambda arn, evidence: template.format_map(evidence)  # Raises per resource
+    literals = [literal for literal, _, _, _ in parsed]
+    fields = [(name, spec, conversion) for _, name, spec, conversion in parsed if name is not None]
+    if not fields:
+        return ''.join(literals), None, ''
+    if len(fields) == 1 and not fields[0][1] and not fields[0][2] and fields[0][0].isidentifier():
+        return literals[0], fields[0][0], ''.join(literals[1:])
+    return None, None, lambda arn, evidence: template.format_map(evidence)
+
+
+def compile_rule(rule: PolicyRule, policy_id: str = 'rule') -> Tuple[Callable, Callable]:
+    """
+    Compile a rule into its evaluation functions.
+
+    Returns:
+        (evaluate_rule, evaluate_rules): evaluate_rule(resource_arn, config) returns an
+        evaluation result before persistence; evaluate_rules(resources, account_service_for,
+        default_describe_time_ms) evaluates inventory rows in one loop and returns
+        (results, outcomes, scored_results): outcomes for _persist_findings_batch, aligned
+        with scored_results, the results that receive the persisted finding IDs.
+        account_service_for(arn) returns the resource's AccountService, or None when it is
+        out of scope; it is called once per distinct account field.
+
+    Raises:
+        ValueError: If the rule has an invalid condition, operator or path
+    """
+    (template, reads, getters), plain_fields = _compile_evidence(rule.evidence)
+    is_compliant, _ = _compile_condition(rule.compliant_when, plain_fields)
+    if not any(combinator in rule.compliant_when for combinator in ('all', 'any', 'not')):
+        # Combinators return bools; a bare leaf returns whatever its operator returns
+        leaf = is_compliant
+        is_compliant = lambda arn, config, evidence: bool(leaf(arn, config, evidence))  # noqa: E731
+    read_evidence, expected_evidence = _evidence_equality(rule.compliant_when, plain_fields) or (None, None)
+    # Messages indexed by compliant (False, True); without messages: '<arn> violates <policy>'
+    if rule.messages:
+        messages = tuple(_compile_message(template) for template in reversed(rule.messages))
+    else:
+        messages = tuple((None, None, lambda arn, evidence, outcome=outcome: arn + outcome)
+                         for outcome in (f" violates {policy_id}", f" complies with {policy_id}"))
+
+    def evaluate_rules(resources, account_service_for, default_describe_time_ms, raise_errors=False):
+        results = []
+        outcomes = []
+        scored = []
+        # Bound appends: this loop runs once per inventory row
+        add_result, add_outcome, add_scored = results.append, outcomes.append, scored.append
+        by_prefix = {}
+        for resource in resources:
+            # ARNs that only differ after their last ':' share the account field
+            arn = resource['ARN']
+            prefix = arn.rpartition(':')[0]
+            try:
+                account_service = by_prefix[prefix]
+            except KeyError:
+                account_service = account_service_for(arn)
+                if prefix.count(':') >= 4:  # Account field is part of the prefix
+                    by_prefix[prefix] = account_service
+            if account_service is None:
+                add_result(_OUT_OF_SCOPE.copy())
+                continue
+            try:
+                config = resource['Configuration']
+
+                # Evidence: one lookup per top-level key, for its own field and the fields under it
+                evidence = template.copy()
+                get = config.get
+                for key, name, mutable_default, name_fallback, children in reads:
+                    value = get(key, MISSING)
+                    if name is not None:
+                        if value is not MISSING and (value is not None or not name_fallback):
+                            evidence[name] = value
+                        elif name_fallback:
+                            evidence[name] = arn[max(arn.rfind(':'), arn.rfind('/')) + 1:]
+                        elif mutable_default is not None:
+                            evidence[name] = copy.copy(mutable_default)  # Results never share a mutable default
+                    if children and isinstance(value, dict):
+                        get_child = value.get
+                        for child_name, child, default in children:
+                            evidence[child_name] = get_child(child, default)
+                for name, getter in getters:
+                    evidence[name] = getter(arn, config)
+
+                if read_evidence is not None:
+                    compliant = read_evidence(evidence) == expected_evidence
+                else:
+                    compliant = is_compliant(arn, config, evidence)
+
+                head, field, tail = messages[compliant]
+                if field is not None:
+                    message = f"{head}{evidence[field]}{tail}"
+                elif head is not None:
+                    message = head
+                else:
+                    message = tail(arn, evidence)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                add_result({'error': str(e)})
+                continue
+            result = {'scoped': True, 'compliant': compliant, 'message': message, 'evidence': evidence,
+                      'finding_id': None}
+            add_result(result)
+            add_scored(result)
+            add_outcome((arn, account_service, compliant, evidence,
+                         resource.get('DescribeTime', default_describe_time_ms)))
+        return results, outcomes, scored
+
+    def evaluate_rule(arn, config):
+        results, _, _ = evaluate_rules(({'ARN': arn, 'Configuration': config},), _in_scope, None, raise_errors=True)
+        return results[0]
+
+    return evaluate_rule, evaluate_rules
+
+
+def _in_scope(arn: str) -> str:
+    return ''
+
+
+def _is_scalar(value) -> bool:
+    return value is MISSING or value is None or isinstance(value, (bool, int, float, str))
+
+
+def _is_empty(value) -> bool:
+    return value is MISSING or value is None or (hasattr(value, '__len__') and len(value) == 0)
+
+
+def _contains(value, expected) -> bool:
+    return isinstance(value, (list, str, dict, set)) and expected in value
+
+
+# ============================================================================
+# RULE EVALUATORS
+# ============================================================================
+
+class RuleEvaluator(PolicyEvaluator):
+    """
+    PolicyEvaluator driven by a compiled PolicyRule.
+    Concrete classes are generated per policy by compile_rule_evaluator.
+    """
+
+    rule: PolicyRule = None
+    service: str = None
+    _evaluate_rule: Callable[[str, Dict[str, Any]], Dict[str, Any]] = None
+    _evaluate_rules: Callable = None
+
+    def __init__(self, policy_id: str, severity: int, scope: ScopeConfig):
+        super().__init__(policy_id, severity, scope)
+        # AccountService by account ID, None when out of scope (scope is account-level)
+        self._account_services: Dict[str, Optional[str]] = {}
+
+    def evaluate(self, resource_arn: str, config: Dict[str, Any], describe_time_ms: int) -> Dict[str, Any]:
+        """Evaluate the compiled rule against one resource configuration"""
+        account_service = self._account_service_for(resource_arn)
+        if account_service is None:
+            return _OUT_OF_SCOPE.copy()
+
+        result = self._evaluate_rule(resource_arn, config)
+        result['finding_id'] = self._persist_finding(
+            resource_arn=resource_arn,
+            account_service=account_service,
+            compliant=result['compliant'],
+            evidence=result['evidence'],
+            describe_time_ms=describe_time_ms
+        )
+        return result
+
+    def evaluate_batch(self, resources: List[Dict[str, Any]], default_describe_time_ms: int) -> List[Dict[str, Any]]:
+        """Evaluate the compiled rule against many resources (scope resolved once per account)"""
+        results, outcomes, scored_results = self._evaluate_rules(
+            resources, self._account_service_for, default_describe_time_ms
+        )
+
+        for result, finding_id in zip(scored_results, self._persist_findings_batch(outcomes)):
+            result['finding_id'] = finding_id
+        return results
+
+    def _account_service_for(self, resource_arn: str) -> Optional[str]:
+        """AccountService for a resource, None when its account is out of scope"""
+        account_id = get_account_from_arn_or_unknown(resource_arn)
+        try:
+            return self._account_services[account_id]
+        except KeyError:
+            return self._resolve_account_services([account_id])[account_id]
+
+    def _resolve_account_services(self, account_ids: List[str]) -> Dict[str, Optional[str]]:
+        """AccountService (None when out of scope) for each account, resolving scope once per evaluator"""
+        unresolved = set(account_ids).difference(self._account_services)
+        if unresolved:
+            for account_id, scoped in self._scope_by_account(unresolved).items():
+                self._account_services[account_id] = f"{account_id}_{self.service}" if scoped else None
+        return self._account_services
+
+
+# Compiled evaluator classes by policy ID (rules are compiled once per process)
+_compiled_evaluators: Dict[str, type] = {}
+
+
+def compile_rule_evaluator(policy_definition) -> type:
+    """
+    Compile a PolicyDefinition's rule into a RuleEvaluator subclass (cached per policy).
+
+    Raises:
+        ValueError: If the definition has no rule or the rule is malformed
+    """
+    cached = _compiled_evaluators.get(policy_definition.policy_id)
+    if cached is not None and cached.rule == policy_definition.rule:
+        return cached
+
+    rule = policy_definition.rule
+    if rule is None:
+        raise ValueError(f"Policy {policy_definition.policy_id} has no rule")
+
+    evaluate_rule, evaluate_rules = compile_rule(rule, policy_definition.policy_id)
+    evaluator_class = type(f"{policy_definition.policy_id}RuleEvaluator", (RuleEvaluator,), {
+        'rule': rule,
+        'service': policy_definition.service,
+        '_evaluate_rule': staticmethod(evaluate_rule),
+        '_evaluate_rules': staticmethod(evaluate_rules),
+    })
+    _compiled_evaluators[policy_definition.policy_id] = evaluator_class
+    return evaluator_class
+
+
+def _collect_condition_paths(condition: Dict[str, Any], paths: List[str]) -> None:
+    for key in ('all', 'any'):
+        if key in condition:
+            for child in condition[key]:
+                _collect_condition_paths(child, paths)
+            return
+    if 'not' in condition:
+        _collect_condition_paths(condition['not'], paths)
+    elif 'path' in condition:
+        paths.append(condition['path'])
@@ -2,12 +2,62 @@ import os, boto3
 import sys
 import traceback
 import datetime
+import time
 import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from common.logger import info, error
 from data_access.policy_manager import PolicyManager
 from data_access.inventory_manager import InventoryManager
-from common_utils import get_customer_accounts, get_summary_table
+from data_access.findings_writer import FindingsWriter, FindingsFlushError
+from data_access.checkpoint_manager import CheckpointManager
+from common.deadline import Deadline
+from policy_definition import EvaluationContext
+from config_digest import config_digest, policy_version, evaluation_fingerprint
+from common_utils import get_customer_accounts, get_summary_table, get_account_from_arn_or_unknown
+from scan_processor.shard_dispatch import get_shard_dispatcher
+
+# Worker pool width for (account, service) scan units. Overridable per invocation
+# via the "concurrency" event parameter, capped at MAX_SCAN_CONCURRENCY.
+DEFAULT_SCAN_CONCURRENCY = int(os.environ.get('SCAN_CONCURRENCY', '8'))
+MAX_SCAN_CONCURRENCY = 32
+
+# Scan modes: "full" evaluates every (resource, policy) pair; "incremental" skips pairs whose
+# evaluation fingerprint (config digest + launched policy version) is unchanged since last scan
+SCAN_MODE_FULL = 'full'
+SCAN_MODE_INCREMENTAL = 'incremental'
+SCAN_MODES = (SCAN_MODE_FULL, SCAN_MODE_INCREMENTAL)
+
+# Scan roles: "standalone" scans every account in one invocation; "coordinator" splits the
+# accounts into shards and dispatches each as a "shard" invocation of this handler
+SCAN_ROLE_STANDALONE = 'standalone'
+SCAN_ROLE_COORDINATOR = 'coordinator'
+SCAN_ROLE_SHARD = 'shard'
+
+# Accounts per shard and shards running at once (overridable per coordinator event)
+DEFAULT_SHARD_SIZE = int(os.environ.get('SCAN_SHARD_SIZE', '50'))
+DEFAULT_MAX_INFLIGHT_SHARDS = int(os.environ.get('SCAN_MAX_INFLIGHT_SHARDS', '10'))
+
+# Sharded scan state items expire from the summary table after a week
+SCAN_STATE_TTL_SECONDS = 7 * 24 * 3600
+
+# Checkpoint kind for scans continued across invocations near the Lambda deadline
+POLICY_SCAN_CHECKPOINT = 'policy_scan'
+
+# Per-shard counters summed into the sharded scan state item
+SHARD_METRICS = (
+    'processed_resources',
+    'skipped_resources',
+    'findings_created',
+    'findings_closed',
+    'unchanged_evaluations',
+    'finding_writes_skipped',
+    'failed_units',
+    'accounts_processed'
+)
 
 def scan_policy(event, context):
     """
@@ -19,138 +69,710 @@ def scan_policy(event, context):
     {
         "policy_id": "optional - scan specific policy",
         "service": "optional - scan specific service",
-        "scan_type": "bootstrap|anti-entropy"  # bootstrap=initial/manual, anti-entropy=scheduled
+        "scan_type": "bootstrap|anti-entropy",  # bootstrap=initial/manual, anti-entropy=scheduled
+        "concurrency": "optional - number of account/service units scanned in parallel",
+        "mode": "full|incremental",  # full (default) re-evaluates everything, incremental only the delta
+        "role": "standalone|coordinator",  # coordinator fans accounts out to shard invocations
+        "shard_size": "optional - accounts per shard (coordinator only)",
+        "max_inflight_shards": "optional - shards running at once (coordinator only)"
     }
+    
+    Shard invocations (dispatched by the coordinator) additionally carry
+    "role": "shard", "scan_id", "shard_index" and "accounts".
+    
+    When the invocation nears the Lambda timeout, unfinished units are checkpointed
+    (account, service, LastEvaluatedKey) to the summary table and the scan continues in a
+    new invocation of this handler carrying "scan_id" and "resume": true.
     """
-    # Generate unique scan ID for traceability
-    scan_id = str(uuid.uuid4())
+    role = event.get('role', SCAN_ROLE_STANDALONE)
+    if role == SCAN_ROLE_COORDINATOR:
+        return _coordinate_scan(event, context)
+    is_shard = role == SCAN_ROLE_SHARD
+    is_resume = bool(event.get('resume'))
+    
+    # Generate unique scan ID for traceability (shards and continuations keep the original)
+    scan_id = event.get('scan_id') if (is_shard or is_resume) else str(uuid.uuid4())
     
     # Capture scan start time (milliseconds)
-    scan_start_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    scan_start_ms = _now_ms()
+    deadline = Deadline(context)
+    
+    # Continuations pick up the checkpointed cursor
+    checkpoint_manager = CheckpointManager()
+    checkpoint_id = f"{scan_id}#{event.get('shard_index')}" if is_shard else scan_id
+    checkpoint = None
+    if is_resume:
+        checkpoint = checkpoint_manager.load_checkpoint(POLICY_SCAN_CHECKPOINT, checkpoint_id)
+        if not checkpoint:
+            info(f"[{scan_id}] No checkpoint found for {checkpoint_id}, nothing to resume")
+            return {'statusCode': 200, 'body': "No checkpoint to resume", 'scan_id': scan_id}
+        scan_start_ms = checkpoint['started_ms']
     
     # Get scan parameters
     policy_id = event.get('policy_id')  # Optional: scan specific policy
     service_filter = event.get('service')  # Optional: scan specific service
     scan_type = event.get('scan_type', 'bootstrap')  # Default to bootstrap for safety
+    scan_mode = _resolve_scan_mode(scan_id, event.get('mode'))
     
-    info(f"[{scan_id}] Starting policy scan: policy_id={policy_id or 'all'}, service={service_filter or 'all'}, scan_type={scan_type}")
+    info(f"[{scan_id}] Starting policy scan: policy_id={policy_id or 'all'}, service={service_filter or 'all'}, scan_type={scan_type}, mode={scan_mode}"
+         + (f", shard={event.get('shard_index')}" if is_shard else "")
+         + (f", resuming {len(checkpoint['units'])} units" if checkpoint else ""))
     
     # Get all launched policies
     policy_manager = PolicyManager()
     inventory_manager = InventoryManager()
-    launched_policies = policy_manager.list_launched_policies()
+    launched_policies = _resolve_launched_policies(policy_manager, policy_id, service_filter)
     
-    # Filter by policy_id if specified
-    if policy_id:
-        launched_policies = [p for p in launched_policies if p.policy_id == policy_id]
+    if not launched_policies and not is_shard:
+        info(f"[{scan_id}] No active policies found")
+        return {'statusCode': 200, 'body': "No active policies found", 'scan_id': scan_id}
     
-    # Filter by service if specified
-    if service_filter:
-        filtered_policies = []
-        for p in launched_policies:
-            policy_def = policy_manager.get_policy_definition(p.policy_id)
-            if policy_def and policy_def.service == service_filter:
-                filtered_policies.append(p)
-        launched_policies = filtered_policies
+    # Get customer accounts (shards scan only the accounts they were assigned)
+    if checkpoint:
+        accounts = [{'account_id': account_id} for account_id in checkpoint['accounts']]
+    elif is_shard:
+        accounts = [{'account_id': account_id} for account_id in event.get('accounts', [])]
+    else:
+        accounts = get_customer_accounts()
     
-    # Only process active policies
-    launched_policies = [p for p in launched_policies if p.status == 'active']
+    # Build (account, service) work units - each unit evaluates every launched
+    # policy for that service against the account's inventory partition
+    policies_by_service = {}
+    for launched_policy in launched_policies:
+        policies_by_service.setdefault(launched_policy.service, []).append(launched_policy)
     
-    if not launched_policies:
-        info(f"[{scan_id}] No active policies found")
-        return {'statusCode': 200, 'body': "No active policies found", 'scan_id': scan_id}
+    # Each unit carries the partition LastEvaluatedKey to start from (None = from the beginning)
+    work_units = []
+    if checkpoint:
+        for account_id, service, start_key in checkpoint['units']:
+            if service in policies_by_service:
+                work_units.append((account_id, service, policies_by_service[service], start_key))
+    else:
+        for account in accounts:
+            account_id = account.get('account_id')
+            if not account_id:
+                continue
+            for service, service_policies in policies_by_service.items():
+                work_units.append((account_id, service, service_policies, None))
     
-    # Get customer accounts
-    accounts = get_customer_accounts()
+    # Evaluators persist findings through one buffered writer shared by all workers
+    # Existing finding state is preloaded per AccountService so only transitions are written
+    findings_writer = FindingsWriter()
+    evaluation_context = EvaluationContext(
+        findings_writer=findings_writer,
+        findings_state_loader=findings_writer.findings_manager.get_finding_states_for_account_service
+    )
     
-    processed_count = 0
-    skipped_count = 0
-    findings_created = 0
-    findings_closed = 0
+    concurrency = _resolve_concurrency(event.get('concurrency'))
+    info(f"[{scan_id}] Scanning {len(work_units)} account/service units with concurrency={concurrency}")
     
-    # For each account, evaluate all launched policies
-    for account in accounts:
-        account_id = account.get('account_id')
-        if not account_id:
-            continue
-        
-        for launched_policy in launched_policies:
+    metrics = _new_scan_metrics()
+    writes_skipped = 0
+    if checkpoint:
+        _merge_scan_metrics(metrics, checkpoint['metrics'])
+        writes_skipped = checkpoint['finding_writes_skipped']
+    
+    pending_units = []
+    unit_fingerprints = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                _scan_account_service, scan_id, account_id, service, service_policies,
+                policy_manager, inventory_manager, evaluation_context, scan_start_ms, scan_mode,
+                deadline, start_key
+            ): (account_id, service)
+            for account_id, service, service_policies, start_key in work_units
+        }
+        for future in as_completed(futures):
+            account_id, service = futures[future]
             try:
-                # Create policy evaluator with launched configuration
-                evaluator = policy_manager.create_policy_evaluator(launched_policy.policy_id, launched_policy)
-                
-                # Get policy definition to determine service
-                policy_def = policy_manager.get_policy_definition(launched_policy.policy_id)
-                if not policy_def:
-                    continue
-                
-                # Get resources for this account and service
-                account_service = f"{account_id}_{policy_def.service}"
-                resources = inventory_manager.get_resources_by_account_service(account_service)
-                
-                # Evaluate each resource
-                for resource in resources:
-                    resource_arn = resource['ARN']
-                    config = resource['Configuration']
-                    # DescribeTime should always be present, but use scan_start_ms as acceptable recovery
-                    describe_time_ms = resource.get('DescribeTime', scan_start_ms)
-                    
-                    try:
-                        # Evaluate resource with config and describe time (includes scoping and finding persistence)
-                        result = evaluator.evaluate(resource_arn, config, describe_time_ms)
-                        
-                        if result.get('scoped', True):  # Only count if resource was in scope
-                            if result['compliant']:
-                                findings_closed += 1
-                            else:
-                                findings_created += 1
-                            processed_count += 1
-                        
-                    except Exception as e:
-                        error(f"[{scan_id}] Error evaluating {resource_arn} with policy {launched_policy.policy_id}: {str(e)}\n{traceback.format_exc()}")
-                        skipped_count += 1
-                        
+                unit_metrics, resume_key, fingerprints = future.result()
+                _merge_scan_metrics(metrics, unit_metrics)
+                unit_fingerprints.append((account_id, service, fingerprints))
+                if resume_key is not False:
+                    pending_units.append([account_id, service, resume_key])
             except Exception as e:
-                error(f"[{scan_id}] Error creating evaluator for policy {launched_policy.policy_id}: {str(e)}\n{traceback.format_exc()}")
-                skipped_count += 1
+                # Counted rather than re-queued: a unit that keeps raising would otherwise
+                # continue the scan forever
+                error(f"[{scan_id}] Error scanning {account_id}_{service}: {str(e)}\n{traceback.format_exc()}")
+                metrics['failed_units'] += 1
+    
+    # Flush any buffered finding writes before reporting (or checkpointing)
+    try:
+        write_stats = findings_writer.flush()
+        unwritten = set()
+    except FindingsFlushError as e:
+        write_stats = e.stats
+        unwritten = e.failed_arns
+    writes_skipped += evaluation_context.stats['writes_skipped']
+    info(f"[{scan_id}] Finding writes: {write_stats}, skipped (no state change): {evaluation_context.stats['writes_skipped']}")
+    
+    # Fingerprints are recorded only once the findings they vouch for are written
+    metrics['failed_units'] += _save_evaluation_fingerprints(
+        scan_id, inventory_manager, unit_fingerprints, unwritten, concurrency
+    )
+    
+    if pending_units:
+        return _checkpoint_and_continue(scan_id, checkpoint_id, event, context, checkpoint_manager, {
+            'accounts': [a['account_id'] for a in accounts if a.get('account_id')],
+            'units': pending_units,
+            'metrics': metrics,
+            'finding_writes_skipped': writes_skipped,
+            'started_ms': scan_start_ms
+        })
+    if checkpoint:
+        checkpoint_manager.delete_checkpoint(POLICY_SCAN_CHECKPOINT, checkpoint_id)
+    
+    processed_count = metrics['processed_count']
+    skipped_count = metrics['skipped_count']
+    findings_created = metrics['findings_created']
+    findings_closed = metrics['findings_closed']
+    unchanged_count = metrics['unchanged_count']
+    failed_units = metrics['failed_units']
     
     # Calculate scan duration
-    scan_end_ms = int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+    scan_end_ms = _now_ms()
     scan_duration_ms = scan_end_ms - scan_start_ms
     
-    # Only save drift metrics for anti-entropy scans (not bootstrap/manual)
-    if scan_type == 'anti-entropy':
-        try:
-            summary_table = get_summary_table()
-            summary_table.put_item(Item={
-                'Type': 'last_policy_scan',
-                'scan_id': scan_id,
-                'timestamp_ms': scan_end_ms,
-                'duration_ms': scan_duration_ms,
-                'processed_resources': processed_count,
-                'skipped_resources': skipped_count,
-                'findings_created': findings_created,
-                'findings_closed': findings_closed,
-                'policies_evaluated': len(launched_policies),
-                'accounts_processed': len(accounts),
-                'scan_type': scan_type
-            })
-            info(f"[{scan_id}] Saved policy scan metrics (anti-entropy): {processed_count} resources processed in {scan_duration_ms}ms")
-        except Exception as e:
-            error(f"[{scan_id}] Error saving scan metrics: {str(e)}\n{traceback.format_exc()}")
+    result_metrics = {
+        'processed_resources': processed_count,
+        'skipped_resources': skipped_count,
+        'findings_created': findings_created,
+        'findings_closed': findings_closed,
+        'unchanged_evaluations': unchanged_count,
+        'finding_writes_skipped': writes_skipped,
+        'failed_units': failed_units,
+        'accounts_processed': len(accounts)
+    }
+    
+    if is_shard:
+        # Record this shard's metrics; the last shard to finish writes the aggregate
+        _complete_shard(scan_id, int(event.get('shard_index', 0)), result_metrics, context)
+    elif scan_type == 'anti-entropy':
+        # Only save drift metrics for anti-entropy scans (not bootstrap/manual)
+        _save_scan_summary(scan_id, {
+            'timestamp_ms': scan_end_ms,
+            'duration_ms': scan_duration_ms,
+            **result_metrics,
+            'policies_evaluated': len(launched_policies),
+            'concurrency': concurrency,
+            'scan_mode': scan_mode,
+            'scan_type': scan_type
+        })
     else:
         info(f"[{scan_id}] Skipping drift metrics for {scan_type} scan: {processed_count} resources processed in {scan_duration_ms}ms")
     
+    body = {
+        'scan_id': scan_id,
+        'processed_resources': processed_count,
+        'skipped_resources': skipped_count,
+        'findings_created': findings_created,
+        'findings_closed': findings_closed,
+        'policies_evaluated': len(launched_policies),
+        'accounts_processed': len(accounts),
+        'concurrency': concurrency,
+        'finding_writes': write_stats,
+        'finding_writes_skipped': writes_skipped,
+        'unchanged_evaluations': unchanged_count,
+        'failed_units': failed_units,
+        'scan_mode': scan_mode,
+        'scan_duration_ms': scan_duration_ms
+    }
+    if is_shard:
+        body['shard_index'] = event.get('shard_index')
+    
     return {
         'statusCode': 200,
+        'body': body
+    }
+
+
+def _checkpoint_and_continue(scan_id: str, checkpoint_id: str, event: Dict, context,
+                             checkpoint_manager: CheckpointManager, cursor: Dict) -> Dict:
+    """Persist the scan cursor and re-invoke this handler to continue the scan"""
+    invocations = checkpoint_manager.save_checkpoint(POLICY_SCAN_CHECKPOINT, checkpoint_id, cursor)
+    info(f"[{scan_id}] Approaching Lambda timeout - checkpointed {len(cursor['units'])} pending units "
+         f"(invocation {invocations}), continuing in a new invocation")
+    
+    dispatcher = get_shard_dispatcher(context, scan_policy)
+    dispatcher.dispatch({**event, 'scan_id': scan_id, 'resume': True})
+    if getattr(context, 'shard_dispatcher', None) is None:
+        dispatcher.drain()
+    
+    return {
+        'statusCode': 202,
         'body': {
             'scan_id': scan_id,
-            'processed_resources': processed_count,
-            'skipped_resources': skipped_count,
-            'findings_created': findings_created,
-            'findings_closed': findings_closed,
-            'policies_evaluated': len(launched_policies),
-            'accounts_processed': len(accounts),
-            'scan_duration_ms': scan_duration_ms
+            'status': 'continued',
+            'pending_units': len(cursor['units']),
+            'processed_resources': cursor['metrics']['processed_count'],
+            'invocations': invocations
+        }
+    }
+
+
+# ============================================================================
+# SHARDED SCANS
+# ============================================================================
+
+def _coordinate_scan(event: Dict, context) -> Dict:
+    """
+    Split customer accounts into shards and dispatch them as shard invocations.
+    
+    Scan state (shard plan, dispatch cursor, summed metrics) lives in the summary table under
+    "policy_scan#<scan_id>". The coordinator dispatches up to max_inflight_shards shards; each
+    finishing shard dispatches the next pending one and the last to finish writes the
+    aggregated "last_policy_scan" item, so the coordinator does not wait for the scan.
+    Shards whose invocation fails for good are recorded by handle_shard_failure, which
+    keeps the dispatch chain going in their place.
+    """
+    scan_id = str(uuid.uuid4())
+    scan_start_ms = _now_ms()
+    scan_type = event.get('scan_type', 'bootstrap')
+    scan_mode = _resolve_scan_mode(scan_id, event.get('mode'))
+    shard_size = _resolve_positive_int(event.get('shard_size'), DEFAULT_SHARD_SIZE, 'shard_size')
+    max_inflight = _resolve_positive_int(event.get('max_inflight_shards'), DEFAULT_MAX_INFLIGHT_SHARDS,
+                                         'max_inflight_shards')
+    
+    policy_manager = PolicyManager()
+    launched_policies = _resolve_launched_policies(policy_manager, event.get('policy_id'), event.get('service'))
+    if not launched_policies:
+        info(f"[{scan_id}] No active policies found")
+        return {'statusCode': 200, 'body': "No active policies found", 'scan_id': scan_id}
+    
+    account_ids = [a['account_id'] for a in get_customer_accounts() if a.get('account_id')]
+    shards = [account_ids[i:i + shard_size] for i in range(0, len(account_ids), shard_size)]
+    if not shards:
+        info(f"[{scan_id}] No customer accounts to scan")
+        return {'statusCode': 200, 'body': "No customer accounts found", 'scan_id': scan_id}
+    
+    initial = min(max_inflight, len(shards))
+    
+    # Parameters every shard invocation inherits from the coordinator event
+    shard_params = {'scan_type': scan_type, 'mode': scan_mode}
+    for key in ('policy_id', 'service', 'concurrency'):
+        if event.get(key) is not None:
+            shard_params[key] = event[key]
+    
+    state = {
+        'Type': _scan_state_key(scan_id),
+        'scan_id': scan_id,
+        'status': 'running',
+        'started_ms': scan_start_ms,
+        'shards': shards,
+        'shard_count': len(shards),
+        'next_shard': initial,
+        'shard_params': shard_params,
+        'policies_evaluated': len(launched_policies),
+        'expires_at': int(time.time()) + SCAN_STATE_TTL_SECONDS
+    }
+    for metric in SHARD_METRICS:
+        state[metric] = 0
+    get_summary_table().put_item(Item=state)
+    
+    info(f"[{scan_id}] Coordinating scan of {len(account_ids)} accounts in {len(shards)} shards "
+         f"(shard_size={shard_size}, max_inflight_shards={max_inflight})")
+    
+    dispatcher = get_shard_dispatcher(context, scan_policy)
+    for shard_index in range(initial):
+        dispatcher.dispatch(_shard_event(scan_id, shard_index, shards[shard_index], shard_params))
+    dispatcher.drain()
+    
+    return {
+        'statusCode': 200,
+        'body': {
+            'scan_id': scan_id,
+            'role': SCAN_ROLE_COORDINATOR,
+            'accounts': len(account_ids),
+            'shard_count': len(shards),
+            'shards_dispatched': initial,
+            'shard_size': shard_size,
+            'max_inflight_shards': max_inflight,
+            'scan_mode': scan_mode
         }
     }
+
+
+def handle_shard_failure(event, context):
+    """
+    On-failure destination of the scanner's asynchronous invocations.
+    
+    A shard invocation that fails on every retry (error or timeout) never reaches
+    _complete_shard, which would leave the scan "running" with one fewer shard in flight
+    and no summary. The failed shard is recorded as completed-with-failure instead, so the
+    next pending shard is dispatched and the last shard still finalizes the scan.
+    
+    Event format (Lambda destination record):
+    {
+        "requestContext": {"functionArn": "...", "condition": "RetriesExhausted", ...},
+        "requestPayload": <the failed scanner event>,
+        "responsePayload": {"errorMessage": "...", ...}
+    }
+    """
+    request_context = event.get('requestContext') or {}
+    request = event.get('requestPayload') or {}
+    response = event.get('responsePayload') or {}
+    scan_id = request.get('scan_id')
+    condition = request_context.get('condition')
+    reason = response.get('errorMessage') if isinstance(response, dict) else None
+    
+    if request.get('role') != SCAN_ROLE_SHARD or not scan_id:
+        error(f"[{scan_id}] Scanner invocation failed ({condition}): {reason}")
+        return {'statusCode': 200, 'body': "Not a shard invocation"}
+    
+    shard_index = int(request.get('shard_index', 0))
+    error(f"[{scan_id}] Shard {shard_index} failed ({condition}): {reason}")
+    
+    # Next shards are dispatched to the scanner that failed, not to this handler
+    scanner_context = SimpleNamespace(
+        function_name=request_context.get('functionArn'),
+        shard_dispatcher=getattr(context, 'shard_dispatcher', None)
+    )
+    _complete_shard(scan_id, shard_index, {}, scanner_context, failed=True)
+    return {'statusCode': 200, 'body': {'scan_id': scan_id, 'failed_shard': shard_index}}
+
+
+def _complete_shard(scan_id: str, shard_index: int, metrics: Dict[str, int], context,
+                    failed: bool = False) -> None:
+    """
+    Add a finished shard's metrics to the scan state, dispatch the next pending shard and,
+    if this was the last shard, write the aggregated scan summary.
+    
+    The completed-shards set makes completion idempotent, so a retried shard
+    invocation is not counted twice. Failed shards are also added to failed_shards.
+    """
+    summary_table = get_summary_table()
+    add_metrics = ', '.join(f"{metric} :{metric}" for metric in SHARD_METRICS)
+    values = {f":{metric}": metrics.get(metric, 0) for metric in SHARD_METRICS}
+    values.update({':shard': {shard_index}, ':index': shard_index, ':one': 1})
+    add_failed = ', failed_shards :shard' if failed else ''
+    
+    try:
+        response = summary_table.update_item(
+            Key={'Type': _scan_state_key(scan_id)},
+            UpdateExpression=f"ADD completed_shards :shard, next_shard :one, {add_metrics}{add_failed}",
+            ConditionExpression='attribute_exists(#type) AND NOT contains(completed_shards, :index)',
+            ExpressionAttributeNames={'#type': 'Type'},
+            ExpressionAttributeValues=values,
+            ReturnValues='ALL_NEW'
+        )
+    except summary_table.meta.client.exceptions.ConditionalCheckFailedException:
+        info(f"[{scan_id}] Shard {shard_index} already recorded (or scan state missing), skipping")
+        return
+    
+    state = response['Attributes']
+    shard_count = int(state['shard_count'])
+    
+    # Each completion claims the next pending shard, keeping max_inflight_shards running
+    next_index = int(state['next_shard']) - 1
+    if next_index < shard_count:
+        dispatcher = get_shard_dispatcher(context, scan_policy)
+        dispatcher.dispatch(_shard_event(scan_id, next_index, state['shards'][next_index], state['shard_params']))
+    
+    completed = len(state['completed_shards'])
+    info(f"[{scan_id}] Shard {shard_index} {'failed' if failed else 'complete'} ({completed}/{shard_count})")
+    if completed == shard_count:
+        _finalize_sharded_scan(scan_id, state)
+
+
+def _finalize_sharded_scan(scan_id: str, state: Dict) -> None:
+    """Write aggregated shard metrics to the scan summary and mark the scan complete (or partial)"""
+    scan_end_ms = _now_ms()
+    duration_ms = scan_end_ms - int(state['started_ms'])
+    shard_params = state.get('shard_params', {})
+    scan_type = shard_params.get('scan_type', 'bootstrap')
+    failed_shards = len(state.get('failed_shards', ()))
+    if failed_shards:
+        error(f"[{scan_id}] {failed_shards}/{int(state['shard_count'])} shards failed, scan is partial")
+    
+    if scan_type == 'anti-entropy':
+        _save_scan_summary(scan_id, {
+            'timestamp_ms': scan_end_ms,
+            'duration_ms': duration_ms,
+            **{metric: int(state.get(metric, 0)) for metric in SHARD_METRICS},
+            'policies_evaluated': int(state.get('policies_evaluated', 0)),
+            'shard_count': int(state['shard_count']),
+            'failed_shards': failed_shards,
+            'scan_mode': shard_params.get('mode', SCAN_MODE_FULL),
+            'scan_type': scan_type
+        })
+    else:
+        info(f"[{scan_id}] Skipping drift metrics for {scan_type} scan: "
+             f"{int(state.get('processed_resources', 0))} resources processed in {duration_ms}ms")
+    
+    try:
+        get_summary_table().update_item(
+            Key={'Type': _scan_state_key(scan_id)},
+            UpdateExpression='SET #status = :complete, completed_ms = :now',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':complete': 'partial' if failed_shards else 'complete', ':now': scan_end_ms}
+        )
+    except Exception as e:
+        error(f"[{scan_id}] Error marking sharded scan complete: {str(e)}")
+
+
+def _shard_event(scan_id: str, shard_index: int, account_ids: List[str], shard_params: Dict) -> Dict:
+    """Build the invocation event for one shard (parameters read back from DynamoDB hold Decimals)"""
+    return {
+        **{key: int(value) if isinstance(value, Decimal) else value for key, value in shard_params.items()},
+        'role': SCAN_ROLE_SHARD,
+        'scan_id': scan_id,
+        'shard_index': int(shard_index),
+        'accounts': list(account_ids)
+    }
+
+
+def _scan_state_key(scan_id: str) -> str:
+    """Summary table key of a sharded scan's state item"""
+    return f"policy_scan#{scan_id}"
+
+
+def _save_scan_summary(scan_id: str, fields: Dict) -> None:
+    """Persist scan metrics to the last_policy_scan summary item (anti-entropy scans)"""
+    try:
+        summary_table = get_summary_table()
+        summary_table.put_item(Item={
+            'Type': 'last_policy_scan',
+            'scan_id': scan_id,
+            **fields
+        })
+        info(f"[{scan_id}] Saved policy scan metrics (anti-entropy): {fields.get('processed_resources')} resources processed in {fields.get('duration_ms')}ms")
+    except Exception as e:
+        error(f"[{scan_id}] Error saving scan metrics: {str(e)}\n{traceback.format_exc()}")
+
+
+# ============================================================================
+# SCAN UNITS
+# ============================================================================
+
+def _findings_account_services(resources: List[Dict], service: str) -> Set[str]:
+    """
+    AccountService partitions that findings for these resources are written under.
+    Evaluators key findings by the account in the resource ARN, which is empty for S3
+    bucket ARNs, so S3 findings share the "_s3" partition rather than the unit's partition.
+    """
+    return {f"{get_account_from_arn_or_unknown(resource['ARN'])}_{service}" for resource in resources}
+
+
+def _scan_account_service(scan_id: str, account_id: str, service: str, launched_policies: List,
+                          policy_manager: PolicyManager, inventory_manager: InventoryManager,
+                          evaluation_context: EvaluationContext, scan_start_ms: int,
+                          scan_mode: str = SCAN_MODE_FULL, deadline: Optional[Deadline] = None,
+                          start_key: Optional[Dict] = None) -> Tuple[Dict[str, int], object, Dict[str, Optional[Dict[str, str]]]]:
+    """
+    Evaluate all launched policies for one service against one account's inventory.
+    Runs as a single work unit on the scan worker pool.
+    
+    The AccountService partition is streamed once and each page is passed to every one of the
+    service's evaluators as a batch (evaluate_batch), so read cost scales with resources, not
+    resources x policies, and per-resource evaluation overhead is amortized over the page.
+    
+    Each successful evaluation yields a fingerprint (config digest + launched policy version)
+    for the inventory row. In incremental mode pairs with an unchanged fingerprint are skipped.
+    Full mode re-evaluates everything (anti-entropy) and refreshes the fingerprints.
+    Fingerprints are returned rather than written: the caller records them once the
+    findings have been flushed (see _save_evaluation_fingerprints).
+    
+    The deadline is checked before starting and between pages; a unit that stops early
+    reports the LastEvaluatedKey to resume from.
+    
+    Returns:
+        (metrics, resume_key, fingerprints) - metrics for this unit (see _new_scan_metrics);
+        False when the unit finished, otherwise the start key for resuming (None = from the
+        beginning); and ARN -> updated fingerprints (None when unchanged) for every resource read
+    """
+    metrics = _new_scan_metrics()
+    account_service = f"{account_id}_{service}"
+    fingerprints = {}
+    
+    if deadline and deadline.near():
+        return metrics, start_key, fingerprints
+    
+    # Create policy evaluators with launched configuration, paired with the launched policy version
+    evaluators = []
+    for launched_policy in launched_policies:
+        try:
+            evaluators.append((policy_manager.create_policy_evaluator(
+                launched_policy.policy_id, launched_policy, context=evaluation_context
+            ), policy_version(launched_policy)))
+        except Exception as e:
+            error(f"[{scan_id}] Error creating evaluator for policy {launched_policy.policy_id}: {str(e)}\n{traceback.format_exc()}")
+            metrics['skipped_count'] += 1
+    
+    if not evaluators:
+        return metrics, False, fingerprints
+    
+    # Stream resources for this account and service, one page at a time
+    for resources, last_key in inventory_manager.iter_resource_pages(account_service, exclusive_start_key=start_key):
+        # Load existing finding state (once per scan) for the partitions this page's findings live in
+        for findings_partition in _findings_account_services(resources, service):
+            evaluation_context.preload_findings(findings_partition)
+        
+        # Rows written before digests were stored fall back to hashing the config here
+        digests = [resource.get('ConfigDigest') or config_digest(resource['Configuration']) for resource in resources]
+        stored = [resource.get('EvaluationFingerprints') or {} for resource in resources]
+        updated = [dict(fingerprints) for fingerprints in stored]
+        
+        for evaluator, version in evaluators:
+            # Batch the page's resources whose fingerprint changed (all of them in full mode)
+            batch = []
+            batch_indexes = []
+            batch_fingerprints = []
+            for i, resource in enumerate(resources):
+                fingerprint = evaluation_fingerprint(digests[i], version)
+                if scan_mode == SCAN_MODE_INCREMENTAL and stored[i].get(evaluator.policy_id) == fingerprint:
+                    metrics['unchanged_count'] += 1
+                    continue
+                batch.append(resource)
+                batch_indexes.append(i)
+                batch_fingerprints.append(fingerprint)
+            
+            if not batch:
+                continue
+            
+            try:
+                # Evaluate the batch (includes scoping and finding persistence);
+                # DescribeTime should always be present, but scan_start_ms is an acceptable recovery
+                results = evaluator.evaluate_batch(batch, scan_start_ms)
+            except Exception as e:
+                error(f"[{scan_id}] Error evaluating {len(batch)} resources in {account_service} with policy {evaluator.policy_id}: {str(e)}\n{traceback.format_exc()}")
+                metrics['skipped_count'] += len(batch)
+                continue
+            
+            for i, fingerprint, result in zip(batch_indexes, batch_fingerprints, results):
+                if 'error' in result:
+                    error(f"[{scan_id}] Error evaluating {resources[i]['ARN']} with policy {evaluator.policy_id}: {result['error']}")
+                    metrics['skipped_count'] += 1
+                    continue
+                
+                if result.get('scoped', True):  # Only count if resource was in scope
+                    if result['compliant']:
+                        metrics['findings_closed'] += 1
+                    else:
+                        metrics['findings_created'] += 1
+                    metrics['processed_count'] += 1
+                
+                updated[i][evaluator.policy_id] = fingerprint
+        
+        for i, resource in enumerate(resources):
+            fingerprints[resource['ARN']] = updated[i] if updated[i] != stored[i] else None
+        
+        if last_key and deadline and deadline.near():
+            return metrics, last_key, fingerprints
+    
+    return metrics, False, fingerprints
+
+
+def _save_evaluation_fingerprints(scan_id: str, inventory_manager: InventoryManager,
+                                  unit_fingerprints: List[Tuple[str, str, Dict[str, Optional[Dict[str, str]]]]],
+                                  unwritten: Set[str], concurrency: int) -> int:
+    """
+    Record evaluation fingerprints for units whose findings were all written.
+    
+    A unit with any unwritten finding fails as a whole: none of its fingerprints are
+    recorded, so the next incremental scan re-evaluates (and rewrites) its resources.
+    
+    Returns:
+        Number of failed units
+    """
+    failed_units = 0
+    writes = []
+    for account_id, service, fingerprints in unit_fingerprints:
+        account_service = f"{account_id}_{service}"
+        failed = unwritten.intersection(fingerprints)
+        if failed:
+            error(f"[{scan_id}] {len(failed)} resources in {account_service} have unwritten findings, "
+                  f"failing the unit without recording fingerprints")
+            failed_units += 1
+            continue
+        writes.extend((account_service, arn, updated) for arn, updated in fingerprints.items() if updated is not None)
+    
+    def save(write):
+        account_service, arn, updated = write
+        try:
+            inventory_manager.set_evaluation_fingerprints(account_service, arn, updated)
+        except Exception as e:
+            # Missing fingerprints only cost a re-evaluation on the next incremental scan
+            error(f"[{scan_id}] Error saving evaluation fingerprints for {arn}: {str(e)}")
+    
+    if writes:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(writes)))) as executor:
+            list(executor.map(save, writes))
+    return failed_units
+
+
+def _resolve_launched_policies(policy_manager: PolicyManager, policy_id: Optional[str],
+                               service_filter: Optional[str]) -> List:
+    """Active launched policies, optionally narrowed to one policy and/or service"""
+    launched_policies = policy_manager.list_launched_policies()
+    
+    # Filter by policy_id if specified
+    if policy_id:
+        launched_policies = [p for p in launched_policies if p.policy_id == policy_id]
+    
+    # Filter by service if specified
+    if service_filter:
+        filtered_policies = []
+        for p in launched_policies:
+            policy_def = policy_manager.get_policy_definition(p.policy_id)
+            if policy_def and policy_def.service == service_filter:
+                filtered_policies.append(p)
+        launched_policies = filtered_policies
+    
+    # Only process active policies
+    return [p for p in launched_policies if p.status == 'active']
+
+
+def _resolve_scan_mode(scan_id: str, requested) -> str:
+    """Resolve scan mode from event parameter, falling back to full"""
+    if requested is None:
+        return SCAN_MODE_FULL
+    if requested not in SCAN_MODES:
+        error(f"[{scan_id}] Invalid scan mode {requested!r}, using {SCAN_MODE_FULL}")
+        return SCAN_MODE_FULL
+    return requested
+
+
+def _resolve_positive_int(requested, default: int, name: str) -> int:
+    """Resolve a positive integer event parameter, falling back to the default"""
+    if requested is None:
+        return max(1, default)
+    try:
+        return max(1, int(requested))
+    except (TypeError, ValueError):
+        error(f"Invalid {name} value {requested!r}, using default {default}")
+        return max(1, default)
+
+
+def _now_ms() -> int:
+    """Current UTC time in milliseconds"""
+    return int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+
+
+def _resolve_concurrency(requested) -> int:
+    """Resolve worker pool width from event parameter, falling back to the default"""
+    if requested is None:
+        return max(1, min(DEFAULT_SCAN_CONCURRENCY, MAX_SCAN_CONCURRENCY))
+    try:
+        return max(1, min(int(requested), MAX_SCAN_CONCURRENCY))
+    except (TypeError, ValueError):
+        error(f"Invalid concurrency value {requested!r}, using default {DEFAULT_SCAN_CONCURRENCY}")
+        return max(1, min(DEFAULT_SCAN_CONCURRENCY, MAX_SCAN_CONCURRENCY))
+
+
+def _new_scan_metrics() -> Dict[str, int]:
+    """Empty scan metrics counters"""
+    return {
+        'processed_count': 0,
+        'skipped_count': 0,
+        'findings_created': 0,
+        'findings_closed': 0,
+        'unchanged_count': 0,
+        'failed_units': 0
+    }
+
+
+def _merge_scan_metrics(total: Dict[str, int], unit: Dict[str, int]) -> None:
+    """Add unit metrics into running totals (in place)"""
+    for key, value in unit.items():
+        total[key] = total.get(key, 0) + value
@@ -0,0 +1,102 @@
+"""
+Shard dispatchers for fan-out policy scans.
+The coordinator, finishing shards and checkpointed scans hand shard/continuation events to a
+dispatcher, which either invokes the scanner Lambda asynchronously or (locally/in tests)
+runs the event in-process.
+"""
+import os
+import json
+import boto3
+from collections import deque
+from typing import Callable, Dict, Optional
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.logger import debug, info
+
+# Scanner function invoked for each shard when the Lambda context does not name one
+DEFAULT_SCANNER_FUNCTION = 'qrie_policy_scanner'
+
+
+class LambdaShardDispatcher:
+    """Dispatches each shard as an asynchronous invocation of the scanner Lambda"""
+
+    def __init__(self, function_name: str = DEFAULT_SCANNER_FUNCTION, lambda_client=None):
+        self.function_name = function_name
+        self.lambda_client = lambda_client or boto3.client('lambda')
+
+    def dispatch(self, event: Dict) -> None:
+        """Invoke the scanner asynchronously with a shard event"""
+        self.lambda_client.invoke(
+            FunctionName=self.function_name,
+            InvocationType='Event',  # Async invocation
+            Payload=json.dumps(event)
+        )
+        debug(f"[{event.get('scan_id')}] Dispatched shard {event.get('shard_index')} to {self.function_name}")
+
+    def drain(self) -> None:
+        """Nothing to drain - invocations run on their own"""
+
+
+class InProcessShardDispatcher:
+    """
+    Runs shard events in the current process (local runs and tests).
+
+    Dispatched events are queued and executed by drain(), including shards dispatched
+    by other shards while draining, so the flow runs to completion without recursion.
+    """
+
+    def __init__(self, handler: Callable[[Dict, object], Dict]):
+        self.handler = handler
+        self.dispatched = []
+        self._queue = deque()
+        self._draining = False
+
+    def dispatch(self, event: Dict) -> None:
+        """Queue a shard event"""
+        self.dispatched.append(event)
+        self._queue.append(event)
+
+    def drain(self) -> None:
+        """Run queued shard events until none remain"""
+        if self._draining:
+            return
+        self._draining = True
+        try:
+            while self._queue:
+                event = self._queue.popleft()
+                info(f"[{event.get('scan_id')}] Running shard {event.get('shard_index')} in-process")
+                self.handler(event, InProcessContext(self))
+        finally:
+            self._draining = False
+
+
+class InProcessContext:
+    """Minimal Lambda context stand-in handed to in-process shards"""
+
+    function_name = None
+
+    def __init__(self, shard_dispatcher: InProcessShardDispatcher):
+        self.shard_dispatcher = shard_dispatcher
+
+
+def get_shard_dispatcher(context, handler: Callable[[Dict, object], Dict]):
+    """
+    Resolve the dispatcher for a scanner invocation.
+
+    Args:
+        context: Lambda context (None for local runs)
+        handler: Scanner entry point used when running in-process
+
+    Returns:
+        Dispatcher carried by an in-process context, a Lambda dispatcher targeting the
+        running function, or a new in-process dispatcher when there is no Lambda context
+    """
+    dispatcher: Optional[object] = getattr(context, 'shard_dispatcher', None)
+    if dispatcher is not None:
+        return dispatcher
+
+    function_name = getattr(context, 'function_name', None)
+    if function_name:
+        return LambdaShardDispatcher(function_name)
+
+    return InProcessShardDispatcher(handler)
@@ -9,6 +9,18 @@ To onboard a new service:
    - extract_arn_from_event(detail: dict) -> Optional[str]
    - describe_resource(arn: str, account_id: str, client=None) -> dict
    - list_resources(account_id: str, client=None) -> List[Dict]
+   Optionally declare EVENT_SECTIONS (eventName -> config sections the event can change)
+   and accept describe_resource(..., sections=...) so events refresh only those sections.
+   describe_resource(..., stored_config=...) receives the stored configuration when one was
+   read (only if the service accepts it and the caller has it).
+   Declare DELETE_EVENTS (eventNames that delete the resource) for the deletion fast path.
+   Define extract_arns_from_event(detail) -> List[str] when one event can name several
+   resources (e.g. TerminateInstances); each ARN is then processed as its own resource.
+   Declare TRACKED_EVENTS (other eventNames that can change evaluated state) to drop all
+   remaining events before any lookup; IGNORED_EVENTS are always dropped (see EventFilter)
+   Declare REGIONAL = True for services inventoried per region; list_resources then
+   accepts region=... and is called once per region of the account (global services such
+   as IAM and S3 are listed in a single pass)
 2. Add service name to SUPPORTED_SERVICES list below
 3. Add EventBridge rules in tools/onboarding/eventbridge-rules.yaml
 4. Create policy evaluators in lambda/policies/
@@ -19,12 +31,57 @@ To onboard a new service:
 import importlib
 import os
 import glob
-from typing import Optional, Dict, List, Callable
+from typing import Optional, Dict, Iterable, List, Callable, Set
 
 # Supported services for inventory and policy evaluation
 # Each service must have a corresponding <service>_support.py module
 SUPPORTED_SERVICES = ["s3", "ec2", "iam"]
 
+# Read-only API calls never change evaluated state (dropped for every service)
+READ_ONLY_EVENT_PREFIXES = ('Get', 'List', 'Describe', 'Head')
+
+
+class EventFilter:
+    """
+    Compiled allow/deny table of the CloudTrail eventNames that can change a service's
+    evaluated state. Decisions are memoized per eventName, so each lookup is O(1).
+    
+    Denied: read-only calls, IGNORED_EVENTS and EVENT_SECTIONS entries mapped to no section.
+    Allowed: DELETE_EVENTS, EVENT_SECTIONS entries with sections and TRACKED_EVENTS - or,
+    when the service declares no TRACKED_EVENTS, every event that is not denied.
+    """
+    
+    def __init__(self, allowed: Optional[Iterable[str]], denied: Iterable[str]):
+        self.allowed = frozenset(allowed) if allowed is not None else None
+        self.denied = frozenset(denied)
+        self._decisions: Dict[str, bool] = {}
+    
+    @classmethod
+    def for_module(cls, module) -> 'EventFilter':
+        """Compile the filter from a service support module's event tables"""
+        event_sections = getattr(module, 'EVENT_SECTIONS', None) or {}
+        denied = set(getattr(module, 'IGNORED_EVENTS', ()))
+        denied.update(name for name, sections in event_sections.items() if not sections)
+        
+        tracked = getattr(module, 'TRACKED_EVENTS', None)
+        allowed = None
+        if tracked is not None:
+            allowed = set(tracked) | set(getattr(module, 'DELETE_EVENTS', ()))
+            allowed.update(name for name, sections in event_sections.items() if sections)
+        return cls(allowed, denied)
+    
+    def accepts(self, event_name: Optional[str]) -> bool:
+        """Whether an event can change evaluated state (events without a name are kept)"""
+        if not event_name:
+            return True
+        decision = self._decisions.get(event_name)
+        if decision is None:
+            decision = (event_name not in self.denied
+                        and not event_name.startswith(READ_ONLY_EVENT_PREFIXES)
+                        and (self.allowed is None or event_name in self.allowed))
+            self._decisions[event_name] = decision
+        return decision
+
 
 class ServiceRegistry:
     """
@@ -33,6 +90,7 @@ class ServiceRegistry:
     """
     
     _modules = {}
+    _event_filters: Dict[str, EventFilter] = {}
     
     @classmethod
     def _get_module(cls, service: str):
@@ -65,7 +123,28 @@ class ServiceRegistry:
         return module.extract_arn_from_event(detail)
     
     @classmethod
-    def describe_resource(cls, service: str, arn: str, account_id: str, client=None) -> dict:
+    def extract_arns_from_event(cls, service: str, detail: dict) -> List[str]:
+        """
+        Extract every resource ARN a CloudTrail event refers to.
+        
+        Args:
+            service: Service name (s3, ec2, iam)
+            detail: CloudTrail event detail dict
+            
+        Returns:
+            Resource ARNs (empty if none can be extracted); services without
+            extract_arns_from_event yield at most their single extracted ARN
+        """
+        module = cls._get_module(service)
+        if hasattr(module, 'extract_arns_from_event'):
+            return module.extract_arns_from_event(detail)
+        arn = module.extract_arn_from_event(detail)
+        return [arn] if arn else []
+    
+    @classmethod
+    def describe_resource(cls, service: str, arn: str, account_id: str, client=None,
+                          sections: Optional[Iterable[str]] = None,
+                          stored_config: Optional[dict] = None) -> dict:
         """
         Describe resource configuration.
         
@@ -74,15 +153,94 @@ class ServiceRegistry:
             arn: Resource ARN
             account_id: AWS account ID
             client: Optional pre-configured AWS client
+            sections: Optional config sections to describe (see get_event_sections);
+                      None describes the full configuration
+            stored_config: Configuration stored in inventory, for services that take routing
+                           hints from it (e.g. the S3 bucket region)
             
         Returns:
-            Resource configuration dict
+            Resource configuration dict (only the requested sections for a partial describe)
         """
         module = cls._get_module(service)
-        return module.describe_resource(arn, account_id, client)
+        kwargs = {}
+        if sections is not None:
+            kwargs['sections'] = sections
+        if stored_config is not None:
+            kwargs['stored_config'] = stored_config
+        return module.describe_resource(arn, account_id, client, **kwargs)
+    
+    @classmethod
+    def get_event_sections(cls, service: str, event_names: Iterable[str]) -> Optional[Set[str]]:
+        """
+        Config sections that a set of CloudTrail events can change.
+        
+        Args:
+            service: Service name (s3, ec2, iam)
+            event_names: CloudTrail eventNames
+            
+        Returns:
+            Union of the sections affected by the events (empty if none touch inventoried
+            config), or None if any event - or the service - needs a full describe
+        """
+        event_sections = getattr(cls._get_module(service), 'EVENT_SECTIONS', None)
+        event_names = list(event_names)
+        if not event_sections or not event_names:
+            return None
+        
+        sections = set()
+        for event_name in event_names:
+            if event_name not in event_sections:
+                return None
+            sections.update(event_sections[event_name])
+        return sections
     
     @classmethod
-    def list_resources(cls, service: str, account_id: str, client=None) -> List[Dict]:
+    def is_delete_event(cls, service: str, event_name: Optional[str]) -> bool:
+        """
+        Whether a CloudTrail event deletes its resource.
+        
+        Args:
+            service: Service name (s3, ec2, iam)
+            event_name: CloudTrail eventName
+            
+        Returns:
+            True if the event is in the service's DELETE_EVENTS
+        """
+        return event_name in getattr(cls._get_module(service), 'DELETE_EVENTS', ())
+    
+    @classmethod
+    def accepts_event(cls, service: str, event_name: Optional[str]) -> bool:
+        """
+        Whether a CloudTrail event can change the service's evaluated state.
+        
+        Args:
+            service: Service name (s3, ec2, iam)
+            event_name: CloudTrail eventName
+            
+        Returns:
+            False if the service's compiled EventFilter drops the event
+        """
+        event_filter = cls._event_filters.get(service)
+        if event_filter is None:
+            event_filter = cls._event_filters[service] = EventFilter.for_module(cls._get_module(service))
+        return event_filter.accepts(event_name)
+    
+    @classmethod
+    def is_regional(cls, service: str) -> bool:
+        """
+        Whether a service's resources are inventoried per region.
+        
+        Args:
+            service: Service name (s3, ec2, iam)
+            
+        Returns:
+            True if the service declares REGIONAL = True
+        """
+        return bool(getattr(cls._get_module(service), 'REGIONAL', False))
+    
+    @classmethod
+    def list_resources(cls, service: str, account_id: str, client=None,
+                       region: Optional[str] = None) -> List[Dict]:
         """
         List all resources for a service in an account.
         
@@ -90,12 +248,15 @@ class ServiceRegistry:
             service: Service name (s3, ec2, iam)
             account_id: AWS account ID
             client: Optional pre-configured AWS client
+            region: Region to list (regional services only; see is_regional)
             
         Returns:
             List of resource configuration dicts
         """
         module = cls._get_module(service)
-        return module.list_resources(account_id, client)
+        if region is None:
+            return module.list_resources(account_id, client)
+        return module.list_resources(account_id, client, region=region)
 
 
 # Convenience functions for direct access
@@ -103,10 +264,32 @@ def extract_arn_from_event(service: str, detail: dict) -> Optional[str]:
     """Extract ARN from CloudTrail event detail"""
     return ServiceRegistry.extract_arn_from_event(service, detail)
 
-def describe_resource(service: str, arn: str, account_id: str, client=None) -> dict:
-    """Describe resource configuration"""
-    return ServiceRegistry.describe_resource(service, arn, account_id, client)
+def extract_arns_from_event(service: str, detail: dict) -> List[str]:
+    """Extract every resource ARN a CloudTrail event refers to"""
+    return ServiceRegistry.extract_arns_from_event(service, detail)
+
+def describe_resource(service: str, arn: str, account_id: str, client=None,
+                      sections: Optional[Iterable[str]] = None, stored_config: Optional[dict] = None) -> dict:
+    """Describe resource configuration (optionally only some config sections)"""
+    return ServiceRegistry.describe_resource(service, arn, account_id, client, sections=sections,
+                                             stored_config=stored_config)
+
+def get_event_sections(service: str, event_names: Iterable[str]) -> Optional[Set[str]]:
+    """Config sections a set of CloudTrail events can change (None: full describe)"""
+    return ServiceRegistry.get_event_sections(service, event_names)
+
+def is_delete_event(service: str, event_name: Optional[str]) -> bool:
+    """Whether a CloudTrail event deletes its resource"""
+    return ServiceRegistry.is_delete_event(service, event_name)
+
+def accepts_event(service: str, event_name: Optional[str]) -> bool:
+    """Whether a CloudTrail event can change the service's evaluated state"""
+    return ServiceRegistry.accepts_event(service, event_name)
+
+def is_regional(service: str) -> bool:
+    """Whether a service is inventoried per region"""
+    return ServiceRegistry.is_regional(service)
 
-def list_resources(service: str, account_id: str, client=None) -> List[Dict]:
-    """List all resources for a service"""
-    return ServiceRegistry.list_resources(service, account_id, client)
+def list_resources(service: str, account_id: str, client=None, region: Optional[str] = None) -> List[Dict]:
+    """List all resources for a service (in one region for regional services)"""
+    return ServiceRegistry.list_resources(service, account_id, client, region=region)
@@ -2,6 +2,14 @@
 EC2 service-specific support for inventory generation, event processing, and resource description.
 """
 from typing import Dict, List, Optional
+from botocore.exceptions import ClientError
+from common.client_pool import CLIENT_POOL
+
+# Resources are inventoried per region (list_resources is called once per account region)
+REGIONAL = True
+
+# CloudTrail eventNames that delete the resource (handled without a describe)
+DELETE_EVENTS = frozenset(['TerminateInstances'])
 
 
 # ============================================================================
@@ -16,59 +24,171 @@ def extract_arn_from_event(detail: dict) -> Optional[str]:
         detail: CloudTrail event detail dict
         
     Returns:
-        EC2 resource ARN or None if cannot be extracted
-        
-    TODO: Implement EC2 ARN extraction from CloudTrail events
+        EC2 resource ARN (the first one for events naming several instances) or None
+        if cannot be extracted
+    """
+    arns = extract_arns_from_event(detail)
+    return arns[0] if arns else None
+
+
+def extract_arns_from_event(detail: dict) -> List[str]:
     """
-    # Check resources array first
-    resources = detail.get('resources', [])
-    if resources and len(resources) > 0:
-        arn = resources[0].get('ARN')
-        if arn:
-            return arn
+    Extract every EC2 resource ARN from CloudTrail event detail.
+    Instance calls such as TerminateInstances name all their instances in
+    requestParameters.instancesSet.items (RunInstances in responseElements).
     
-    # TODO: Construct ARN from requestParameters for events without resources array
-    # Examples: RunInstances, CreateVolume, CreateSecurityGroup
+    Args:
+        detail: CloudTrail event detail dict
+        
+    Returns:
+        EC2 resource ARNs (empty if none can be extracted)
+        
+    TODO: Construct ARNs for events naming other resources (e.g. CreateVolume, CreateSecurityGroup)
+    """
+    # Instance calls list every instance they act on in the request (RunInstances: in the response)
+    instance_ids = []
+    for elements in (detail.get('requestParameters'), detail.get('responseElements')):
+        instances_set = (elements or {}).get('instancesSet') or {}
+        instance_ids = [item['instanceId'] for item in instances_set.get('items', []) if item.get('instanceId')]
+        if instance_ids:
+            break
+    region = detail.get('awsRegion')
+    account_id = detail.get('recipientAccountId')
+    if instance_ids and region and account_id:
+        return [f"arn:aws:ec2:{region}:{account_id}:instance/{instance_id}" for instance_id in instance_ids]
     
-    return None
+    # Otherwise use the resources array
+    return [resource['ARN'] for resource in detail.get('resources', []) if resource.get('ARN')]
 
 
 # ============================================================================
 # RESOURCE DESCRIPTION
 # ============================================================================
 
-def describe_resource(arn: str, account_id: str, ec2_client=None) -> dict:
+def describe_resource(arn: str, account_id: str, ec2_client=None, stored_config: Optional[dict] = None) -> dict:
     """
-    Describe EC2 resource configuration.
+    Describe EC2 instance configuration (same shape as the instances from list_resources).
     
     Args:
-        arn: EC2 resource ARN
+        arn: EC2 instance ARN (format: arn:aws:ec2:region:account:instance/instance-id)
         account_id: AWS account ID (for cross-account access)
         ec2_client: Optional pre-configured EC2 client (for testing)
+        stored_config: Configuration stored in inventory (unused - the ARN carries the region)
         
     Returns:
-        Resource configuration dict
+        Instance configuration dict
         
-    TODO: Implement EC2 resource description
+    Raises:
+        NotImplementedError: If the ARN is not an instance (other EC2 resources are not inventoried)
+        ValueError: If the ARN is malformed or the instance no longer exists
+        Exception: If instance cannot be described
     """
-    raise NotImplementedError("EC2 resource description not yet implemented")
+    parts = arn.split(':', 5)
+    if len(parts) != 6 or not parts[3]:
+        raise ValueError(f"Invalid EC2 ARN: {arn}")
+    region = parts[3]
+    resource_type, _, instance_id = parts[5].partition('/')
+    if resource_type != 'instance':
+        raise NotImplementedError(f"EC2 {resource_type} description not yet implemented")
+    
+    if ec2_client is None:
+        ec2_client = _get_cross_account_ec2_client(account_id, region)
+    
+    try:
+        response = ec2_client.describe_instances(InstanceIds=[instance_id])
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'InvalidInstanceID.NotFound':
+            raise ValueError(f"EC2 instance not found: {instance_id}") from e
+        raise
+    
+    for reservation in response.get('Reservations', []):
+        for instance in reservation.get('Instances', []):
+            if instance['InstanceId'] == instance_id:
+                return _instance_config(instance, account_id, region)
+    raise ValueError(f"EC2 instance not found: {instance_id}")
 
 
 # ============================================================================
 # INVENTORY GENERATION
 # ============================================================================
 
-def list_resources(account_id: str, ec2_client=None) -> List[Dict]:
+def list_resources(account_id: str, ec2_client=None, region: Optional[str] = None) -> Dict:
     """
-    List all EC2 resources in an account.
+    List all EC2 instances in one region of an account.
     
     Args:
         account_id: AWS account ID
         ec2_client: Optional pre-configured EC2 client (for testing)
+        region: Region to list (default: the client's region)
         
     Returns:
-        List of resource configuration dicts
+        Dict with 'resources' (list of instance configs) and 'failed_count' (int)
+    """
+    if ec2_client is None:
+        ec2_client = _get_cross_account_ec2_client(account_id, region)
+    region = region or ec2_client.meta.region_name
+    
+    instances = []
+    for page in ec2_client.get_paginator('describe_instances').paginate():
+        for reservation in page.get('Reservations', []):
+            for instance in reservation.get('Instances', []):
+                instances.append(_instance_config(instance, account_id, region))
+    
+    return {
+        'resources': instances,
+        'failed_count': 0
+    }
+
+
+def list_regions(account_id: str, ec2_client=None) -> List[str]:
+    """
+    Regions enabled in an account (opt-in regions only once opted in).
+    
+    Args:
+        account_id: AWS account ID
+        ec2_client: Optional pre-configured EC2 client (for testing)
         
-    TODO: Implement EC2 inventory generation
+    Returns:
+        Sorted region names
+    """
+    if ec2_client is None:
+        ec2_client = _get_cross_account_ec2_client(account_id)
+    response = ec2_client.describe_regions(AllRegions=False)
+    return sorted(region['RegionName'] for region in response.get('Regions', []))
+
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+def _instance_config(instance: dict, account_id: str, region: str) -> dict:
+    """Inventoried configuration of a DescribeInstances instance"""
+    instance_id = instance['InstanceId']
+    return {
+        'ARN': f"arn:aws:ec2:{region}:{account_id}:instance/{instance_id}",
+        'InstanceId': instance_id,
+        'Region': region,
+        'InstanceType': instance.get('InstanceType'),
+        'State': instance.get('State', {}),
+        'SecurityGroups': instance.get('SecurityGroups', []),
+        'SubnetId': instance.get('SubnetId'),
+        'VpcId': instance.get('VpcId'),
+        'PublicIpAddress': instance.get('PublicIpAddress'),
+        'PrivateIpAddress': instance.get('PrivateIpAddress')
+    }
+
+
+def _get_cross_account_ec2_client(account_id: str, region: Optional[str] = None):
+    """
+    Get EC2 client with cross-account access.
+    
+    Args:
+        account_id: AWS account ID to access
+        region: Optional client region (default: the default region)
+        
+    Returns:
+        Configured boto3 EC2 client (calls paced by the account's rate governor)
     """
-    raise NotImplementedError("EC2 inventory generation not yet implemented")
+    role_arn = f"arn:aws:iam::{account_id}:role/QrieInventoryRole"
+    return CLIENT_POOL.get_client('ec2', account_id, role_arn, region=region,
+                                  session_name=f"qrie-ec2-access-{account_id}")
@@ -1,9 +1,55 @@
 """
 S3 service-specific support for inventory generation, event processing, and resource description.
 """
-import boto3
-from typing import Dict, List, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from botocore.exceptions import ClientError
 from common.logger import debug, info, error
+from common.client_pool import CLIENT_POOL
+
+
+# Independently describable parts of a bucket configuration (one S3 API call each)
+CONFIG_SECTIONS = ('Location', 'PublicAccessBlockConfiguration', 'Versioning', 'Encryption', 'Logging')
+
+# Concurrent S3 calls while describing an account's buckets (one call per bucket section);
+# calls are still paced by the account's rate governor
+DEFAULT_DESCRIBE_CONCURRENCY = int(os.environ.get('S3_DESCRIBE_CONCURRENCY', '16'))
+
+# Process-lifetime counters for region-aware routing: describes sent to a bucket's regional
+# endpoint that the default-region client would have reached through a 301 redirect
+REGION_STATS = {'lookups': 0, 'routed': 0, 'redirects_avoided': 0}
+_stats_lock = threading.Lock()
+
+# CloudTrail eventName -> config sections the event can change. Events that only touch
+# settings not kept in inventory (policy, ACL, CORS, ...) map to no sections; events not
+# listed here (CreateBucket, DeleteBucket) need a full describe.
+EVENT_SECTIONS = {
+    'PutBucketPublicAccessBlock': ('PublicAccessBlockConfiguration',),
+    'DeleteBucketPublicAccessBlock': ('PublicAccessBlockConfiguration',),
+    'DeletePublicAccessBlock': ('PublicAccessBlockConfiguration',),
+    'PutBucketVersioning': ('Versioning',),
+    'PutBucketEncryption': ('Encryption',),
+    'DeleteBucketEncryption': ('Encryption',),
+    'PutBucketLogging': ('Logging',),
+    'PutBucketPolicy': (),
+    'DeleteBucketPolicy': (),
+    'PutBucketAcl': (),
+    'PutBucketOwnershipControls': (),
+    'PutBucketReplication': (),
+    'PutBucketCors': (),
+    'PutBucketLifecycleConfiguration': (),
+    'PutBucketTagging': (),
+    'DeleteBucketTagging': (),
+}
+
+# CloudTrail eventNames that delete the resource (handled without a describe)
+DELETE_EVENTS = frozenset(['DeleteBucket'])
+
+# Other eventNames that can change evaluated state; events not tracked here, in DELETE_EVENTS
+# or mapped to sections in EVENT_SECTIONS are dropped before any lookup
+TRACKED_EVENTS = frozenset(['CreateBucket'])
 
 
 # ============================================================================
@@ -44,106 +90,166 @@ def extract_arn_from_event(detail: dict) -> Optional[str]:
 # RESOURCE DESCRIPTION
 # ============================================================================
 
-def describe_resource(arn: str, account_id: str, s3_client=None) -> dict:
+def describe_resource(arn: str, account_id: str, s3_client=None,
+                      sections: Optional[Iterable[str]] = None, stored_config: Optional[dict] = None) -> dict:
     """
     Describe S3 bucket configuration.
+    Without a client the calls go through the pooled client for the bucket's region: the
+    stored Location when refreshing other sections, otherwise looked up with GetBucketLocation
+    (which is the Location section itself).
     
     Args:
         arn: S3 bucket ARN (format: arn:aws:s3:::bucket-name)
         account_id: AWS account ID (for cross-account access)
-        s3_client: Optional pre-configured S3 client (for testing)
+        s3_client: Optional pre-configured S3 client (for testing); used for every call
+        sections: Optional subset of CONFIG_SECTIONS to describe (default: all). A partial
+                  describe returns only Name, ARN and the keys of those sections
+        stored_config: Optional configuration stored in inventory (its Location routes the calls)
         
     Returns:
         Bucket configuration dict with all relevant settings
         
     Raises:
+        ValueError: If an unknown section is requested
         Exception: If bucket cannot be described
     """
     bucket_name = arn.split(':::')[-1]
     
-    # Use provided client or create one with cross-account access
-    if s3_client is None:
-        s3_client = _get_cross_account_s3_client(account_id)
+    if sections is None:
+        sections = CONFIG_SECTIONS
+    else:
+        unknown = set(sections) - set(CONFIG_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown S3 config sections: {sorted(unknown)}")
     
     config = {
         'Name': bucket_name,
         'ARN': arn
     }
     
-    # Get bucket location
-    location = s3_client.get_bucket_location(Bucket=bucket_name)
-    config['Location'] = location.get('LocationConstraint') or 'us-east-1'
+    # Use provided client or route through the pooled client for the bucket's region
+    if s3_client is None:
+        region = None if 'Location' in sections else _stored_region(stored_config)
+        if region is None:
+            region = _lookup_region(_get_cross_account_s3_client(account_id), bucket_name)
+            if 'Location' in sections:
+                config['Location'] = region
+        sections = [section for section in sections if section != 'Location']
+        s3_client = _regional_client(account_id, region)
+    
+    # Describe in CONFIG_SECTIONS order so full and partial describes issue the same calls
+    for section in CONFIG_SECTIONS:
+        if section in sections:
+            _SECTION_DESCRIBERS[section](s3_client, bucket_name, config)
     
-    # Get public access block configuration (critical for security policies)
+    return config
+
+
+def _describe_location(s3_client, bucket_name: str, config: dict) -> None:
+    location = s3_client.get_bucket_location(Bucket=bucket_name)
+    config['Location'] = _normalize_region(location.get('LocationConstraint'))
+
+
+def _describe_public_access_block(s3_client, bucket_name: str, config: dict) -> None:
+    # Critical for security policies
     try:
         pab = s3_client.get_public_access_block(Bucket=bucket_name)
         config['PublicAccessBlockConfiguration'] = pab.get('PublicAccessBlockConfiguration', {})
-    except s3_client.exceptions.NoSuchPublicAccessBlockConfiguration:
+    except ClientError as e:
+        if _error_code(e) != 'NoSuchPublicAccessBlockConfiguration':
+            debug(f"Could not get public access block for {bucket_name}: {str(e)}")
+            return
         config['PublicAccessBlockConfiguration'] = None
     except Exception as e:
         debug(f"Could not get public access block for {bucket_name}: {str(e)}")
-    
-    # Get versioning
+
+
+def _describe_versioning(s3_client, bucket_name: str, config: dict) -> None:
     versioning = s3_client.get_bucket_versioning(Bucket=bucket_name)
     config['Versioning'] = versioning.get('Status', 'Disabled')
-    
-    # Get encryption
+    config['MFADelete'] = versioning.get('MFADelete', 'Disabled')
+
+
+def _describe_encryption(s3_client, bucket_name: str, config: dict) -> None:
     try:
         encryption = s3_client.get_bucket_encryption(Bucket=bucket_name)
         config['Encryption'] = encryption.get('ServerSideEncryptionConfiguration', {})
-    except s3_client.exceptions.ServerSideEncryptionConfigurationNotFoundError:
+    except ClientError as e:
+        if _error_code(e) != 'ServerSideEncryptionConfigurationNotFoundError':
+            debug(f"Could not get encryption for {bucket_name}: {str(e)}")
+            return
         config['Encryption'] = None
     except Exception as e:
         debug(f"Could not get encryption for {bucket_name}: {str(e)}")
-    
-    # Get logging
+
+
+def _describe_logging(s3_client, bucket_name: str, config: dict) -> None:
     try:
         logging = s3_client.get_bucket_logging(Bucket=bucket_name)
         config['Logging'] = logging.get('LoggingEnabled', {})
     except Exception as e:
         debug(f"Could not get logging for {bucket_name}: {str(e)}")
-    
-    return config
+
+
+def _error_code(e: ClientError) -> str:
+    # These "not configured" errors are not modeled as exception classes on the S3 client
+    return e.response.get('Error', {}).get('Code', '')
+
+
+# One describer (one S3 API call) per section; each sets the section's config keys
+_SECTION_DESCRIBERS = {
+    'Location': _describe_location,
+    'PublicAccessBlockConfiguration': _describe_public_access_block,
+    'Versioning': _describe_versioning,  # Also sets MFADelete
+    'Encryption': _describe_encryption,
+    'Logging': _describe_logging,
+}
 
 
 # ============================================================================
 # INVENTORY GENERATION
 # ============================================================================
 
-def list_resources(account_id: str, s3_client=None) -> dict:
+def list_resources(account_id: str, s3_client=None, concurrency: Optional[int] = None) -> dict:
     """
     List all S3 buckets in an account.
+    Buckets are described concurrently: every (bucket, section) call runs on one bounded pool,
+    and a bucket whose describe fails is counted once without affecting the others.
     
     Args:
         account_id: AWS account ID
         s3_client: Optional pre-configured S3 client (for testing)
+        concurrency: Concurrent S3 calls (default: DEFAULT_DESCRIBE_CONCURRENCY)
         
     Returns:
-        Dict with 'resources' (list of bucket configs) and 'failed_count' (int)
+        Dict with 'resources' (list of bucket configs, in list_buckets order) and
+        'failed_count' (int, buckets that could not be described)
     """
-    if s3_client is None:
-        s3_client = _get_cross_account_s3_client(account_id)
-    
-    buckets = []
-    failed_count = 0
-    
     try:
-        response = s3_client.list_buckets()
+        response = (s3_client or _get_cross_account_s3_client(account_id)).list_buckets()
         bucket_list = response.get('Buckets', [])
         
         info(f"Found {len(bucket_list)} S3 buckets in account {account_id}")
         
-        for bucket in bucket_list:
-            bucket_name = bucket['Name']
-            arn = f"arn:aws:s3:::{bucket_name}"
-            
-            try:
-                config = describe_resource(arn, account_id, s3_client)
-                buckets.append(config)
-            except Exception as e:
-                error(f"Error describing bucket {bucket_name}: {str(e)}")
+        arns = [f"arn:aws:s3:::{bucket['Name']}" for bucket in bucket_list]
+        # ListBuckets reports each bucket's region (BucketRegion), saving a GetBucketLocation
+        regions = {bucket['Name']: _normalize_region(bucket['BucketRegion'])
+                   for bucket in bucket_list if bucket.get('BucketRegion')}
+        buckets = []
+        failed_count = 0
+        for arn, result in describe_resources(arns, s3_client, concurrency,
+                                              account_id=account_id, regions=regions):
+            if isinstance(result, Exception):
+                error(f"Error describing bucket {arn.split(':::')[-1]}: {str(result)}")
                 failed_count += 1
-                continue
+            else:
+                buckets.append(result)
+        
+        if s3_client is None:
+            with _stats_lock:
+                totals = dict(REGION_STATS)
+            debug(f"{len(regions)} of {len(bucket_list)} bucket regions reported by ListBuckets "
+                  f"(region routing process totals: {totals})")
         
         return {
             'resources': buckets,
@@ -155,32 +261,117 @@ def list_resources(account_id: str, s3_client=None) -> dict:
         raise
 
 
+def describe_resources(arns: List[str], s3_client=None, concurrency: Optional[int] = None,
+                       account_id: Optional[str] = None, regions: Optional[Dict[str, str]] = None) -> List[tuple]:
+    """
+    Fully describe many buckets, fanning out across buckets and their per-section calls.
+    Without a client each bucket is described through the pooled client for its region;
+    regions not passed in are looked up first (concurrently) with GetBucketLocation.
+    
+    Args:
+        arns: S3 bucket ARNs
+        s3_client: Optional S3 client used for every call (boto3 clients are thread-safe)
+        concurrency: Concurrent S3 calls (default: DEFAULT_DESCRIBE_CONCURRENCY)
+        account_id: AWS account ID (required without a client)
+        regions: Optional bucket name -> region already known (e.g. from ListBuckets)
+        
+    Returns:
+        (arn, config) per bucket in input order - config is the exception instead when any of
+        the bucket's calls failed
+    """
+    workers = max(1, concurrency or DEFAULT_DESCRIBE_CONCURRENCY)
+    regions = regions or {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        lookups = {}
+        if s3_client is None:
+            default_client = _get_cross_account_s3_client(account_id)
+            lookups = {arn: executor.submit(_lookup_region, default_client, arn.split(':::')[-1])
+                       for arn in arns if arn.split(':::')[-1] not in regions}
+        
+        pending = []
+        for arn in arns:
+            bucket_name = arn.split(':::')[-1]
+            client, sections, located = s3_client, CONFIG_SECTIONS, {}
+            if client is None:
+                try:
+                    region = regions.get(bucket_name) or lookups[arn].result()
+                except Exception as e:
+                    pending.append((arn, bucket_name, e, [], []))
+                    continue
+                # The known region is the Location section; the rest go to the regional endpoint
+                client, sections, located = _regional_client(account_id, region), CONFIG_SECTIONS[1:], {'Location': region}
+            # Each call fills its own dict so sections never share mutable state
+            calls = [(section, {}) for section in sections]
+            futures = [executor.submit(_SECTION_DESCRIBERS[section], client, bucket_name, part)
+                       for section, part in calls]
+            pending.append((arn, bucket_name, located, calls, futures))
+        
+        results = []
+        for arn, bucket_name, located, calls, futures in pending:
+            if isinstance(located, Exception):
+                results.append((arn, located))
+                continue
+            config = {'Name': bucket_name, 'ARN': arn, **located}
+            try:
+                for (_, part), future in zip(calls, futures):
+                    future.result()
+                    config.update(part)  # CONFIG_SECTIONS order, as in describe_resource
+            except Exception as e:
+                config = e
+            results.append((arn, config))
+        return results
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def _get_cross_account_s3_client(account_id: str):
+def _get_cross_account_s3_client(account_id: str, region: Optional[str] = None):
     """
     Get S3 client with cross-account access.
     
     Args:
         account_id: AWS account ID to access
+        region: Optional client region (default: the default region)
         
     Returns:
-        Configured boto3 S3 client
+        Configured boto3 S3 client (calls paced by the account's rate governor)
     """
-    sts = boto3.client('sts')
     role_arn = f"arn:aws:iam::{account_id}:role/QrieInventoryRole"
     
-    assumed_role = sts.assume_role(
-        RoleArn=role_arn,
-        RoleSessionName=f"qrie-s3-access-{account_id}"
-    )
-    
-    credentials = assumed_role['Credentials']
-    return boto3.client(
-        's3',
-        aws_access_key_id=credentials['AccessKeyId'],
-        aws_secret_access_key=credentials['SecretAccessKey'],
-        aws_session_token=credentials['SessionToken']
-    )
+    # Pooled client on a cached session: built once per account and region, rebuilt when credentials rotate
+    return CLIENT_POOL.get_client('s3', account_id, role_arn, region=region,
+                                  session_name=f"qrie-s3-access-{account_id}")
+
+
+def _regional_client(account_id: str, region: str):
+    """Pooled client for a bucket's region (the default client when the regions match)"""
+    default_client = _get_cross_account_s3_client(account_id)
+    with _stats_lock:
+        REGION_STATS['routed'] += 1
+        if region == default_client.meta.region_name:
+            return default_client
+        # The default client's first call to this bucket would have been redirected (301)
+        REGION_STATS['redirects_avoided'] += 1
+    return _get_cross_account_s3_client(account_id, region)
+
+
+def _lookup_region(s3_client, bucket_name: str) -> str:
+    """Bucket region via GetBucketLocation (answered from any region)"""
+    with _stats_lock:
+        REGION_STATS['lookups'] += 1
+    location = s3_client.get_bucket_location(Bucket=bucket_name)
+    return _normalize_region(location.get('LocationConstraint'))
+
+
+def _stored_region(stored_config: Optional[dict]) -> Optional[str]:
+    """Region recorded in a stored bucket configuration, if any"""
+    location = (stored_config or {}).get('Location')
+    return _normalize_region(location) if location else None
+
+
+def _normalize_region(location: Optional[str]) -> str:
+    """Region name for a LocationConstraint (None for us-east-1, EU for legacy eu-west-1 buckets)"""
+    if not location:
+        return 'us-east-1'
+    return 'eu-west-1' if location == 'EU' else location
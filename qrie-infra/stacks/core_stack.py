@@ -5,12 +5,14 @@ from aws_cdk import (
     aws_dynamodb as ddb,
     aws_sqs as sqs,
     aws_lambda as _lambda,
+    aws_lambda_destinations as destinations,
     aws_logs as logs,
     aws_iam as iam,
     aws_cognito as cognito,
     aws_events as events,
     aws_events_targets as targets,
     aws_ssm as ssm,
+    aws_pipes as pipes,
 )
 
 class CoreStack(Stack):
@@ -30,6 +32,7 @@ class CoreStack(Stack):
                  *,
                  viewer_trusted_account_id: Optional[str] = None,
                  customer_org_id: Optional[str] = None,  # prefer this if available
+                 ordered_events: bool = False,  # FIFO pipeline grouped by resource (see below)
                  **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
@@ -96,6 +99,7 @@ class CoreStack(Stack):
             table_name="qrie_summary",
             partition_key=ddb.Attribute(name="Type", type=ddb.AttributeType.STRING),
             billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expires_at",  # Locks and sharded scan state expire
             removal_policy=RemovalPolicy.DESTROY
         )
         #
@@ -134,6 +138,25 @@ class CoreStack(Stack):
                 }
             },
         ))
+
+        # ---------- Optional ordered pipeline: ingress queue -> Pipe -> FIFO queue ----------
+        # Customer EventBridge rules cannot set a per-event MessageGroupId, so a pipe tags each
+        # event with its resource ARN (enrichment Lambda) and forwards it to a FIFO queue grouped
+        # by that ARN: events for one resource are processed in order, different resources in parallel.
+        processing_queue = events_queue
+        if ordered_events:
+            fifo_dlq = sqs.Queue(self, "QrieEventsFifoDLQ",
+                                 queue_name="qrie-events-dlq.fifo",
+                                 fifo=True,
+                                 retention_period=Duration.days(7))
+            processing_queue = sqs.Queue(
+                self, "QrieEventsFifoQueue",
+                queue_name="qrie-events.fifo",
+                fifo=True,
+                content_based_deduplication=True,  # Duplicate deliveries of one event collapse
+                visibility_timeout=Duration.minutes(16),
+                dead_letter_queue=sqs.DeadLetterQueue(queue=fifo_dlq, max_receive_count=5)
+            )
         #
         # ------    END: SQS (event ingress) ------
 
@@ -161,7 +184,11 @@ class CoreStack(Stack):
                 "ACCOUNTS_TABLE": accounts.table_name,
                 "RESOURCES_TABLE": resources.table_name,
                 "FINDINGS_TABLE": findings.table_name,
-                "POLICIES_TABLE": policies.table_name
+                "POLICIES_TABLE": policies.table_name,
+                "SUMMARY_TABLE": summary.table_name,
+                "SCAN_CONCURRENCY": "8",  # Default worker pool width (override per event with "concurrency")
+                "SCAN_SHARD_SIZE": "50",  # Accounts per shard in coordinator mode
+                "SCAN_MAX_INFLIGHT_SHARDS": "10"  # Shards running at once in coordinator mode
             }
         )
         logs.LogRetention(
@@ -171,9 +198,49 @@ class CoreStack(Stack):
             retention=logs.RetentionDays.ONE_WEEK,
         )
         accounts.grant_read_data(policy_scanner_fn)
-        resources.grant_read_data(policy_scanner_fn)
-        findings.grant_write_data(policy_scanner_fn)
+        resources.grant_read_write_data(policy_scanner_fn)  # Write: evaluation fingerprints
+        findings.grant_read_write_data(policy_scanner_fn)  # Read: finding state preload
         policies.grant_read_data(policy_scanner_fn)
+        summary.grant_read_write_data(policy_scanner_fn)  # Scan metrics and sharded scan state
+        
+        # Coordinator/shard invocations and checkpointed scans re-invoke the scanner itself
+        # (ARN built from the fixed function name to avoid a role <-> function dependency cycle)
+        policy_scanner_fn.add_to_role_policy(iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=["lambda:InvokeFunction"],
+            resources=[f"arn:aws:lambda:{self.region}:{self.account}:function:qrie_policy_scanner"]
+        ))
+        
+        # Shard invocations that fail on every retry are handed to a failure handler, which
+        # records the shard and dispatches the next one so sharded scans still finish
+        scan_shard_failure_fn = _lambda.Function(
+            self, "QrieScanShardFailureHandler",
+            function_name="qrie_scan_shard_failure_handler",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            handler="scan_processor.scan_handler.handle_shard_failure",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.minutes(1),
+            log_group=logs.LogGroup.from_log_group_name(self, "QrieScanShardFailureHandlerLogGroup", "/aws/lambda/qrie_scan_shard_failure_handler"),
+            environment={
+                "SUMMARY_TABLE": summary.table_name
+            }
+        )
+        logs.LogRetention(
+            self,
+            "QrieScanShardFailureHandlerLogRetention",
+            log_group_name="/aws/lambda/qrie_scan_shard_failure_handler",
+            retention=logs.RetentionDays.ONE_WEEK,
+        )
+        summary.grant_read_write_data(scan_shard_failure_fn)  # Sharded scan state and scan metrics
+        scan_shard_failure_fn.add_to_role_policy(iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=["lambda:InvokeFunction"],
+            resources=[f"arn:aws:lambda:{self.region}:{self.account}:function:qrie_policy_scanner*"]
+        ))
+        policy_scanner_fn.configure_async_invoke(
+            on_failure=destinations.LambdaDestination(scan_shard_failure_fn, response_only=False),
+            retry_attempts=2
+        )
         
         # Add cross-account role assumption permissions for policy scanner lambda
         policy_scanner_fn.add_to_role_policy(iam.PolicyStatement(
@@ -202,7 +269,10 @@ class CoreStack(Stack):
                 "ACCOUNTS_TABLE": accounts.table_name,
                 "RESOURCES_TABLE": resources.table_name,
                 "FINDINGS_TABLE": findings.table_name,
-                "POLICIES_TABLE": policies.table_name
+                "POLICIES_TABLE": policies.table_name,
+                "EVENT_CONCURRENCY": "10",
+                "EVENT_COALESCE_WINDOW_SECONDS": "300",
+                "EVENTS_ORDERED": "true" if ordered_events else "false"
             }
         )
         logs.LogRetention(
@@ -211,21 +281,67 @@ class CoreStack(Stack):
             log_group_name="/aws/lambda/qrie_event_processor",
             retention=logs.RetentionDays.ONE_WEEK,
         )
-        events_queue.grant_consume_messages(event_processor_fn)
+        processing_queue.grant_consume_messages(event_processor_fn)
         accounts.grant_read_data(event_processor_fn)
-        resources.grant_write_data(event_processor_fn)
-        findings.grant_write_data(event_processor_fn)
+        resources.grant_read_write_data(event_processor_fn)  # Read: bulk stale/change check
+        findings.grant_read_write_data(event_processor_fn)  # Read: deleted resources' findings are queried
         policies.grant_read_data(event_processor_fn)
         
         # Add SQS queue trigger to Lambda function
         _lambda.EventSourceMapping(
             self, "QrieEventsMapping",
             target=event_processor_fn,
-            event_source_arn=events_queue.queue_arn,
-            batch_size=10,
+            event_source_arn=processing_queue.queue_arn,
+            # FIFO sources allow at most 10 records and no batching window
+            batch_size=10 if ordered_events else 100,
+            max_batching_window=None if ordered_events else Duration.seconds(5),
+            report_batch_item_failures=True,  # Handler returns batchItemFailures; only those are redelivered
             enabled=True
         )
 
+        if ordered_events:
+            event_grouper_fn = _lambda.Function(
+                self, "QrieEventGrouper",
+                function_name="qrie_event_grouper",
+                runtime=_lambda.Runtime.PYTHON_3_12,
+                handler="event_processor.event_grouper.lambda_handler",
+                code=_lambda.Code.from_asset("lambda"),
+                timeout=Duration.seconds(30),
+                log_group=logs.LogGroup.from_log_group_name(self, "QrieEventGrouperLogGroup", "/aws/lambda/qrie_event_grouper"),
+            )
+            logs.LogRetention(
+                self,
+                "QrieEventGrouperLogRetention",
+                log_group_name="/aws/lambda/qrie_event_grouper",
+                retention=logs.RetentionDays.ONE_WEEK,
+            )
+
+            pipe_role = iam.Role(self, "QrieEventsPipeRole",
+                                 assumed_by=iam.ServicePrincipal("pipes.amazonaws.com"))
+            events_queue.grant_consume_messages(pipe_role)
+            event_grouper_fn.grant_invoke(pipe_role)
+            processing_queue.grant_send_messages(pipe_role)
+
+            pipes.CfnPipe(
+                self, "QrieEventsPipe",
+                name="qrie-events-ordering",
+                role_arn=pipe_role.role_arn,
+                source=events_queue.queue_arn,
+                source_parameters=pipes.CfnPipe.PipeSourceParametersProperty(
+                    sqs_queue_parameters=pipes.CfnPipe.PipeSourceSqsQueueParametersProperty(
+                        batch_size=10,
+                        maximum_batching_window_in_seconds=1
+                    )
+                ),
+                enrichment=event_grouper_fn.function_arn,
+                target=processing_queue.queue_arn,
+                target_parameters=pipes.CfnPipe.PipeTargetParametersProperty(
+                    sqs_queue_parameters=pipes.CfnPipe.PipeTargetSqsQueueParametersProperty(
+                        message_group_id="$.qrieResourceArn"  # Set by the grouper (event_grouper.GROUP_KEY)
+                    )
+                )
+            )
+
         # 3. Inventory Generator: Generate inventory for all services
         #
         inventory_generator_fn = _lambda.Function(
@@ -238,7 +354,8 @@ class CoreStack(Stack):
             log_group=logs.LogGroup.from_log_group_name(self, "QrieInventoryGeneratorLogGroup", "/aws/lambda/qrie_inventory_generator"),
             environment={
                 "ACCOUNTS_TABLE": accounts.table_name,
-                "RESOURCES_TABLE": resources.table_name
+                "RESOURCES_TABLE": resources.table_name,
+                "SUMMARY_TABLE": summary.table_name
             }
         )
         logs.LogRetention(
@@ -249,6 +366,14 @@ class CoreStack(Stack):
         )
         accounts.grant_read_data(inventory_generator_fn)
         resources.grant_read_write_data(inventory_generator_fn)
+        summary.grant_read_write_data(inventory_generator_fn)  # Scan metrics and checkpoints
+        
+        # Checkpointed scans continue by re-invoking the generator itself
+        inventory_generator_fn.add_to_role_policy(iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=["lambda:InvokeFunction"],
+            resources=[f"arn:aws:lambda:{self.region}:{self.account}:function:qrie_inventory_generator"]
+        ))
         
         # Add cross-account role assumption permissions for inventory generator
         inventory_generator_fn.add_to_role_policy(iam.PolicyStatement(
@@ -276,17 +401,35 @@ class CoreStack(Stack):
             description="Weekly full inventory scan - Saturday 00:00 UTC (anti-entropy)"
         )
         
-        # Anti-Entropy Strategy: Daily policy scans (4 AM UTC)
+        # Anti-Entropy Strategy: Daily incremental policy scans (4 AM UTC, Mon-Sat)
+        # Only (resource, policy) pairs whose config or launched policy changed are re-evaluated
         events.Rule(
             self, "DailyPolicyScanSchedule",
-            schedule=events.Schedule.cron(minute="0", hour="4"),
+            schedule=events.Schedule.cron(minute="0", hour="4", week_day="MON-SAT"),
             targets=[targets.LambdaFunction(
                 policy_scanner_fn,
                 event=events.RuleTargetInput.from_object({
-                    "scan_type": "anti-entropy"  # Anti-entropy scan updates drift metrics
+                    "scan_type": "anti-entropy",  # Anti-entropy scan updates drift metrics
+                    "mode": "incremental",
+                    "role": "coordinator"  # Fan accounts out to shard invocations
+                })
+            )],
+            description="Daily incremental policy scan - 04:00 UTC Mon-Sat (anti-entropy)"
+        )
+        
+        # Weekly full policy scan (Sunday 4 AM UTC, after the weekly inventory refresh)
+        events.Rule(
+            self, "WeeklyFullPolicyScanSchedule",
+            schedule=events.Schedule.cron(minute="0", hour="4", week_day="SUN"),
+            targets=[targets.LambdaFunction(
+                policy_scanner_fn,
+                event=events.RuleTargetInput.from_object({
+                    "scan_type": "anti-entropy",  # Anti-entropy scan updates drift metrics
+                    "mode": "full",
+                    "role": "coordinator"  # Fan accounts out to shard invocations
                 })
             )],
-            description="Daily policy scan - 04:00 UTC (anti-entropy)"
+            description="Weekly full policy scan - Sunday 04:00 UTC (anti-entropy)"
         )
         
         
@@ -370,6 +513,8 @@ class CoreStack(Stack):
 
         # Outputs
         cdk.CfnOutput(self, "EventsQueueUrl", value=events_queue.queue_url)
+        if ordered_events:
+            cdk.CfnOutput(self, "EventsFifoQueueUrl", value=processing_queue.queue_url)
         # if viewer_trusted_account_id:
         #     cdk.CfnOutput(self, "ViewerRoleArn", value=viewer_role.role_arn)
         cdk.CfnOutput(self, "ResourcesTable", value=resources.table_name)
@@ -31,6 +31,27 @@ def mock_environment():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_evaluator_cache():
+    """Process-wide evaluator cache must not leak between tests"""
+    from data_access.policy_manager import clear_evaluator_cache as clear
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_credential_cache():
+    """Cached assumed-role sessions and pooled clients must not leak between tests"""
+    from common.credential_cache import CREDENTIAL_CACHE
+    from common.client_pool import CLIENT_POOL
+    CREDENTIAL_CACHE.reset()
+    CLIENT_POOL.reset()
+    yield
+    CREDENTIAL_CACHE.reset()
+    CLIENT_POOL.reset()
+
+
 @pytest.fixture
 def sample_account():
     """Sample customer account for testing"""
@@ -0,0 +1,80 @@
+"""
+Unit tests for the pooled cross-account boto3 clients.
+"""
+import pytest
+import boto3
+import sys
+import os
+from moto import mock_aws
+from unittest.mock import MagicMock
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from common.client_pool import ClientPool
+
+ROLE_ARN = 'arn:aws:iam::123456789012:role/QrieInventoryRole'
+
+
+@pytest.fixture
+def credential_cache():
+    """Credential cache stub handing out the current session"""
+    cache = MagicMock()
+    cache.get_session.side_effect = lambda *args, **kwargs: cache.current
+    cache.current = boto3.Session(region_name='us-east-1')
+    return cache
+
+
+class TestClientPool:
+    """Test suite for client reuse, pool sizing and eviction"""
+
+    @mock_aws
+    def test_clients_reused_per_account_region_service(self, credential_cache):
+        """One client per (account, region, service, role), sized for concurrent workers"""
+        pool = ClientPool(max_pool_connections=50, credential_cache=credential_cache)
+
+        s3 = pool.get_client('s3', '123456789012', ROLE_ARN)
+        assert pool.get_client('s3', '123456789012', ROLE_ARN) is s3
+        assert pool.get_client('s3', '123456789012', ROLE_ARN, region='eu-west-1') is not s3
+        assert pool.get_client('iam', '123456789012', ROLE_ARN) is not s3
+        assert pool.get_client('s3', '210987654321', ROLE_ARN) is not s3
+
+        assert s3.meta.config.max_pool_connections == 50
+        s3.list_buckets()  # Governed clients still work
+        assert pool.stats() == {'created': 4, 'reused': 1, 'evicted': 0}
+
+    def test_rotated_credentials_evict_client(self, credential_cache):
+        """A new session from the credential cache replaces clients built on the old one"""
+        pool = ClientPool(credential_cache=credential_cache)
+        old = pool.get_client('s3', '123456789012', ROLE_ARN)
+
+        credential_cache.current = boto3.Session(region_name='us-east-1')
+        new = pool.get_client('s3', '123456789012', ROLE_ARN)
+
+        assert new is not old
+        assert pool.get_client('s3', '123456789012', ROLE_ARN) is new
+        assert pool.stats() == {'created': 2, 'reused': 1, 'evicted': 1}
+
+    @mock_aws
+    def test_cross_account_clients_pooled_across_calls(self):
+        """Describes and inventory reuse one client and one AssumeRole per account"""
+        from common.client_pool import CLIENT_POOL
+        from common.credential_cache import CREDENTIAL_CACHE
+        from services.s3_support import _get_cross_account_s3_client
+
+        first = _get_cross_account_s3_client('123456789012')
+        assert _get_cross_account_s3_client('123456789012') is first
+        assert CLIENT_POOL.stats()['reused'] == 1
+        assert CREDENTIAL_CACHE.stats()['misses'] == 1
+
+    @mock_aws
+    def test_pooled_clients_and_sessions_share_credentials(self):
+        """Pooled clients and regional cross-account sessions share one AssumeRole per account"""
+        from common.credential_cache import CREDENTIAL_CACHE
+        from cross_account import get_cross_account_client, get_cross_account_session
+
+        client = get_cross_account_client('123456789012', 'ec2', 'eu-west-1')
+        session = get_cross_account_session('123456789012', 'us-east-1')
+
+        assert client.meta.region_name == 'eu-west-1' and session.region_name == 'us-east-1'
+        assert CREDENTIAL_CACHE.stats()['misses'] == 1
@@ -0,0 +1,117 @@
+"""
+Unit tests for canonical configuration digests and evaluation fingerprints.
+"""
+import sys
+import os
+from dataclasses import replace
+from decimal import Decimal
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from config_digest import (
+    config_digest, policy_version, evaluation_fingerprint, section_digests, changed_sections, changed_paths, paths_overlap
+)
+from policy_definition import Policy, ScopeConfig
+
+
+def _launched_policy(**overrides):
+    policy = Policy(
+        policy_id="S3BucketPublic",
+        description="S3 buckets should not be public",
+        service="s3",
+        category="security",
+        severity=90,
+        remediation="",
+        evaluation_module="s3_bucket_public",
+        scope=ScopeConfig(),
+        status="active",
+        created_at="2025-01-01T00:00:00+00:00",
+        updated_at="2025-01-01T00:00:00+00:00"
+    )
+    return replace(policy, **overrides)
+
+
+class TestConfigDigest:
+    """Test suite for config_digest"""
+
+    def test_key_order_independent(self):
+        """Digest does not depend on dict key order"""
+        a = {'Name': 'bucket', 'Versioning': {'Status': 'Enabled', 'MFADelete': 'Disabled'}}
+        b = {'Versioning': {'MFADelete': 'Disabled', 'Status': 'Enabled'}, 'Name': 'bucket'}
+        assert config_digest(a) == config_digest(b)
+
+    def test_dynamodb_round_trip_stable(self):
+        """Numbers read back from DynamoDB as Decimal hash the same as the originals"""
+        live = {'MaxSessionDuration': 3600, 'Tags': [{'Key': 'env', 'Value': 'prod'}]}
+        stored = {'MaxSessionDuration': Decimal('3600'), 'Tags': [{'Key': 'env', 'Value': 'prod'}]}
+        assert config_digest(live) == config_digest(stored)
+
+    def test_volatile_keys_ignored(self):
+        """Timestamps that change without a config change do not affect the digest"""
+        base = {'Name': 'bucket'}
+        noisy = {'Name': 'bucket', 'LastSeenAt': 123, 'LastModified': '2025-01-02', 'Metadata': {'x': 1}}
+        assert config_digest(base) == config_digest(noisy)
+
+    def test_config_change_changes_digest(self):
+        """Any real configuration change produces a new digest"""
+        assert config_digest({'Public': True}) != config_digest({'Public': False})
+        assert config_digest({}) == config_digest(None)
+
+
+class TestChangedPaths:
+    """Test suite for structural config diffs"""
+
+    def test_changed_paths(self):
+        """Nested dicts diff per key, lists whole; Decimal round trips and volatile keys are ignored"""
+        old = {'Name': 'bucket', 'Versioning': 'Suspended', 'Rules': [{'Days': Decimal(30)}],
+               'PublicAccessBlockConfiguration': {'BlockPublicAcls': True, 'BlockPublicPolicy': Decimal(1)},
+               'LastSeenAt': 1}
+        new = {'Name': 'bucket', 'Versioning': 'Enabled', 'Rules': [{'Days': 30}], 'Logging': {},
+               'PublicAccessBlockConfiguration': {'BlockPublicAcls': False, 'BlockPublicPolicy': 1},
+               'LastSeenAt': 2}
+
+        assert changed_paths(old, new) == ['Logging', 'PublicAccessBlockConfiguration.BlockPublicAcls', 'Versioning']
+        assert changed_paths(new, new) == []
+        assert changed_paths(None, {'Name': 'x'}) == ['Name']
+
+    def test_section_digests_find_changed_sections(self):
+        """Changed sections come from stored digests alone; only those are walked for nested paths"""
+        old = {'Name': 'bucket', 'Encryption': {'Rules': [1]}, 'Tags': {'a': Decimal(1)}, 'Logging': {}}
+        new = {'Name': 'bucket', 'Encryption': {'Rules': [2]}, 'Tags': {'a': 1}, 'Versioning': 'Enabled'}
+
+        sections = changed_sections(section_digests(old), section_digests(new))
+
+        assert sections == ['Encryption', 'Logging', 'Versioning']
+        assert changed_paths(old, new, only_sections=sections) == ['Encryption.Rules', 'Logging', 'Versioning']
+        assert 'LastSeenAt' not in section_digests({'LastSeenAt': 1})
+
+    def test_paths_overlap(self):
+        """Read paths overlap changes at, above or below them"""
+        assert paths_overlap(['PublicAccessBlockConfiguration.BlockPublicAcls'], ['PublicAccessBlockConfiguration'])
+        assert paths_overlap(['PublicAccessBlockConfiguration'], ['PublicAccessBlockConfiguration.BlockPublicAcls'])
+        assert paths_overlap(['Encryption.Rules[0].BucketKeyEnabled'], ['Encryption.Rules'])
+        assert not paths_overlap(['Versioning'], ['MFADelete', 'Logging'])
+        assert not paths_overlap(['Versioning'], [])
+
+
+class TestEvaluationFingerprint:
+    """Test suite for policy versions and evaluation fingerprints"""
+
+    def test_policy_version_tracks_launch_changes(self):
+        """Severity, scope and UpdatedAt changes all produce a new policy version"""
+        base = policy_version(_launched_policy())
+        assert policy_version(_launched_policy()) == base
+        assert policy_version(_launched_policy(severity=50)) != base
+        assert policy_version(_launched_policy(scope=ScopeConfig(exclude_accounts=['123456789012']))) != base
+        assert policy_version(_launched_policy(updated_at="2025-02-01T00:00:00+00:00")) != base
+
+    def test_fingerprint_combines_config_and_policy(self):
+        """Fingerprint changes when either the config or the policy version changes"""
+        version = policy_version(_launched_policy())
+        fingerprint = evaluation_fingerprint(config_digest({'Public': True}), version)
+
+        assert evaluation_fingerprint(config_digest({'Public': True}), version) == fingerprint
+        assert evaluation_fingerprint(config_digest({'Public': False}), version) != fingerprint
+        assert evaluation_fingerprint(config_digest({'Public': True}),
+                                      policy_version(_launched_policy(severity=10))) != fingerprint
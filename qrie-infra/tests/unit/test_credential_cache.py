@@ -0,0 +1,150 @@
+"""
+Unit tests for the assumed-role credential cache.
+"""
+import pytest
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from moto import mock_aws
+from unittest.mock import patch, MagicMock
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from common.credential_cache import CredentialCache
+
+ROLE_ARN = 'arn:aws:iam::123456789012:role/QrieInventoryRole'
+ISSUED_AT = 1_700_000_000.0
+
+
+@pytest.fixture
+def sts():
+    """STS client stub issuing one-hour credentials (from the patched clock) with a new key per call"""
+    client = MagicMock()
+    counter = iter(range(1000))
+
+    def assume_role(**kwargs):
+        return {'Credentials': {
+            'AccessKeyId': f"AKIA{next(counter)}",
+            'SecretAccessKey': 'secret',
+            'SessionToken': 'token',
+            'Expiration': datetime.fromtimestamp(time.time() + kwargs['DurationSeconds'], timezone.utc)
+        }}
+    client.assume_role.side_effect = assume_role
+    return client
+
+
+def _cache(sts, **kwargs):
+    cache = CredentialCache(**kwargs)
+    cache._sts = sts
+    return cache
+
+
+class TestCredentialCache:
+    """Test suite for session reuse, proactive refresh and counters"""
+
+    def test_sessions_reused_per_account_role_external_id(self, sts):
+        """One AssumeRole per (account, role, external ID) while credentials are fresh, for every region"""
+        cache = _cache(sts)
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT + 10):
+            first = cache.get_session('123456789012', ROLE_ARN, region='us-east-1', external_id='ext')
+            assert cache.get_session('123456789012', ROLE_ARN, region='us-east-1', external_id='ext') is first
+            regional = cache.get_session('123456789012', ROLE_ARN, region='eu-west-1', external_id='ext')
+            default = cache.get_session('123456789012', ROLE_ARN, external_id='ext')
+            other_external_id = cache.get_session('123456789012', ROLE_ARN, region='us-east-1')
+
+        assert regional.region_name == 'eu-west-1' and first.region_name == 'us-east-1'
+        assert regional.get_credentials().access_key == first.get_credentials().access_key
+        assert default is not first and other_external_id is not first
+        assert sts.assume_role.call_count == 2
+        assert sts.assume_role.call_args_list[0].kwargs['ExternalId'] == 'ext'
+        assert 'ExternalId' not in sts.assume_role.call_args_list[1].kwargs
+        assert cache.stats() == {'hits': 3, 'misses': 2, 'refreshes': 0, 'refresh_failures': 0}
+
+    def test_refreshed_in_background_before_expiry(self, sts):
+        """Inside the refresh margin the cached session is served while a new one is assumed"""
+        cache = _cache(sts, refresh_margin_seconds=300)
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT):
+            old = cache.get_session('123456789012', ROLE_ARN)
+
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT + 3600 - 200):
+            assert cache.get_session('123456789012', ROLE_ARN) is old
+            cache.wait_for_refreshes()
+            new = cache.get_session('123456789012', ROLE_ARN)
+
+        assert new is not old
+        assert new.get_credentials().access_key == 'AKIA1'
+        assert cache.stats()['refreshes'] == 1 and cache.stats()['misses'] == 1
+
+    def test_nearly_expired_credentials_refreshed_synchronously(self, sts):
+        """Credentials too close to expiry are never handed out; a failed refresh keeps the old session"""
+        cache = _cache(sts, refresh_margin_seconds=300, min_remaining_seconds=60)
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT):
+            old = cache.get_session('123456789012', ROLE_ARN)
+
+        sts.assume_role.side_effect = RuntimeError("Rate exceeded")
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT + 3600 - 200):
+            assert cache.get_session('123456789012', ROLE_ARN) is old
+            cache.wait_for_refreshes()
+        assert cache.stats()['refresh_failures'] == 1
+
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT + 3600 - 30):
+            with pytest.raises(RuntimeError):
+                cache.get_session('123456789012', ROLE_ARN)
+
+    def test_concurrent_misses_assume_once(self, sts):
+        """Callers missing together share one AssumeRole"""
+        cache = _cache(sts)
+        barrier = threading.Barrier(5, timeout=5)
+        sessions = []
+
+        def worker():
+            barrier.wait()
+            sessions.append(cache.get_session('123456789012', ROLE_ARN))
+
+        with patch('common.credential_cache.time.time', return_value=ISSUED_AT):
+            threads = [threading.Thread(target=worker) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert sts.assume_role.call_count == 1
+        assert len({id(session) for session in sessions}) == 1
+
+    def test_sts_client_created_once_from_own_session(self, sts):
+        """Concurrent first AssumeRoles share one STS client, built from a dedicated session"""
+        cache = CredentialCache()
+        barrier = threading.Barrier(5, timeout=5)
+
+        def worker(i):
+            barrier.wait()
+            cache.get_session(f"12345678901{i}", ROLE_ARN)
+
+        with patch('common.credential_cache.boto3.Session') as session_class, \
+             patch('common.credential_cache.boto3.client') as default_client, \
+             patch('common.credential_cache.time.time', return_value=ISSUED_AT):
+            session_class.return_value.client.return_value = sts
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        session_class.return_value.client.assert_called_once_with('sts')
+        default_client.assert_not_called()
+        assert sts.assume_role.call_count == 5
+
+    @mock_aws
+    def test_s3_client_uses_cached_session(self):
+        """Cross-account S3 clients stop assuming the role on every describe"""
+        from common.credential_cache import CREDENTIAL_CACHE
+        from services.s3_support import _get_cross_account_s3_client
+
+        _get_cross_account_s3_client('123456789012').list_buckets()
+        _get_cross_account_s3_client('123456789012').list_buckets()
+
+        assert CREDENTIAL_CACHE.stats()['misses'] == 1
+        assert CREDENTIAL_CACHE.stats()['hits'] == 1
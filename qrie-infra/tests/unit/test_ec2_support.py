@@ -0,0 +1,65 @@
+"""
+Unit tests for EC2 service support (event ARNs and instance describes).
+"""
+import pytest
+import boto3
+import sys
+import os
+from moto import mock_aws
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from services import ec2_support
+
+
+@pytest.fixture
+def instance():
+    """One running instance in eu-west-1 (moto), with its EC2 client"""
+    with mock_aws():
+        client = boto3.client('ec2', region_name='eu-west-1')
+        image_id = client.describe_images()['Images'][0]['ImageId']
+        instance_id = client.run_instances(ImageId=image_id, MinCount=1, MaxCount=1)['Instances'][0]['InstanceId']
+        yield client, f"arn:aws:ec2:eu-west-1:123456789012:instance/{instance_id}"
+
+
+class TestEC2Describe:
+    """Test suite for event-driven instance describes"""
+
+    def test_describe_matches_inventory(self, instance):
+        """A describe yields the same configuration the inventory listed"""
+        client, arn = instance
+
+        config = ec2_support.describe_resource(arn, '123456789012')
+
+        assert config == ec2_support.list_resources('123456789012', client)['resources'][0]
+        assert config['ARN'] == arn and config['Region'] == 'eu-west-1'
+
+    def test_missing_instance_is_permanent(self, instance):
+        """Instances that no longer exist raise ValueError (not retried)"""
+        client, _ = instance
+        with pytest.raises(ValueError):
+            ec2_support.describe_resource('arn:aws:ec2:eu-west-1:123456789012:instance/i-0123456789abcdef0',
+                                          '123456789012', client)
+
+    def test_other_resources_not_described(self):
+        """Only instances are inventoried; other EC2 resources are unsupported"""
+        with pytest.raises(NotImplementedError):
+            ec2_support.describe_resource('arn:aws:ec2:eu-west-1:123456789012:security-group/sg-1', '123456789012')
+
+
+class TestEC2EventArns:
+    """Test suite for ARNs extracted from CloudTrail instance events"""
+
+    def test_instances_from_request_and_response(self):
+        """Instance IDs come from the request (TerminateInstances) or the response (RunInstances)"""
+        base = {'awsRegion': 'eu-west-1', 'recipientAccountId': '123456789012'}
+        terminate = {**base, 'requestParameters': {'instancesSet': {'items': [
+            {'instanceId': 'i-1'}, {'instanceId': 'i-2'}]}}}
+        run = {**base, 'requestParameters': {'instancesSet': {'items': [{'imageId': 'ami-1'}]}},
+               'responseElements': {'instancesSet': {'items': [{'instanceId': 'i-3'}]}}}
+
+        assert ec2_support.extract_arns_from_event(terminate) == [
+            'arn:aws:ec2:eu-west-1:123456789012:instance/i-1', 'arn:aws:ec2:eu-west-1:123456789012:instance/i-2']
+        assert ec2_support.extract_arn_from_event(run) == 'arn:aws:ec2:eu-west-1:123456789012:instance/i-3'
+        assert ec2_support.extract_arns_from_event({'resources': [{'ARN': 'arn:x'}]}) == ['arn:x']
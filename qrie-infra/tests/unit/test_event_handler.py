@@ -0,0 +1,639 @@
+"""
+Unit tests for the event processor SQS handler.
+"""
+import pytest
+import json
+import sys
+import os
+import threading
+import importlib
+from unittest.mock import patch, MagicMock
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+
+def _record(message_id, bucket, event_time="2025-01-01T00:00:00Z", event_name="PutBucketVersioning"):
+    return {
+        'messageId': message_id,
+        'body': json.dumps({
+            'detail': {
+                'eventSource': 's3.amazonaws.com',
+                'eventName': event_name,
+                'eventTime': event_time,
+                'recipientAccountId': '123456789012',
+                'requestParameters': {'bucketName': bucket}
+            }
+        })
+    }
+
+
+@pytest.fixture
+def handler_env():
+    """Event handler with managers, describe and findings writer mocked"""
+    # Imported here so module-level boto3 resources see the test environment
+    event_handler = importlib.import_module('event_processor.event_handler')
+
+    inventory_manager = MagicMock()
+    inventory_manager.get_resource.return_value = None
+    inventory_manager.get_resource_snapshots.side_effect = \
+        lambda resources, include_configuration=False: {arn: None for arn, _ in resources}
+    policy_manager = MagicMock()
+    policy_manager.get_active_policies_for_service.return_value = []
+    findings_writer = MagicMock()
+    findings_writer.flush.return_value = {}
+    describe = MagicMock(return_value={'Versioning': 'Enabled'})
+    real_describe = event_handler._describe_resource
+    event_handler.RECENT_DESCRIBES.clear()
+
+    with patch.object(event_handler, 'InventoryManager', return_value=inventory_manager), \
+         patch.object(event_handler, 'PolicyManager', return_value=policy_manager), \
+         patch.object(event_handler, 'FindingsWriter', return_value=findings_writer), \
+         patch.object(event_handler, '_describe_resource', describe):
+        yield {
+            'handler': event_handler,
+            'policy_manager': policy_manager,
+            'inventory_manager': inventory_manager,
+            'findings_writer': findings_writer,
+            'describe': describe,
+            'real_describe': real_describe
+        }
+
+
+class TestProcessEvent:
+    """Test suite for concurrent record processing and partial batch failures"""
+
+    def test_successful_batch_reports_no_failures(self, handler_env):
+        """All records processed -> empty batchItemFailures and one findings flush"""
+        records = [_record(f"m{i}", f"bucket-{i}") for i in range(5)]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        assert handler_env['inventory_manager'].upsert_resource.call_count == 5
+        handler_env['findings_writer'].flush.assert_called_once()
+
+    def test_only_failed_records_reported(self, handler_env):
+        """Transient failures are reported for redelivery; malformed records are dropped"""
+        def describe(arn, account_id, service, stored_config=None):
+            if arn.endswith('throttled'):
+                raise RuntimeError("Rate exceeded")
+            return {'Versioning': 'Enabled'}
+        handler_env['describe'].side_effect = describe
+
+        malformed = {'messageId': 'bad', 'body': json.dumps({'detail': {'eventSource': 'sns.amazonaws.com'}})}
+        records = [_record('ok', 'bucket-ok'), _record('retry', 'bucket-throttled'), malformed]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'retry'}]}
+        handler_env['inventory_manager'].upsert_resource.assert_called_once()
+
+    def test_malformed_records_dropped_per_record(self, handler_env):
+        """Records without a body or with a non-object body are dropped without failing the batch"""
+        records = [
+            {'messageId': 'no-body'},
+            {'messageId': 'list-body', 'body': json.dumps(['not', 'an', 'event'])},
+            {'messageId': 'bad-detail', 'body': json.dumps({'detail': 'oops'})},
+            {'messageId': 'not-json', 'body': '{'},
+            _record('ok', 'bucket-ok'),
+        ]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        handler_env['inventory_manager'].upsert_resource.assert_called_once()
+
+    def test_failed_policy_evaluation_redelivers_without_inventory_write(self, handler_env):
+        """A policy that fails to evaluate redelivers the resource's records and keeps its old row"""
+        policy_manager = handler_env['policy_manager']
+        policy_manager.get_active_policies_for_service.return_value = [MagicMock(policy_id='P1'),
+                                                                       MagicMock(policy_id='P2')]
+        def evaluate(arn, config, describe_time_ms):
+            if arn.endswith('bad'):
+                raise RuntimeError("Throttled")
+            return {'compliant': True}
+        evaluators = {'P1': MagicMock(), 'P2': MagicMock()}
+        evaluators['P1'].evaluate.side_effect = evaluate
+        evaluators['P2'].evaluate.return_value = {'compliant': True}
+        policy_manager.create_policy_evaluator.side_effect = lambda policy_id, policy, context: evaluators[policy_id]
+
+        records = [_record('m-ok', 'bucket-ok'), _record('m-bad', 'bucket-bad')]
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm-bad'}]}
+        upserted = [call.kwargs['arn'] for call in handler_env['inventory_manager'].upsert_resource.call_args_list]
+        assert upserted == ['arn:aws:s3:::bucket-ok']
+        # The other policies are still evaluated
+        assert evaluators['P2'].evaluate.call_count == 2
+        assert not handler_env['handler'].RECENT_DESCRIBES.covers('arn:aws:s3:::bucket-bad', 0)
+
+    def test_unsupported_describe_dropped_not_redelivered(self, handler_env):
+        """Resources of services without describe support are dropped, not retried into the DLQ"""
+        handler_env['describe'].side_effect = handler_env['real_describe']
+        record = {
+            'messageId': 'iam',
+            'body': json.dumps({
+                'detail': {
+                    'eventSource': 'iam.amazonaws.com',
+                    'eventName': 'AttachUserPolicy',
+                    'eventTime': "2025-01-01T00:00:00Z",
+                    'recipientAccountId': '123456789012',
+                    'resources': [{'ARN': 'arn:aws:iam::123456789012:user/alice'}]
+                }
+            })
+        }
+
+        response = handler_env['handler'].process_event({'Records': [record]}, None)
+
+        assert response == {'batchItemFailures': []}
+        handler_env['describe'].assert_called_once()
+        handler_env['inventory_manager'].upsert_resource.assert_not_called()
+
+    def test_records_processed_concurrently(self, handler_env):
+        """Describe calls for different records overlap on the worker pool"""
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def describe(arn, account_id, service, stored_config=None):
+            with lock:
+                in_flight.append(arn)
+                peak.append(len(in_flight))
+            barrier.wait()  # Deadlocks (times out) unless 3 records run at once
+            with lock:
+                in_flight.remove(arn)
+            return {'Versioning': 'Enabled'}
+        handler_env['describe'].side_effect = describe
+
+        records = [_record(f"m{i}", f"bucket-{i}") for i in range(3)]
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        assert max(peak) == 3
+
+    def test_unwritten_findings_redeliver_without_inventory_write(self, handler_env):
+        """Resources whose findings fail to write keep their old row, so redelivery re-evaluates them"""
+        import boto3
+        from moto import mock_aws
+        from data_access.findings_manager import FindingsManager
+        from data_access.findings_writer import FindingsWriter
+        from policies.s3_bucket_public import S3BucketPublic, S3BucketPublicEvaluator
+        from policy_definition import ScopeConfig
+
+        policy_manager = handler_env['policy_manager']
+        policy_manager.get_active_policies_for_service.return_value = [S3BucketPublic]
+        policy_manager.create_policy_evaluator.side_effect = lambda policy_id, policy, context: \
+            S3BucketPublicEvaluator(policy_id, 90, ScopeConfig()).with_context(context)
+        handler_env['describe'].return_value = {'PublicAccessBlockConfiguration': None}
+
+        with mock_aws():
+            table = boto3.resource('dynamodb', region_name='us-east-1').create_table(
+                TableName='test-findings',
+                KeySchema=[{'AttributeName': 'ARN', 'KeyType': 'HASH'}, {'AttributeName': 'Policy', 'KeyType': 'RANGE'}],
+                AttributeDefinitions=[{'AttributeName': 'ARN', 'AttributeType': 'S'},
+                                      {'AttributeName': 'Policy', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            update_item = table.update_item
+
+            def failing_update(**kwargs):
+                if kwargs['Key']['ARN'] == 'arn:aws:s3:::bucket-bad':
+                    raise RuntimeError("ProvisionedThroughputExceededException")
+                return update_item(**kwargs)
+
+            with patch('data_access.findings_manager.get_findings_table', return_value=table), \
+                 patch('data_access.findings_manager.get_summary_table', return_value=MagicMock()), \
+                 patch.object(table, 'update_item', side_effect=failing_update), \
+                 patch.object(handler_env['handler'], 'FindingsWriter', side_effect=lambda: FindingsWriter(FindingsManager())):
+                records = [_record('m-ok', 'bucket-ok'), _record('m-bad', 'bucket-bad')]
+                response = handler_env['handler'].process_event({'Records': records}, None)
+
+            assert response == {'batchItemFailures': [{'itemIdentifier': 'm-bad'}]}
+            upserted = [call.kwargs['arn'] for call in handler_env['inventory_manager'].upsert_resource.call_args_list]
+            assert upserted == ['arn:aws:s3:::bucket-ok']
+            assert table.get_item(Key={'ARN': 'arn:aws:s3:::bucket-ok', 'Policy': 'S3BucketPublic'})['Item']['State'] == 'ACTIVE'
+            assert not handler_env['handler'].RECENT_DESCRIBES.covers('arn:aws:s3:::bucket-bad', 0)
+
+
+class TestBulkInventoryRead:
+    """Test suite for the batched stale/change check"""
+
+    def test_one_bulk_read_per_batch(self, handler_env):
+        """All pending resources are read in one call instead of a GetItem each"""
+        records = [_record(f"m{i}", f"bucket-{i}") for i in range(4)]
+
+        handler_env['handler'].process_event({'Records': records}, None)
+
+        inventory_manager = handler_env['inventory_manager']
+        inventory_manager.get_resource_snapshots.assert_called_once()
+        # S3 ARNs have no account; the event's recipient account keys the inventory row
+        assert sorted(inventory_manager.get_resource_snapshots.call_args.args[0]) == \
+            [(f"arn:aws:s3:::bucket-{i}", '123456789012') for i in range(4)]
+        inventory_manager.get_resource.assert_not_called()
+
+    def test_snapshots_drive_stale_and_change_checks(self, handler_env):
+        """Stale events skip the describe; an unchanged digest skips the inventory write"""
+        from config_digest import config_digest
+        current = {'Versioning': 'Enabled'}
+        handler_env['inventory_manager'].get_resource_snapshots.side_effect = lambda resources, **kwargs: {
+            'arn:aws:s3:::stale': {'LastSeenAt': 4102444800000, 'ConfigDigest': 'x'},
+            'arn:aws:s3:::unchanged': {'LastSeenAt': 0, 'ConfigDigest': config_digest(current)},
+            'arn:aws:s3:::changed': {'LastSeenAt': 0, 'ConfigDigest': config_digest({'Versioning': 'Suspended'})},
+        }
+        records = [_record('m1', 'stale'), _record('m2', 'unchanged'), _record('m3', 'changed'), _record('m4', 'unread')]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        described = sorted(call.args[0] for call in handler_env['describe'].call_args_list)
+        assert described == ['arn:aws:s3:::changed', 'arn:aws:s3:::unchanged', 'arn:aws:s3:::unread']
+        upserted = sorted(call.kwargs['arn'] for call in handler_env['inventory_manager'].upsert_resource.call_args_list)
+        assert upserted == ['arn:aws:s3:::changed', 'arn:aws:s3:::unread']
+        # Resources the bulk read did not resolve fall back to a single read
+        handler_env['inventory_manager'].get_resource.assert_called_once_with('arn:aws:s3:::unread', '123456789012')
+
+
+class TestPartialRefresh:
+    """Test suite for event-name-aware partial describes"""
+
+    STORED = {'Name': 'bucket-a', 'ARN': 'arn:aws:s3:::bucket-a', 'Location': 'us-east-1',
+              'Versioning': 'Suspended', 'MFADelete': 'Disabled', 'Encryption': None}
+
+    @pytest.fixture
+    def stored(self, handler_env):
+        from config_digest import config_digest
+        handler_env['inventory_manager'].get_resource_snapshots.side_effect = lambda resources, **kwargs: {
+            'arn:aws:s3:::bucket-a': {'LastSeenAt': 1000, 'ConfigDigest': config_digest(self.STORED),
+                                      'Configuration': dict(self.STORED)}
+        }
+        return handler_env
+
+    def test_event_refreshes_only_affected_sections(self, stored):
+        """PutBucketVersioning re-describes versioning and merges it into the stored config"""
+        stored['describe'].return_value = {'Name': 'bucket-a', 'ARN': 'arn:aws:s3:::bucket-a',
+                                           'Versioning': 'Enabled', 'MFADelete': 'Disabled'}
+        inventory_manager = stored['inventory_manager']
+
+        response = stored['handler'].process_event({'Records': [_record('m1', 'bucket-a')]}, None)
+
+        assert response == {'batchItemFailures': []}
+        assert stored['describe'].call_args.kwargs['sections'] == {'Versioning'}
+        update = inventory_manager.update_resource_configuration.call_args.kwargs
+        assert update['configuration'] == {**self.STORED, 'Versioning': 'Enabled'}
+        assert update['expected_last_seen_ms'] == 1000
+        inventory_manager.upsert_resource.assert_not_called()
+
+    def test_events_outside_inventoried_config_skip_describe(self, stored):
+        """Bucket policy changes touch nothing kept in inventory"""
+        response = stored['handler'].process_event(
+            {'Records': [_record('m1', 'bucket-a', event_name='PutBucketPolicy')]}, None)
+
+        assert response == {'batchItemFailures': []}
+        stored['describe'].assert_not_called()
+
+    def test_unmapped_or_new_resources_fully_described(self, stored):
+        """Unmapped events and resources not yet in inventory get a full describe"""
+        records = [_record('m1', 'bucket-a', event_name='CreateBucket'), _record('m2', 'bucket-new')]
+
+        stored['handler'].process_event({'Records': records}, None)
+
+        assert [call.kwargs.get('sections') for call in stored['describe'].call_args_list] == [None, None]
+        assert stored['inventory_manager'].upsert_resource.call_count == 2
+
+    def test_only_policies_reading_changed_paths_evaluated(self, stored):
+        """A versioning change re-evaluates versioning policies, not public access"""
+        from policies.s3_bucket_public import S3BucketPublic
+        from policies.s3_bucket_versioning import S3BucketVersioningDisabled
+        from policies.s3_bucket_mfa_delete_disabled import S3BucketMfaDeleteDisabled
+        definitions = {d.policy_id: d for d in (S3BucketPublic, S3BucketVersioningDisabled, S3BucketMfaDeleteDisabled)}
+        policy_manager = stored['policy_manager']
+        policy_manager.get_active_policies_for_service.return_value = list(definitions.values())
+        policy_manager.get_policy_definition.side_effect = definitions.get
+        stored['describe'].return_value = {'Versioning': 'Enabled'}
+        handler = stored['handler']
+        skipped_before = handler.EVALUATION_STATS['skipped_unaffected']
+
+        handler.process_event({'Records': [_record('m1', 'bucket-a')]}, None)
+
+        evaluated = sorted(call.args[0] for call in policy_manager.create_policy_evaluator.call_args_list)
+        assert evaluated == ['S3BucketMfaDeleteDisabled', 'S3BucketVersioningDisabled']
+        assert handler.EVALUATION_STATS['skipped_unaffected'] - skipped_before == 1
+
+    def test_full_describe_diffs_by_section_digest(self, stored):
+        """Full describes read no stored configuration; section digests scope re-evaluation"""
+        from config_digest import config_digest, section_digests
+        from policies.s3_bucket_public import S3BucketPublic
+        from policies.s3_bucket_versioning import S3BucketVersioningDisabled
+        definitions = {d.policy_id: d for d in (S3BucketPublic, S3BucketVersioningDisabled)}
+        policy_manager = stored['policy_manager']
+        policy_manager.get_active_policies_for_service.return_value = list(definitions.values())
+        policy_manager.get_policy_definition.side_effect = definitions.get
+        inventory_manager = stored['inventory_manager']
+        inventory_manager.get_resource_snapshots.side_effect = lambda resources, include_configuration=False: {
+            'arn:aws:s3:::bucket-a': {'LastSeenAt': 1000, 'ConfigDigest': config_digest(self.STORED),
+                                      'SectionDigests': section_digests(self.STORED)}
+        }
+        stored['describe'].return_value = {**self.STORED, 'Versioning': 'Enabled'}
+
+        stored['handler'].process_event({'Records': [_record('m1', 'bucket-a', event_name='CreateBucket')]}, None)
+
+        assert inventory_manager.get_resource_snapshots.call_args.kwargs.get('include_configuration', False) is False
+        evaluated = [call.args[0] for call in policy_manager.create_policy_evaluator.call_args_list]
+        assert evaluated == ['S3BucketVersioningDisabled']
+
+    def test_concurrent_row_change_redelivers(self, stored):
+        """A row changed since it was read is retried rather than overwritten"""
+        stored['describe'].return_value = {'Versioning': 'Enabled'}
+        stored['inventory_manager'].update_resource_configuration.return_value = False
+
+        response = stored['handler'].process_event({'Records': [_record('m1', 'bucket-a')]}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+
+
+class TestDeletionFastPath:
+    """Test suite for deletion events handled without describes"""
+
+    def test_delete_event_removes_inventory_and_findings(self, handler_env):
+        """DeleteBucket removes the row and findings in batch and never calls the customer account"""
+        handler_env['findings_writer'].findings_manager.delete_findings_for_resources.return_value = 3
+        records = [
+            _record('m1', 'bucket-a', "2025-01-01T00:00:01Z"),
+            _record('m2', 'bucket-a', "2025-01-01T00:00:02Z", 'DeleteBucket'),
+            _record('m3', 'bucket-b', "2025-01-01T00:00:01Z", 'DeleteBucket'),
+        ]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        handler_env['describe'].assert_not_called()
+        handler_env['inventory_manager'].delete_resources.assert_called_once_with(
+            [('arn:aws:s3:::bucket-a', '123456789012'), ('arn:aws:s3:::bucket-b', '123456789012')])
+        handler_env['findings_writer'].findings_manager.delete_findings_for_resources.assert_called_once_with(
+            ['arn:aws:s3:::bucket-a', 'arn:aws:s3:::bucket-b'])
+
+    def test_terminate_instances_deletes_every_instance(self, handler_env):
+        """TerminateInstances naming several instances removes each of them, and is reported once on failure"""
+        record = {
+            'messageId': 'm1',
+            'body': json.dumps({
+                'detail': {
+                    'eventSource': 'ec2.amazonaws.com',
+                    'eventName': 'TerminateInstances',
+                    'eventTime': "2025-01-01T00:00:01Z",
+                    'awsRegion': 'eu-west-1',
+                    'recipientAccountId': '123456789012',
+                    'requestParameters': {'instancesSet': {'items': [
+                        {'instanceId': 'i-0aaa'}, {'instanceId': 'i-0bbb'}
+                    ]}}
+                }
+            })
+        }
+        arns = ['arn:aws:ec2:eu-west-1:123456789012:instance/i-0aaa',
+                'arn:aws:ec2:eu-west-1:123456789012:instance/i-0bbb']
+
+        response = handler_env['handler'].process_event({'Records': [record]}, None)
+
+        assert response == {'batchItemFailures': []}
+        handler_env['describe'].assert_not_called()
+        handler_env['inventory_manager'].delete_resources.assert_called_once_with(
+            [(arn, '123456789012') for arn in arns])
+        handler_env['findings_writer'].findings_manager.delete_findings_for_resources.assert_called_once_with(arns)
+
+        handler_env['inventory_manager'].delete_resources.side_effect = RuntimeError("throttled")
+        response = handler_env['handler'].process_event({'Records': [record]}, None)
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+
+    def test_recreated_or_stale_deletions_skipped(self, handler_env):
+        """A later event re-describes a re-created bucket; deletions older than the snapshot are stale"""
+        handler_env['inventory_manager'].get_resource_snapshots.side_effect = lambda resources, **kwargs: {
+            'arn:aws:s3:::described-since': {'LastSeenAt': 4102444800000, 'ConfigDigest': 'x'},
+        }
+        records = [
+            _record('m1', 'recreated', "2025-01-01T00:00:01Z", 'DeleteBucket'),
+            _record('m2', 'recreated', "2025-01-01T00:00:02Z", 'CreateBucket'),
+            _record('m3', 'described-since', "2025-01-01T00:00:01Z", 'DeleteBucket'),
+        ]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        assert [call.args[0] for call in handler_env['describe'].call_args_list] == ['arn:aws:s3:::recreated']
+        handler_env['inventory_manager'].delete_resources.assert_not_called()
+
+    def test_failed_deletion_redelivers_records(self, handler_env):
+        """A failed batch delete reports the deletion records for redelivery"""
+        handler_env['inventory_manager'].delete_resources.side_effect = RuntimeError("DynamoDB unavailable")
+        records = [_record('m1', 'bucket-a', event_name='DeleteBucket'), _record('m2', 'bucket-b')]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+
+    def test_findings_deleted_before_inventory(self, handler_env):
+        """Inventory rows outlive their findings, so a failed findings delete leaves nothing orphaned"""
+        findings_manager = handler_env['findings_writer'].findings_manager
+        findings_manager.delete_findings_for_resources.side_effect = RuntimeError("Throttled")
+        records = [_record('m1', 'bucket-a', event_name='DeleteBucket')]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+        handler_env['inventory_manager'].delete_resources.assert_not_called()
+
+        # Redelivery deletes both
+        findings_manager.delete_findings_for_resources.side_effect = None
+        findings_manager.delete_findings_for_resources.return_value = 1
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        handler_env['inventory_manager'].delete_resources.assert_called_once_with(
+            [('arn:aws:s3:::bucket-a', '123456789012')])
+
+
+class TestOrderedEvents:
+    """Test suite for the FIFO pipeline (events ordered per resource)"""
+
+    def test_full_refresh_skips_inventory_read(self, handler_env):
+        """Ordered events describe without a prior read; the upsert's previous snapshot drives change detection"""
+        from config_digest import config_digest
+        inventory_manager = handler_env['inventory_manager']
+        inventory_manager.upsert_resource_returning_previous.side_effect = lambda arn, **kwargs: {
+            'arn:aws:s3:::unchanged': (True, {'LastSeenAt': 1, 'ConfigDigest': config_digest({'Versioning': 'Enabled'})}),
+            'arn:aws:s3:::changed': (True, {'LastSeenAt': 1, 'ConfigDigest': 'old'}),
+            'arn:aws:s3:::newer-in-inventory': (False, None),
+        }[arn]
+        policy = MagicMock(policy_id='P1')
+        handler_env['policy_manager'].get_active_policies_for_service.return_value = [policy]
+        handler_env['policy_manager'].get_policy_definition.return_value = None
+        records = [_record(f"m{i}", bucket, event_name='CreateBucket')  # Unmapped: full describe
+                   for i, bucket in enumerate(['unchanged', 'changed', 'newer-in-inventory'])]
+
+        with patch.object(handler_env['handler'], 'EVENTS_ORDERED', True):
+            response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        inventory_manager.get_resource_snapshots.assert_not_called()
+        inventory_manager.get_resource.assert_not_called()
+        assert handler_env['describe'].call_count == 3
+        evaluated = [call.args[0] for call in
+                     handler_env['policy_manager'].create_policy_evaluator.return_value.evaluate.call_args_list]
+        assert evaluated == ['arn:aws:s3:::changed']
+
+    def test_unwritten_findings_revert_ordered_write(self, handler_env):
+        """Ordered writes happen before evaluation, so they are reverted when the findings fail"""
+        from data_access.findings_writer import FindingsFlushError
+        inventory_manager = handler_env['inventory_manager']
+        previous = {'LastSeenAt': 1, 'ConfigDigest': 'old'}
+        inventory_manager.upsert_resource_returning_previous.return_value = (True, previous)
+        handler_env['findings_writer'].flush.side_effect = FindingsFlushError(
+            [('arn:aws:s3:::bucket-a', 'P1')], {'errors': 1})
+
+        with patch.object(handler_env['handler'], 'EVENTS_ORDERED', True):
+            response = handler_env['handler'].process_event(
+                {'Records': [_record('m1', 'bucket-a', event_name='CreateBucket')]}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+        describe_time = inventory_manager.upsert_resource_returning_previous.call_args.kwargs['describe_time_ms']
+        inventory_manager.revert_upsert.assert_called_once_with(
+            '123456789012', 's3', 'arn:aws:s3:::bucket-a', describe_time, previous)
+
+    def test_failed_evaluation_reverts_ordered_write(self, handler_env):
+        """Ordered writes are reverted when a policy fails to evaluate, and the record redelivered"""
+        inventory_manager = handler_env['inventory_manager']
+        previous = {'LastSeenAt': 1, 'ConfigDigest': 'old'}
+        inventory_manager.upsert_resource_returning_previous.return_value = (True, previous)
+        handler_env['policy_manager'].get_active_policies_for_service.return_value = [MagicMock(policy_id='P1')]
+        handler_env['policy_manager'].get_policy_definition.return_value = None
+        handler_env['policy_manager'].create_policy_evaluator.return_value.evaluate.side_effect = RuntimeError("boom")
+
+        with patch.object(handler_env['handler'], 'EVENTS_ORDERED', True):
+            response = handler_env['handler'].process_event(
+                {'Records': [_record('m1', 'bucket-a', event_name='CreateBucket')]}, None)
+
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+        describe_time = inventory_manager.upsert_resource_returning_previous.call_args.kwargs['describe_time_ms']
+        inventory_manager.revert_upsert.assert_called_once_with(
+            '123456789012', 's3', 'arn:aws:s3:::bucket-a', describe_time, previous)
+
+    def test_partial_refresh_still_reads_merge_base(self, handler_env):
+        """Events mapped to config sections still read the stored configuration they merge into"""
+        with patch.object(handler_env['handler'], 'EVENTS_ORDERED', True):
+            handler_env['handler'].process_event({'Records': [_record('m1', 'bucket-a')]}, None)
+
+        handler_env['inventory_manager'].get_resource_snapshots.assert_called_once_with(
+            [('arn:aws:s3:::bucket-a', '123456789012')], include_configuration=True)
+
+    def test_grouper_tags_events_with_resource(self):
+        """The pipe enrichment adds the resource ARN used as MessageGroupId"""
+        from event_processor.event_grouper import lambda_handler, message_group_id, GROUP_KEY, UNGROUPED
+
+        records = [_record('m1', 'bucket-a'), {'messageId': 'bad', 'body': '{"detail": {}}'}]
+        enriched = lambda_handler(records, None)
+
+        assert [body[GROUP_KEY] for body in enriched] == ['arn:aws:s3:::bucket-a', UNGROUPED]
+        assert enriched[0]['detail']['eventName'] == 'PutBucketVersioning'
+        assert len(message_group_id('arn:aws:s3:::' + 'b' * 200)) <= 128
+
+
+class TestEventFilter:
+    """Test suite for dropping events that cannot change evaluated state"""
+
+    def test_untracked_events_dropped_before_lookups(self, handler_env):
+        """Read-only, section-less and untracked events never reach ARN extraction or inventory"""
+        handler = handler_env['handler']
+        totals_before = dict(handler.FILTERED_EVENTS)
+        records = [
+            _record('m1', 'bucket-a', event_name='GetBucketAcl'),
+            _record('m2', 'bucket-a', event_name='PutBucketTagging'),
+            _record('m3', 'bucket-a', event_name='PutBucketTagging'),
+            _record('m4', 'bucket-b', event_name='PutBucketInventoryConfiguration'),
+        ]
+
+        with patch.object(handler, '_extract_arns_from_event') as extract:
+            response = handler.process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        extract.assert_not_called()
+        handler_env['inventory_manager'].get_resource_snapshots.assert_not_called()
+        assert handler.FILTERED_EVENTS['PutBucketTagging'] - totals_before.get('PutBucketTagging', 0) == 2
+
+    def test_compiled_filter_tables(self):
+        """Services with TRACKED_EVENTS allow only known events; others deny read-only calls only"""
+        from services import accepts_event
+
+        assert accepts_event('s3', 'CreateBucket') and accepts_event('s3', 'DeleteBucket')
+        assert accepts_event('s3', 'PutBucketVersioning')
+        assert not accepts_event('s3', 'PutBucketPolicy')  # Mapped to no inventoried section
+        assert not accepts_event('s3', 'PutBucketWebsite')  # Untracked
+        assert accepts_event('iam', 'AttachRolePolicy')
+        assert not accepts_event('iam', 'GetRole')
+
+
+class TestEventCoalescing:
+    """Test suite for per-ARN coalescing within a batch and across invocations"""
+
+    def test_burst_for_one_resource_described_once(self, handler_env):
+        """Records for the same ARN collapse into one describe at the latest event time"""
+        records = [
+            _record('m1', 'bucket-a', "2025-01-01T00:00:01Z", 'PutBucketEncryption'),
+            _record('m2', 'bucket-a', "2025-01-01T00:00:03Z", 'PutBucketPublicAccessBlock'),
+            _record('m3', 'bucket-a', "2025-01-01T00:00:02Z", 'PutBucketVersioning'),
+            _record('m4', 'bucket-b'),
+        ]
+        stats_before = dict(handler_env['handler'].COALESCE_STATS)
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert response == {'batchItemFailures': []}
+        described = sorted(call.args[0] for call in handler_env['describe'].call_args_list)
+        assert described == ['arn:aws:s3:::bucket-a', 'arn:aws:s3:::bucket-b']
+        stats = handler_env['handler'].COALESCE_STATS
+        assert stats['describes_saved_batch'] - stats_before['describes_saved_batch'] == 2
+
+    def test_failed_group_reports_every_record(self, handler_env):
+        """When a coalesced resource fails, all of its records are redelivered"""
+        handler_env['describe'].side_effect = RuntimeError("Rate exceeded")
+        records = [_record('m1', 'bucket-a'), _record('m2', 'bucket-a', "2025-01-01T00:00:05Z")]
+
+        response = handler_env['handler'].process_event({'Records': records}, None)
+
+        assert sorted(f['itemIdentifier'] for f in response['batchItemFailures']) == ['m1', 'm2']
+
+    def test_recent_describe_suppresses_covered_events(self, handler_env):
+        """Events at or before a recent describe skip the inventory read and describe"""
+        handler = handler_env['handler']
+        handler.process_event({'Records': [_record('m1', 'bucket-a', "2025-01-01T00:00:00Z")]}, None)
+        assert handler_env['describe'].call_count == 1
+        stats_before = dict(handler.COALESCE_STATS)
+
+        # Next invocation: a late-delivered event from before the describe
+        handler.process_event({'Records': [_record('m2', 'bucket-a', "2025-01-01T00:00:30Z")]}, None)
+
+        assert handler_env['describe'].call_count == 1
+        assert handler_env['inventory_manager'].get_resource_snapshots.call_count == 1
+        assert handler.COALESCE_STATS['describes_saved_window'] - stats_before['describes_saved_window'] == 1
+
+    def test_events_after_recent_describe_still_described(self, handler_env):
+        """A change made after the remembered snapshot is never suppressed"""
+        handler = handler_env['handler']
+        handler.process_event({'Records': [_record('m1', 'bucket-a', "2025-01-01T00:00:00Z")]}, None)
+
+        handler.process_event({'Records': [_record('m2', 'bucket-a', "2099-01-01T00:00:00Z")]}, None)
+
+        assert handler_env['describe'].call_count == 2
+
+    def test_recent_describes_window_expiry(self):
+        """Remembered snapshots expire after the window and keep the newest snapshot time"""
+        from event_processor.event_coalescer import RecentDescribes
+
+        recent = RecentDescribes(window_seconds=60)
+        with patch('event_processor.event_coalescer.time.monotonic', return_value=1000.0):
+            recent.record('arn', 5000)
+            recent.record('arn', 4000)
+            assert recent.covers('arn', 5000) and not recent.covers('arn', 5001)
+        with patch('event_processor.event_coalescer.time.monotonic', return_value=1061.0):
+            assert not recent.covers('arn', 100)
+        assert not RecentDescribes(window_seconds=0).covers('arn', 0)
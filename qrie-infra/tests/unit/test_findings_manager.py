@@ -364,6 +364,24 @@ class TestFindingsManager:
         findings = findings_manager.get_findings_for_resource(arn)
         assert len(findings) == 0
 
+    def test_delete_findings_for_resources_paginates(self, findings_manager):
+        """Every page of every resource's findings is deleted; other resources are untouched"""
+        account_service = "123456789012_s3"
+        now = int(time.time() * 1000)
+        for i in range(3):
+            findings_manager.put_finding("arn:aws:s3:::bucket-a", f"policy{i}", account_service, 50, "ACTIVE", {}, now)
+        findings_manager.put_finding("arn:aws:s3:::bucket-b", "policy0", account_service, 50, "ACTIVE", {}, now)
+        findings_manager.put_finding("arn:aws:s3:::bucket-c", "policy0", account_service, 50, "ACTIVE", {}, now)
+        
+        query = findings_manager.table.query
+        with patch.object(findings_manager.table, 'query', side_effect=lambda **kwargs: query(Limit=1, **kwargs)) as paged:
+            deleted = findings_manager.delete_findings_for_resources(["arn:aws:s3:::bucket-a", "arn:aws:s3:::bucket-b"])
+        
+        assert deleted == 4
+        assert paged.call_count > 2
+        assert findings_manager.get_findings_for_resource("arn:aws:s3:::bucket-a") == []
+        assert len(findings_manager.get_findings_for_resource("arn:aws:s3:::bucket-c")) == 1
+
     def test_finding_dataclass(self):
         """Test Finding dataclass functionality"""
         finding = Finding(
@@ -0,0 +1,322 @@
+"""
+Unit tests for FindingsWriter (buffered, batched finding persistence).
+"""
+import pytest
+import boto3
+from moto import mock_aws
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from data_access.findings_manager import FindingsManager
+from data_access.findings_writer import FindingsWriter, FindingsFlushError
+from policies.s3_bucket_public import S3BucketPublicEvaluator
+from policy_definition import EvaluationContext, ScopeConfig
+
+
+@pytest.fixture
+def findings_table():
+    """Mock findings table"""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='test-findings',
+            KeySchema=[
+                {'AttributeName': 'ARN', 'KeyType': 'HASH'},
+                {'AttributeName': 'Policy', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'ARN', 'AttributeType': 'S'},
+                {'AttributeName': 'Policy', 'AttributeType': 'S'},
+                {'AttributeName': 'AccountService', 'AttributeType': 'S'},
+                {'AttributeName': 'State', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'AccountService-State-index',
+                    'KeySchema': [
+                        {'AttributeName': 'AccountService', 'KeyType': 'HASH'},
+                        {'AttributeName': 'State', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield table
+
+
+@pytest.fixture
+def findings_manager(findings_table):
+    """FindingsManager bound to the mock findings table"""
+    with patch('data_access.findings_manager.get_findings_table', return_value=findings_table), \
+         patch('data_access.findings_manager.get_summary_table', return_value=MagicMock()):
+        return FindingsManager()
+
+
+class TestFindingsWriter:
+    """Test suite for FindingsWriter"""
+
+    def test_nothing_written_until_flush(self, findings_manager):
+        """Outcomes are buffered and written on flush"""
+        writer = FindingsWriter(findings_manager, batch_size=2, flush_workers=3)
+
+        for i in range(5):
+            writer.put_finding(f"arn:aws:s3:::bucket-{i}", "S3BucketPublic", "123456789012_s3",
+                               90, "ACTIVE", {"i": i}, 1000)
+
+        assert writer.pending_count() == 5
+        assert findings_manager.table.scan()['Count'] == 0
+
+        stats = writer.flush()
+
+        assert stats['puts'] == 5
+        assert stats['errors'] == 0
+        assert writer.pending_count() == 0
+        assert findings_manager.table.scan()['Count'] == 5
+
+    def test_coalesces_to_newest_describe_time(self, findings_manager):
+        """Only the newest outcome per (ARN, Policy) is written"""
+        writer = FindingsWriter(findings_manager)
+        arn = "arn:aws:s3:::bucket"
+
+        writer.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {"v": "newer"}, 2000)
+        writer.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {"v": "older"}, 1000)
+        stats = writer.flush()
+
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['Evidence'] == {"v": "newer"}
+        assert item['DescribeTime'] == 2000
+        assert stats['coalesced'] == 1
+        assert stats['puts'] == 1
+
+    def test_describe_time_monotonic_guarantee(self, findings_manager):
+        """Flushed puts never overwrite a finding captured from a newer config"""
+        arn = "arn:aws:s3:::bucket"
+        findings_manager.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {"v": "stored"}, 5000)
+
+        writer = FindingsWriter(findings_manager)
+        writer.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {"v": "stale"}, 4000)
+        writer.flush()
+
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['Evidence'] == {"v": "stored"}
+        assert item['DescribeTime'] == 5000
+
+    def test_close_finding(self, findings_manager):
+        """Buffered closes resolve existing findings"""
+        arn = "arn:aws:s3:::bucket"
+        findings_manager.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {}, 1000)
+
+        writer = FindingsWriter(findings_manager)
+        writer.close_finding(arn, "S3BucketPublic", 2000)
+        stats = writer.flush()
+
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'RESOLVED'
+        assert stats['closes'] == 1
+
+    def test_out_of_order_close_keeps_newer_finding(self, findings_manager):
+        """A close captured from an older config does not resolve a newer ACTIVE finding"""
+        arn = "arn:aws:s3:::bucket"
+        findings_manager.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {}, 5000)
+
+        writer = FindingsWriter(findings_manager)
+        writer.close_finding(arn, "S3BucketPublic", 4000)
+        writer.flush()
+
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'ACTIVE'
+        assert item['DescribeTime'] == 5000
+
+    def test_close_blocks_older_reopen(self, findings_manager):
+        """A close records its describe time, so an older put cannot reopen the finding"""
+        arn = "arn:aws:s3:::bucket"
+        findings_manager.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {}, 1000)
+
+        writer = FindingsWriter(findings_manager)
+        writer.close_finding(arn, "S3BucketPublic", 3000)
+        writer.flush()
+        writer.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {}, 2000)
+        writer.flush()
+
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'RESOLVED'
+        assert item['DescribeTime'] == 3000
+
+    def test_close_without_finding_writes_nothing(self, findings_manager):
+        """Closing a pair that never had a finding does not create a RESOLVED stub"""
+        writer = FindingsWriter(findings_manager)
+        writer.close_finding("arn:aws:s3:::compliant", "S3BucketPublic", 1000)
+        stats = writer.flush()
+
+        assert findings_manager.table.scan()['Count'] == 0
+        assert stats['errors'] == 0
+
+    def test_same_describe_time_reevaluation_wins(self, findings_manager):
+        """Re-evaluating the same config (e.g. after a policy change) can close and reopen"""
+        arn = "arn:aws:s3:::bucket"
+        findings_manager.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {}, 1000)
+
+        writer = FindingsWriter(findings_manager)
+        writer.close_finding(arn, "S3BucketPublic", 1000)
+        writer.flush()
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'RESOLVED'
+
+        writer.put_finding(arn, "S3BucketPublic", "123456789012_s3", 90, "ACTIVE", {}, 1000)
+        writer.flush()
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'ACTIVE'
+
+    def test_auto_flush_threshold(self):
+        """Buffer flushes automatically when it reaches the threshold"""
+        manager = MagicMock()
+        writer = FindingsWriter(manager, auto_flush_threshold=3)
+
+        for i in range(3):
+            writer.close_finding(f"arn:aws:s3:::bucket-{i}", "S3BucketPublic", 1000)
+
+        assert writer.pending_count() == 0
+        assert manager.close_finding.call_count == 3
+
+    def test_write_errors_raise_with_failed_keys(self):
+        """A failing write does not drop the rest of the batch; flush raises with the keys not written"""
+        manager = MagicMock()
+        manager.close_finding.side_effect = [RuntimeError("throttled"), None]
+        writer = FindingsWriter(manager)
+
+        writer.close_finding("arn:aws:s3:::a", "S3BucketPublic", 1000)
+        writer.close_finding("arn:aws:s3:::b", "S3BucketPublic", 1000)
+        with pytest.raises(FindingsFlushError) as raised:
+            writer.flush()
+
+        assert raised.value.failed == [("arn:aws:s3:::a", "S3BucketPublic")]
+        assert raised.value.stats['errors'] == 1
+        assert raised.value.stats['closes'] == 1
+        # Reported once
+        assert writer.flush()['errors'] == 1
+
+    def test_auto_flush_errors_raised_by_next_flush(self):
+        """Failures of automatic flushes surface on the caller's flush"""
+        manager = MagicMock()
+        manager.close_finding.side_effect = RuntimeError("throttled")
+        writer = FindingsWriter(manager, auto_flush_threshold=2)
+
+        writer.close_finding("arn:aws:s3:::a", "S3BucketPublic", 1000)
+        writer.close_finding("arn:aws:s3:::b", "S3BucketPublic", 1000)
+        assert writer.pending_count() == 0
+
+        with pytest.raises(FindingsFlushError) as raised:
+            writer.flush()
+        assert raised.value.failed_arns == {"arn:aws:s3:::a", "arn:aws:s3:::b"}
+
+    def test_evaluator_routes_through_context_writer(self, mocker):
+        """Evaluators bound to a context buffer outcomes instead of writing directly"""
+        direct_manager = mocker.patch('data_access.findings_manager.FindingsManager')
+        writer = FindingsWriter(MagicMock())
+        evaluator = S3BucketPublicEvaluator("S3BucketPublic", 90, ScopeConfig())
+        bound = evaluator.with_context(EvaluationContext(findings_writer=writer))
+
+        result = bound.evaluate("arn:aws:s3:::bucket", {'Name': 'bucket'}, 1000)
+
+        assert result['compliant'] is False
+        assert writer.pending_count() == 1
+        direct_manager.assert_not_called()
+        # Binding returns a copy - the original evaluator is untouched
+        assert evaluator.context is None
+
+
+class TestTransitionOnlyWrites:
+    """Test that a context with preloaded finding state writes only on transitions"""
+
+    PUBLIC = {'Name': 'bucket', 'PublicAccessBlockConfiguration': {'BlockPublicAcls': False}}
+    PRIVATE = {'Name': 'bucket', 'PublicAccessBlockConfiguration': {
+        'BlockPublicAcls': True, 'IgnorePublicAcls': True,
+        'BlockPublicPolicy': True, 'RestrictPublicBuckets': True
+    }}
+
+    @pytest.fixture
+    def bind(self, findings_manager):
+        """Bind a fresh evaluator to a context preloading state from the mock table"""
+        def _bind():
+            writer = FindingsWriter(findings_manager)
+            context = EvaluationContext(
+                findings_writer=writer,
+                findings_state_loader=findings_manager.get_finding_states_for_account_service
+            )
+            evaluator = S3BucketPublicEvaluator("S3BucketPublic", 90, ScopeConfig()).with_context(context)
+            return evaluator, writer, context
+        return _bind
+
+    def test_compliant_without_finding_skips_write(self, bind, findings_manager):
+        """No RESOLVED stub is created for resources that never had a finding"""
+        evaluator, writer, context = bind()
+
+        evaluator.evaluate("arn:aws:s3:::bucket", self.PRIVATE, 1000)
+        stats = writer.flush()
+
+        assert stats['closes'] == 0
+        assert context.stats['writes_skipped'] == 1
+        assert findings_manager.table.scan()['Count'] == 0
+
+    def test_unchanged_open_finding_skips_write(self, bind):
+        """Re-evaluating an open finding with identical evidence writes nothing"""
+        evaluator, writer, _ = bind()
+        evaluator.evaluate("arn:aws:s3:::bucket", self.PUBLIC, 1000)
+        assert writer.flush()['puts'] == 1
+
+        evaluator, writer, context = bind()
+        evaluator.evaluate("arn:aws:s3:::bucket", self.PUBLIC, 2000)
+
+        assert writer.flush()['puts'] == 0
+        assert context.stats['writes_skipped'] == 1
+
+    def test_transitions_are_written(self, bind, findings_manager):
+        """Resolve, re-open and evidence changes all produce writes"""
+        arn = "arn:aws:s3:::bucket"
+        evaluator, writer, _ = bind()
+        evaluator.evaluate(arn, self.PUBLIC, 1000)
+        writer.flush()
+
+        # Evidence change on an open finding
+        evaluator, writer, _ = bind()
+        changed = {'Name': 'bucket', 'PublicAccessBlockConfiguration': {'BlockPublicAcls': True}}
+        evaluator.evaluate(arn, changed, 2000)
+        assert writer.flush()['puts'] == 1
+
+        # Resolve
+        evaluator, writer, _ = bind()
+        evaluator.evaluate(arn, self.PRIVATE, 3000)
+        assert writer.flush()['closes'] == 1
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'RESOLVED'
+
+        # Re-open
+        evaluator, writer, context = bind()
+        evaluator.evaluate(arn, self.PUBLIC, 4000)
+        assert writer.flush()['puts'] == 1
+        assert context.stats['writes_skipped'] == 0
+        item = findings_manager.table.get_item(Key={'ARN': arn, 'Policy': 'S3BucketPublic'})['Item']
+        assert item['State'] == 'ACTIVE'
+
+    def test_unknown_state_always_writes(self):
+        """Without a loader (e.g. event processor) every outcome is written"""
+        context = EvaluationContext(findings_writer=MagicMock())
+
+        assert context.needs_write("123456789012_s3", "arn:aws:s3:::b", "P", True, 90, {}) is True
+        assert context.stats['writes_skipped'] == 0
+
+    def test_partition_loaded_once(self):
+        """Finding state is loaded once per AccountService"""
+        loader = MagicMock(return_value={})
+        context = EvaluationContext(findings_writer=MagicMock(), findings_state_loader=loader)
+
+        for _ in range(3):
+            context.needs_write("123456789012_s3", "arn:aws:s3:::b", "P", True, 90, {})
+
+        loader.assert_called_once_with("123456789012_s3")
+        assert context.stats['writes_skipped'] == 3
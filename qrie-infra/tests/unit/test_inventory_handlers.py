@@ -65,3 +65,194 @@ class TestInventoryHandlers:
         """Verify no duplicate services in SUPPORTED_SERVICES"""
         assert len(SUPPORTED_SERVICES) == len(set(SUPPORTED_SERVICES)), \
             "SUPPORTED_SERVICES contains duplicates"
+
+
+class TestInventoryCheckpointResume:
+    """Test that all-account inventory scans checkpoint near the deadline and resume"""
+
+    class FakeLambdaContext:
+        """Lambda context whose remaining time runs out after a number of checks"""
+        function_name = 'qrie_inventory_generator'
+
+        def __init__(self, checks_before_deadline):
+            self.checks_left = checks_before_deadline
+
+        def get_remaining_time_in_millis(self):
+            self.checks_left -= 1
+            return 900_000 if self.checks_left >= 0 else 1_000
+
+    @pytest.fixture
+    def inventory_env(self):
+        import boto3
+        import json
+        from moto import mock_aws
+        from unittest.mock import patch, MagicMock
+        from inventory_generator import inventory_handler
+
+        scanned = []
+
+        def fake_generate(account_id, service, cached=False, regions=None):
+            scanned.append((service, account_id))
+            return {'resource_count': 1, 'failed_count': 0, 'resources': []}
+
+        accounts = [{'account_id': '111111111111'}, {'account_id': '222222222222'}]
+
+        with mock_aws():
+            dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+            table = dynamodb.create_table(
+                TableName='test-summary',
+                KeySchema=[{'AttributeName': 'Type', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'Type', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            with patch.object(inventory_handler, 'generate_inventory_for_account_service', side_effect=fake_generate), \
+                 patch.object(inventory_handler, 'get_customer_accounts', return_value=accounts), \
+                 patch.object(inventory_handler, 'get_summary_table', return_value=table), \
+                 patch('data_access.checkpoint_manager.get_summary_table', return_value=table), \
+                 patch.object(inventory_handler.boto3, 'client') as mock_client:
+                yield {
+                    'handler': inventory_handler,
+                    'scanned': scanned,
+                    'table': table,
+                    'invoke': mock_client.return_value.invoke,
+                    'json': json
+                }
+
+    def test_scan_continues_across_invocations(self, inventory_env):
+        """Each (service, account) pair is inventoried exactly once across invocations"""
+        handler = inventory_env['handler']
+        json = inventory_env['json']
+
+        result = handler.lambda_handler({'service': 'all', 'scan_type': 'anti-entropy'}, self.FakeLambdaContext(3))
+        assert result['statusCode'] == 202
+        assert len(inventory_env['scanned']) == 3
+
+        invoke = inventory_env['invoke']
+        assert invoke.call_args.kwargs['FunctionName'] == 'qrie_inventory_generator'
+        assert invoke.call_args.kwargs['InvocationType'] == 'Event'
+        continuation = json.loads(invoke.call_args.kwargs['Payload'])
+        assert continuation['resume'] is True
+        scan_id = continuation['scan_id']
+
+        # Only the cursor and aggregate counters are checkpointed
+        cursor = inventory_env['table'].get_item(
+            Key={'Type': f"inventory_scan_checkpoint#{scan_id}"})['Item']['cursor']
+        assert set(cursor) == {'services', 'accounts', 'totals', 'cursor', 'started_ms'}
+        assert cursor['totals'][SUPPORTED_SERVICES[0]] == {
+            'accounts_succeeded': 2, 'accounts_failed': 0, 'resources_found': 2
+        }
+
+        result = handler.lambda_handler(continuation, None)
+        assert result['statusCode'] == 200
+        body = json.loads(result['body'])
+        assert body['scan_id'] == scan_id
+        assert body['total_resources'] == 2 * len(SUPPORTED_SERVICES)
+        assert all(totals['accounts_succeeded'] == 2 for totals in body['results'].values())
+
+        expected = [(service, account) for service in SUPPORTED_SERVICES
+                    for account in ('111111111111', '222222222222')]
+        assert inventory_env['scanned'] == expected
+        table = inventory_env['table']
+        assert table.get_item(Key={'Type': 'last_inventory_scan'})['Item']['scan_id'] == scan_id
+        assert 'Item' not in table.get_item(Key={'Type': f"inventory_scan_checkpoint#{scan_id}"})
+
+    def test_resume_without_checkpoint_is_noop(self, inventory_env):
+        """A duplicate continuation after completion does nothing"""
+        result = inventory_env['handler'].lambda_handler({'scan_id': 'missing', 'resume': True}, None)
+
+        assert result['statusCode'] == 200
+        assert inventory_env['scanned'] == []
+
+
+class TestRegionalInventory:
+    """Test that regional services are listed per account region in parallel and global services once"""
+
+    @pytest.fixture
+    def handler(self):
+        from unittest.mock import patch
+        from inventory_generator import inventory_handler
+        with patch.object(inventory_handler, 'InventoryManager'):
+            yield inventory_handler
+
+    def test_regions_listed_concurrently_with_timings(self, handler):
+        """Every region is listed at once; a failing region is recorded without losing the others"""
+        import threading
+        from unittest.mock import patch
+        barrier = threading.Barrier(3, timeout=5)
+
+        def list_resources(service, account_id, client=None, region=None):
+            barrier.wait()  # Deadlocks unless all three regions run concurrently
+            if region == 'ap-south-1':
+                raise RuntimeError("UnauthorizedOperation")
+            return {'resources': [{'ARN': f"arn:aws:ec2:{region}:111111111111:instance/i-1"}], 'failed_count': 0}
+
+        with patch('services.list_resources', side_effect=list_resources):
+            result = handler.generate_inventory_for_account_service(
+                '111111111111', 'ec2', regions=['us-east-1', 'eu-west-1', 'ap-south-1'])
+
+        assert result['resource_count'] == 2
+        assert set(result['regions']) == {'us-east-1', 'eu-west-1', 'ap-south-1'}
+        assert result['regions']['eu-west-1']['resource_count'] == 1
+        assert result['regions']['ap-south-1']['error'] == 'UnauthorizedOperation'
+        assert all('duration_ms' in timing for timing in result['regions'].values())
+
+    def test_all_regions_failing_raises(self, handler):
+        """A service that fails in every region is reported as an error, not an empty inventory"""
+        from unittest.mock import patch
+        with patch('services.list_resources', side_effect=RuntimeError("AccessDenied")):
+            with pytest.raises(RuntimeError, match="AccessDenied"):
+                handler.generate_inventory_for_account_service('111111111111', 'ec2', regions=['us-east-1', 'eu-west-1'])
+
+    def test_global_services_listed_once(self, handler):
+        """S3 and IAM are listed in a single pass without region discovery"""
+        from unittest.mock import patch
+        with patch('services.list_resources', return_value={'resources': [], 'failed_count': 0}) as list_resources, \
+             patch.object(handler, 'get_account_regions') as get_account_regions:
+            result = handler.generate_inventory_for_account_service('111111111111', 's3')
+
+        list_resources.assert_called_once_with('s3', '111111111111')
+        get_account_regions.assert_not_called()
+        assert 'regions' not in result
+
+    def test_account_regions_discovered_once_with_fallback(self, handler):
+        """Enabled regions are looked up once per account; an account that cannot be queried gets the default region"""
+        from unittest.mock import patch
+        handler._discovered_regions.clear()
+        with patch('services.ec2_support.list_regions', return_value=['eu-west-1', 'us-east-1']) as list_regions:
+            assert handler.get_account_regions('111111111111') == ['eu-west-1', 'us-east-1']
+            assert handler.get_account_regions('111111111111') == ['eu-west-1', 'us-east-1']
+        assert list_regions.call_count == 1
+
+        with patch('services.ec2_support.list_regions', side_effect=RuntimeError("AccessDenied")):
+            assert handler.get_account_regions('222222222222') == [handler.DEFAULT_REGION]
+        handler._discovered_regions.clear()
+
+    def test_configured_regions_passed_per_account(self, handler):
+        """Regions on an account's row are used instead of discovery"""
+        from unittest.mock import patch
+        accounts = [{'account_id': '111111111111', 'Regions': {'us-west-2', 'eu-west-1'}},
+                    {'account_id': '222222222222'}]
+        with patch.object(handler, 'get_customer_accounts', return_value=accounts), \
+             patch.object(handler, 'generate_inventory_for_account_service',
+                          return_value={'resource_count': 0, 'regions': {}}) as generate:
+            handler._generate_inventory_resumable(['ec2'])
+
+        assert [call.kwargs['regions'] for call in generate.call_args_list] == [['eu-west-1', 'us-west-2'], None]
+
+    def test_ec2_instances_listed_per_region(self):
+        """EC2 ARNs carry the region the instance was listed in"""
+        import boto3
+        from moto import mock_aws
+        from services import ec2_support
+        with mock_aws():
+            for region in ('us-east-1', 'eu-west-1'):
+                client = boto3.client('ec2', region_name=region)
+                image_id = client.describe_images()['Images'][0]['ImageId']
+                client.run_instances(ImageId=image_id, MinCount=1, MaxCount=1)
+
+            result = ec2_support.list_resources('123456789012', region='eu-west-1')
+
+        assert len(result['resources']) == 1
+        instance = result['resources'][0]
+        assert instance['ARN'] == f"arn:aws:ec2:eu-west-1:123456789012:instance/{instance['InstanceId']}"
+        assert instance['Region'] == 'eu-west-1'
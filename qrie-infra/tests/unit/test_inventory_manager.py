@@ -188,6 +188,141 @@ class TestInventoryManager:
         resources = inventory_manager.get_resources_by_account_service(account_service, limit=3)
         assert len(resources) <= 3
 
+    def test_iter_resource_pages_streams_whole_partition(self, inventory_manager, sample_s3_resource):
+        """Test streaming a partition page by page until LastEvaluatedKey is exhausted"""
+        account_service = f"{sample_s3_resource['account_id']}_{sample_s3_resource['service']}"
+        
+        for i in range(5):
+            inventory_manager.upsert_resource(
+                sample_s3_resource['account_id'],
+                sample_s3_resource['service'],
+                f"arn:aws:s3:::test-bucket-{i}",
+                {},
+                int(time.time() * 1000)
+            )
+        
+        pages = list(inventory_manager.iter_resource_pages(account_service, page_size=2))
+        
+        assert [len(items) for items, _ in pages] == [2, 2, 1]
+        assert pages[-1][1] is None
+        arns = [item['ARN'] for items, _ in pages for item in items]
+        assert sorted(arns) == [f"arn:aws:s3:::test-bucket-{i}" for i in range(5)]
+        
+        # Resuming from a page's LastEvaluatedKey yields only the remainder
+        resumed = list(inventory_manager.iter_resource_pages(account_service, exclusive_start_key=pages[0][1]))
+        assert sum(len(items) for items, _ in resumed) == 3
+
+    def test_upsert_stores_config_digest(self, inventory_manager, sample_s3_resource):
+        """Test that upserts store a digest that survives the DynamoDB round trip"""
+        from config_digest import config_digest
+
+        inventory_manager.upsert_resource(
+            sample_s3_resource['account_id'],
+            sample_s3_resource['service'],
+            sample_s3_resource['arn'],
+            sample_s3_resource['configuration'],
+            int(time.time() * 1000)
+        )
+
+        item = inventory_manager.get_resource(sample_s3_resource['arn'], sample_s3_resource['account_id'])
+        assert item['ConfigDigest'] == config_digest(sample_s3_resource['configuration'])
+        assert item['ConfigDigest'] == config_digest(item['Configuration'])
+
+    def test_set_evaluation_fingerprints(self, inventory_manager, sample_s3_resource):
+        """Test fingerprints are stored on existing rows only"""
+        account_service = f"{sample_s3_resource['account_id']}_{sample_s3_resource['service']}"
+        inventory_manager.upsert_resource(
+            sample_s3_resource['account_id'],
+            sample_s3_resource['service'],
+            sample_s3_resource['arn'],
+            sample_s3_resource['configuration'],
+            int(time.time() * 1000)
+        )
+
+        assert inventory_manager.set_evaluation_fingerprints(
+            account_service, sample_s3_resource['arn'], {'S3BucketPublic': 'abc'}
+        ) is True
+        item = inventory_manager.get_resource(sample_s3_resource['arn'], sample_s3_resource['account_id'])
+        assert item['EvaluationFingerprints'] == {'S3BucketPublic': 'abc'}
+
+        # Deleted resources are not recreated
+        assert inventory_manager.set_evaluation_fingerprints(
+            account_service, 'arn:aws:s3:::gone', {'S3BucketPublic': 'abc'}
+        ) is False
+        assert inventory_manager.get_resource('arn:aws:s3:::gone', sample_s3_resource['account_id']) is None
+
+    def test_get_resource_snapshots(self, inventory_manager):
+        """Test bulk snapshot reads across BatchGetItem pages, including S3 and missing rows"""
+        from config_digest import config_digest, section_digests
+        describe_time = int(time.time() * 1000)
+        config = {'InstanceType': 't3.micro'}
+        arns = [f'arn:aws:ec2:us-east-1:123456789012:instance/i-{i:04d}' for i in range(150)]
+        for arn in arns:
+            inventory_manager.upsert_resource('123456789012', 'ec2', arn, config, describe_time)
+        inventory_manager.upsert_resource('123456789012', 's3', 'arn:aws:s3:::bucket', {}, describe_time)
+        
+        requested = [(arn, '123456789012') for arn in arns] + [
+            ('arn:aws:s3:::bucket', '123456789012'),
+            ('arn:aws:ec2:us-east-1:123456789012:instance/i-missing', '123456789012')
+        ]
+        with patch.object(inventory_manager.resource_table.meta.client, 'batch_get_item',
+                          wraps=inventory_manager.resource_table.meta.client.batch_get_item) as batch_get:
+            snapshots = inventory_manager.get_resource_snapshots(requested)
+        
+        assert batch_get.call_count == 2  # ceil(152 / 100)
+        assert snapshots[arns[0]] == {'LastSeenAt': describe_time, 'ConfigDigest': config_digest(config),
+                                      'SectionDigests': section_digests(config)}
+        assert snapshots['arn:aws:s3:::bucket']['LastSeenAt'] == describe_time
+        assert snapshots['arn:aws:ec2:us-east-1:123456789012:instance/i-missing'] is None
+        assert len(snapshots) == 152
+
+    def test_get_resource_snapshots_retries_unprocessed_keys(self, inventory_manager):
+        """Test UnprocessedKeys are retried, and keys never processed are omitted"""
+        arns = ['arn:aws:iam::123456789012:user/a', 'arn:aws:iam::123456789012:user/b']
+        for arn in arns:
+            inventory_manager.upsert_resource('123456789012', 'iam', arn, {}, 1000)
+        client = inventory_manager.resource_table.meta.client
+        real_batch_get = client.batch_get_item
+        
+        def throttled_once(RequestItems):
+            # First call: return nothing and hand every key back as unprocessed
+            if batch_get.call_count == 1:
+                return {'Responses': {}, 'UnprocessedKeys': RequestItems}
+            return real_batch_get(RequestItems=RequestItems)
+        
+        with patch('data_access.inventory_manager.time.sleep') as sleep, \
+             patch.object(client, 'batch_get_item', side_effect=throttled_once) as batch_get:
+            snapshots = inventory_manager.get_resource_snapshots([(arn, '123456789012') for arn in arns])
+        assert batch_get.call_count == 2 and sleep.call_count == 1
+        assert all(snapshots[arn]['LastSeenAt'] == 1000 for arn in arns)
+        
+        with patch('data_access.inventory_manager.time.sleep'), \
+             patch.object(client, 'batch_get_item',
+                          side_effect=lambda RequestItems: {'Responses': {}, 'UnprocessedKeys': RequestItems}):
+            assert inventory_manager.get_resource_snapshots([(arn, '123456789012') for arn in arns]) == {}
+
+    def test_update_resource_configuration(self, inventory_manager, sample_s3_resource):
+        """Test partial-refresh writes apply only to the snapshot they were merged into"""
+        arn, account_id = sample_s3_resource['arn'], sample_s3_resource['account_id']
+        inventory_manager.upsert_resource(account_id, 's3', arn, sample_s3_resource['configuration'], 1000)
+        snapshot = inventory_manager.get_resource_snapshots([(arn, account_id)], include_configuration=True)[arn]
+        assert snapshot['Configuration'] == sample_s3_resource['configuration']
+        
+        merged = {**snapshot['Configuration'], 'Versioning': 'Enabled'}
+        assert inventory_manager.update_resource_configuration(
+            account_id, 's3', arn, merged, snapshot['LastSeenAt'], snapshot['ConfigDigest']) is True
+        item = inventory_manager.get_resource(arn, account_id)
+        assert item['Configuration'] == merged
+        assert set(item['SectionDigests']) == set(merged)
+        assert item['LastSeenAt'] == 1000  # Snapshot time of the last full describe is kept
+        
+        # Stale digest (another writer got there first) and deleted rows are rejected
+        assert inventory_manager.update_resource_configuration(
+            account_id, 's3', arn, {}, snapshot['LastSeenAt'], snapshot['ConfigDigest']) is False
+        assert inventory_manager.update_resource_configuration(
+            account_id, 's3', 'arn:aws:s3:::gone', {}, 1000, snapshot['ConfigDigest']) is False
+        assert inventory_manager.get_resource('arn:aws:s3:::gone', account_id) is None
+
     def test_get_all_resources(self, inventory_manager, sample_s3_resource):
         """Test retrieving all resources"""
         # Create resources for different services
@@ -230,6 +365,56 @@ class TestInventoryManager:
         # Should not raise an exception
         inventory_manager.delete_resource('arn:aws:s3:::nonexistent-bucket', '123456789012')
 
+    def test_upsert_resource_returning_previous(self, inventory_manager):
+        """The conditional upsert returns the replaced snapshot, or nothing written for an older describe"""
+        from config_digest import config_digest
+        arn = 'arn:aws:s3:::bucket1'
+        
+        assert inventory_manager.upsert_resource_returning_previous('123456789012', 's3', arn, {'A': 1}, 1000) == (True, None)
+        
+        written, previous = inventory_manager.upsert_resource_returning_previous('123456789012', 's3', arn, {'A': 2}, 2000)
+        assert written
+        assert previous['Configuration'] == {'A': 1}
+        assert previous['LastSeenAt'] == 1000
+        assert previous['ConfigDigest'] == config_digest({'A': 1})
+        
+        assert inventory_manager.upsert_resource_returning_previous('123456789012', 's3', arn, {'A': 3}, 1500) == (False, None)
+        assert inventory_manager.get_resource(arn, '123456789012')['Configuration'] == {'A': 2}
+
+    def test_revert_upsert(self, inventory_manager):
+        """A reverted write restores the replaced snapshot (or removes a created row) unless written again"""
+        arn = 'arn:aws:s3:::bucket1'
+        _, created = inventory_manager.upsert_resource_returning_previous('123456789012', 's3', arn, {'A': 1}, 1000)
+        _, previous = inventory_manager.upsert_resource_returning_previous('123456789012', 's3', arn, {'A': 2}, 2000)
+        
+        assert inventory_manager.revert_upsert('123456789012', 's3', arn, 2000, previous)
+        restored = inventory_manager.get_resource(arn, '123456789012')
+        assert restored['Configuration'] == {'A': 1}
+        assert restored['LastSeenAt'] == 1000
+        
+        inventory_manager.upsert_resource('123456789012', 's3', arn, {'A': 3}, 3000)
+        assert not inventory_manager.revert_upsert('123456789012', 's3', arn, 1000, created)
+        assert inventory_manager.revert_upsert('123456789012', 's3', 'arn:aws:s3:::bucket2', 1, None) is False
+        
+        inventory_manager.upsert_resource_returning_previous('123456789012', 's3', 'arn:aws:s3:::bucket2', {}, 1000)
+        assert inventory_manager.revert_upsert('123456789012', 's3', 'arn:aws:s3:::bucket2', 1000, None)
+        assert inventory_manager.get_resource('arn:aws:s3:::bucket2', '123456789012') is None
+
+    def test_delete_resources_batch(self, inventory_manager):
+        """Batch deletion removes only the listed rows (missing rows are ignored)"""
+        now = int(time.time() * 1000)
+        for bucket in ('bucket1', 'bucket2', 'bucket3'):
+            inventory_manager.upsert_resource('123456789012', 's3', f'arn:aws:s3:::{bucket}', {}, now)
+        
+        inventory_manager.delete_resources([
+            ('arn:aws:s3:::bucket1', '123456789012'),
+            ('arn:aws:s3:::bucket2', '123456789012'),
+            ('arn:aws:s3:::missing', '123456789012'),
+        ])
+        
+        remaining = [r['ARN'] for r in inventory_manager.get_all_resources()]
+        assert remaining == ['arn:aws:s3:::bucket3']
+
     def test_get_inventory_summary(self, inventory_manager):
         """Test getting inventory summary by service"""
         # Create resources for different services
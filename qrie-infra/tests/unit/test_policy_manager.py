@@ -11,12 +11,14 @@ import sys
 import os
 import tempfile
 import importlib.util
+from dataclasses import replace
 
 # Add lambda directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
 
+import data_access.policy_manager as policy_manager_module
 from data_access.policy_manager import PolicyManager
-from policy_definition import PolicyDefinition, Policy, ScopeConfig
+from policy_definition import PolicyDefinition, Policy, ScopeConfig, EvaluationContext
 
 
 @pytest.fixture
@@ -394,3 +396,41 @@ class TestPolicyManager:
             assert policy1 == policy2
             # get_available_policies should be called only once due to caching
             assert mock_get_available.call_count == 1
+
+    def test_evaluator_cache_survives_manager_instances(self, policy_manager, mock_table, sample_scope_config):
+        """Evaluators are reused across PolicyManager instances while UpdatedAt is unchanged"""
+        policy_manager.launch_policy("S3BucketVersioningDisabled", sample_scope_config)
+        launched = policy_manager.get_launched_policy("S3BucketVersioningDisabled")
+        first = policy_manager.create_policy_evaluator("S3BucketVersioningDisabled", launched)
+        
+        # A warm invocation creates a new manager; definitions and classes are not re-resolved
+        with patch('data_access.policy_manager.get_policies_table', return_value=mock_table):
+            warm_manager = PolicyManager()
+        with patch.object(warm_manager, 'get_policy_evaluator_class') as mock_get_class:
+            second = warm_manager.create_policy_evaluator("S3BucketVersioningDisabled", launched)
+            context = EvaluationContext(findings_writer=MagicMock())
+            bound = warm_manager.create_policy_evaluator("S3BucketVersioningDisabled", launched, context=context)
+            mock_get_class.assert_not_called()
+        
+        assert second is first
+        assert bound is not first and bound.context is context and first.context is None
+        
+        # A newer launched policy version (e.g. updated by another process) builds a new evaluator
+        newer = replace(launched, updated_at="2099-01-01T00:00:00+00:00", severity=10)
+        rebuilt = warm_manager.create_policy_evaluator("S3BucketVersioningDisabled", newer)
+        assert rebuilt is not first and rebuilt.severity == 10
+
+    def test_evaluator_cache_invalidated_on_update_and_delete(self, policy_manager, sample_scope_config):
+        """Updating or deleting a launched policy evicts its cached evaluator"""
+        policy_manager.launch_policy("S3BucketVersioningDisabled", sample_scope_config, severity=60)
+        launched = policy_manager.get_launched_policy("S3BucketVersioningDisabled")
+        first = policy_manager.create_policy_evaluator("S3BucketVersioningDisabled", launched)
+        
+        assert policy_manager.update_launched_policy("S3BucketVersioningDisabled", severity=20)
+        assert "S3BucketVersioningDisabled" not in policy_manager_module._evaluator_cache
+        updated = policy_manager.get_launched_policy("S3BucketVersioningDisabled")
+        second = policy_manager.create_policy_evaluator("S3BucketVersioningDisabled", updated)
+        assert second is not first and second.severity == 20
+        
+        policy_manager.delete_launched_policy("S3BucketVersioningDisabled")
+        assert "S3BucketVersioningDisabled" not in policy_manager_module._evaluator_cache
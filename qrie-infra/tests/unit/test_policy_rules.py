@@ -0,0 +1,250 @@
+"""
+Unit tests for declarative, compiled policy rules.
+"""
+import pytest
+import sys
+import os
+from dataclasses import replace
+from unittest.mock import patch
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from policy_rules import PolicyRule, compile_rule, compile_rule_evaluator, parse_path, RuleEvaluator
+from policy_definition import PolicyDefinition, ScopeConfig
+from data_access.policy_manager import PolicyManager
+from policies.s3_bucket_public import S3BucketPublic, S3BucketPublicEvaluator
+from policies.s3_bucket_versioning import S3BucketVersioningDisabled
+from policies.s3_bucket_encryption_disabled import S3BucketEncryptionDisabled
+from policies.s3_bucket_mfa_delete_disabled import S3BucketMfaDeleteDisabled
+
+BLOCK_FLAGS = ('BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets')
+
+# Declarative equivalent of S3BucketPublicEvaluator
+S3_BUCKET_PUBLIC_RULE = PolicyRule(
+    compliant_when={'all': [
+        {'path': f'PublicAccessBlockConfiguration.{flag}', 'op': 'eq', 'value': True, 'default': False}
+        for flag in BLOCK_FLAGS
+    ]},
+    evidence={
+        'bucket_name': ['Name', '$name'],
+        'public_access_block_configuration': {'path': 'PublicAccessBlockConfiguration', 'default': {}},
+        'block_public_acls': {'path': 'PublicAccessBlockConfiguration.BlockPublicAcls', 'default': False},
+        'ignore_public_acls': {'path': 'PublicAccessBlockConfiguration.IgnorePublicAcls', 'default': False},
+        'block_public_policy': {'path': 'PublicAccessBlockConfiguration.BlockPublicPolicy', 'default': False},
+        'restrict_public_buckets': {'path': 'PublicAccessBlockConfiguration.RestrictPublicBuckets', 'default': False},
+    },
+    messages=("Bucket '{bucket_name}' is private", "Bucket '{bucket_name}' is publicly accessible")
+)
+
+
+def _check(condition, config, arn='arn:aws:s3:::bucket'):
+    evaluate_rule, _ = compile_rule(PolicyRule(compliant_when=condition))
+    return evaluate_rule(arn, config)['compliant']
+
+
+class TestRuleCompilation:
+    """Test suite for rule conditions, paths and evidence"""
+
+    @pytest.mark.parametrize('condition,config,expected', [
+        ({'path': 'A', 'op': 'eq', 'value': 1}, {'A': 1}, True),
+        ({'path': 'A', 'op': 'ne', 'value': 1}, {'A': 2}, True),
+        ({'path': 'A', 'op': 'in', 'value': ['x', 'y']}, {'A': 'y'}, True),
+        ({'path': 'A', 'op': 'not_in', 'value': ['x', 'y']}, {'A': 'z'}, True),
+        ({'path': 'A', 'op': 'gt', 'value': 5}, {'A': 6}, True),
+        ({'path': 'A', 'op': 'gte', 'value': 5}, {'A': 5}, True),
+        ({'path': 'A', 'op': 'lt', 'value': 5}, {}, False),
+        ({'path': 'A', 'op': 'lte', 'value': 5}, {'A': None}, False),
+        ({'path': 'A', 'op': 'contains', 'value': 'x'}, {'A': ['x']}, True),
+        ({'path': 'A', 'op': 'exists'}, {'A': None}, True),
+        ({'path': 'A', 'op': 'missing'}, {}, True),
+        ({'path': 'A', 'op': 'truthy'}, {}, False),
+        ({'path': 'A', 'op': 'falsy'}, {}, True),
+        ({'path': 'A', 'op': 'empty'}, {'A': []}, True),
+        ({'path': 'A', 'op': 'not_empty'}, {'A': None}, False),
+    ])
+    def test_operators(self, condition, config, expected):
+        """Each operator compares the resolved value (missing paths never satisfy comparisons)"""
+        assert _check(condition, config) is expected
+
+    def test_nested_paths_and_indexes(self):
+        """Dotted paths and list indexes resolve; type mismatches resolve as missing"""
+        condition = {'path': 'Encryption.Rules[0].BucketKeyEnabled', 'op': 'eq', 'value': True}
+        assert _check(condition, {'Encryption': {'Rules': [{'BucketKeyEnabled': True}]}})
+        assert not _check(condition, {'Encryption': {'Rules': []}})
+        assert not _check(condition, {'Encryption': None})
+        assert not _check(condition, {'Encryption': {'Rules': 'not-a-list'}})
+
+    def test_defaults_apply_to_missing_paths(self):
+        """'default' stands in for a missing path, on either side of the expected value"""
+        assert _check({'path': 'A', 'op': 'eq', 'value': 'Off', 'default': 'Off'}, {})
+        assert not _check({'path': 'A', 'op': 'eq', 'value': 'On', 'default': 'Off'}, {})
+        assert not _check({'path': 'A', 'op': 'ne', 'value': 'Off', 'default': 'Off'}, {})
+        assert _check({'path': 'A', 'op': 'ne', 'value': 'On', 'default': 'Off'}, {})
+        assert _check({'path': 'A', 'op': 'in', 'value': ['Off'], 'default': 'Off'}, {})
+        assert _check({'path': 'A', 'op': 'gt', 'value': 1, 'default': 2}, {})
+
+    def test_boolean_combinators(self):
+        """all/any/not combine conditions with short-circuit semantics"""
+        condition = {'any': [
+            {'path': 'Versioning', 'op': 'ne', 'value': 'Enabled'},
+            {'all': [
+                {'path': 'MFADelete', 'op': 'eq', 'value': 'Enabled'},
+                {'not': {'path': 'Suspended', 'op': 'truthy'}}
+            ]}
+        ]}
+        assert _check(condition, {'Versioning': 'Disabled'})
+        assert _check(condition, {'Versioning': 'Enabled', 'MFADelete': 'Enabled'})
+        assert not _check(condition, {'Versioning': 'Enabled', 'MFADelete': 'Enabled', 'Suspended': True})
+        assert _check({'all': []}, {}) and not _check({'any': []}, {})
+
+    def test_evidence_and_messages(self):
+        """Evidence coalesces paths, applies fresh defaults and feeds message templates"""
+        evaluate_rule, _ = compile_rule(PolicyRule(
+            compliant_when={'path': 'Tags', 'op': 'not_empty'},
+            evidence={
+                'name': ['Name', '$name'],
+                'tags': {'path': 'Tags', 'default': []},
+                'arn': '$arn'
+            },
+            messages=("{name} is tagged", "{name} has {tags!r} tags")
+        ))
+        result = evaluate_rule('arn:aws:iam::123456789012:user/alice', {'Name': None})
+        assert result == {
+            'scoped': True,
+            'compliant': False,
+            'message': "alice has [] tags",
+            'evidence': {'name': 'alice', 'tags': [], 'arn': 'arn:aws:iam::123456789012:user/alice'},
+            'finding_id': None
+        }
+        # Mutable defaults are never shared between results
+        result['evidence']['tags'].append('x')
+        assert evaluate_rule('arn:aws:iam::123456789012:user/bob', {})['evidence']['tags'] == []
+
+    @pytest.mark.parametrize('rule', [
+        PolicyRule(compliant_when={'path': 'A', 'op': 'matches', 'value': 'x'}),
+        PolicyRule(compliant_when={'path': 'A..B', 'op': 'exists'}),
+        PolicyRule(compliant_when={'path': 'A[x]', 'op': 'exists'}),
+        PolicyRule(compliant_when={'op': 'exists'}),
+    ])
+    def test_invalid_rules_rejected(self, rule):
+        """Unknown operators and malformed paths fail at compile time"""
+        with pytest.raises(ValueError):
+            compile_rule(rule)
+
+    def test_parse_path_and_config_paths(self):
+        """Paths split into keys/indexes and rules report the config paths they read"""
+        assert parse_path('Encryption.Rules[0].SSE') == ('Encryption', 'Rules', 0, 'SSE')
+        assert S3BucketMfaDeleteDisabled.rule.config_paths() == ['MFADelete', 'Name', 'Versioning']
+
+
+class TestRuleEvaluator:
+    """Test suite for compiled rule evaluators"""
+
+    @pytest.fixture
+    def resources(self):
+        resources = []
+        for i, flags in enumerate([(True,) * 4, (True, False, True, True), (), None]):
+            config = {'Name': f'bucket-{i}'} if i % 2 == 0 else {}
+            if flags is not None:
+                config['PublicAccessBlockConfiguration'] = dict(zip(BLOCK_FLAGS, flags))
+            resources.append({'ARN': f'arn:aws:s3:::bucket-{i}', 'Configuration': config, 'DescribeTime': 1000 + i})
+        return resources
+
+    def test_rule_matches_hand_written_evaluator(self, resources, mocker):
+        """A rule equivalent to S3BucketPublic produces identical results and findings"""
+        mocker.patch('data_access.findings_manager.FindingsManager')
+        hand_written = S3BucketPublicEvaluator('S3BucketPublic', 90, ScopeConfig())
+        compiled = compile_rule_evaluator(replace(S3BucketPublic, rule=S3_BUCKET_PUBLIC_RULE))(
+            'S3BucketPublic', 90, ScopeConfig())
+
+        assert issubclass(type(compiled), RuleEvaluator)
+        for resource in resources:
+            assert compiled.evaluate(resource['ARN'], resource['Configuration'], 0) == \
+                hand_written.evaluate(resource['ARN'], resource['Configuration'], 0)
+        assert compiled.evaluate_batch(resources, 0) == hand_written.evaluate_batch(resources, 0)
+
+    def test_evaluate_batch_scopes_persists_and_isolates_errors(self, resources, mocker):
+        """Batch evaluation skips out-of-scope accounts, persists once and isolates bad rows"""
+        definition = PolicyDefinition(
+            policy_id="IAMUserTagged", description="", service="iam", category="governance",
+            severity=10, remediation="", evaluation_module="iam_user_tagged",
+            rule=PolicyRule(compliant_when={'path': 'Tags', 'op': 'not_empty'}, evidence={'user': '$name'})
+        )
+        evaluator = compile_rule_evaluator(definition)(
+            'IAMUserTagged', 10, ScopeConfig(exclude_accounts=['222222222222']))
+        persist = mocker.patch.object(evaluator, '_persist_findings_batch',
+                                      side_effect=lambda outcomes: [f"f{i}" for i in range(len(outcomes))])
+        users = [
+            {'ARN': 'arn:aws:iam::111111111111:user/a', 'Configuration': {'Tags': [{'Key': 'k'}]}},
+            {'ARN': 'arn:aws:iam::222222222222:user/b', 'Configuration': {}},
+            {'ARN': 'arn:aws:iam::111111111111:user/c', 'Configuration': None},
+            {'ARN': 'arn:aws:iam::111111111111:user/d', 'Configuration': {}, 'DescribeTime': 5},
+        ]
+
+        results = evaluator.evaluate_batch(users, 42)
+
+        assert [r.get('compliant') for r in results] == [True, True, None, False]
+        assert results[1]['scoped'] is False
+        assert 'error' in results[2]
+        assert [r.get('finding_id') for r in (results[0], results[3])] == ['f0', 'f1']
+        persist.assert_called_once_with([
+            ('arn:aws:iam::111111111111:user/a', '111111111111_iam', True, {'user': 'a'}, 42),
+            ('arn:aws:iam::111111111111:user/d', '111111111111_iam', False, {'user': 'd'}, 5),
+        ])
+
+    def test_compiled_once_per_rule(self):
+        """Evaluator classes are cached per policy and recompiled only when the rule changes"""
+        first = compile_rule_evaluator(S3BucketVersioningDisabled)
+        assert compile_rule_evaluator(replace(S3BucketVersioningDisabled)) is first
+        changed = replace(S3BucketVersioningDisabled, rule=replace(
+            S3BucketVersioningDisabled.rule, compliant_when={'path': 'Versioning', 'op': 'exists'}))
+        assert compile_rule_evaluator(changed) is not first
+
+
+class TestRuleBasedPolicies:
+    """Test suite for policies shipped as declarative rules"""
+
+    @pytest.fixture
+    def policy_manager(self):
+        with patch('data_access.policy_manager.get_policies_table'):
+            return PolicyManager()
+
+    @pytest.mark.parametrize('definition', [
+        S3BucketVersioningDisabled, S3BucketEncryptionDisabled, S3BucketMfaDeleteDisabled
+    ])
+    def test_policy_manager_compiles_rule_policies(self, policy_manager, definition):
+        """Rule-based policies resolve to compiled evaluators without an evaluator module"""
+        evaluator_class = policy_manager.get_policy_evaluator_class(definition.policy_id)
+        assert issubclass(evaluator_class, RuleEvaluator)
+        assert evaluator_class.service == 's3'
+
+    def test_input_paths(self):
+        """Rule policies derive their inputs; hand-written ones declare them or run on every change"""
+        from config_digest import paths_overlap
+        assert S3BucketVersioningDisabled.input_paths() == ['Name', 'Versioning']
+        assert S3BucketMfaDeleteDisabled.input_paths() == ['MFADelete', 'Name', 'Versioning']
+        # Declared paths of the hand-written evaluator cover everything its rule equivalent reads
+        assert all(paths_overlap(S3BucketPublic.input_paths(), [path]) for path in S3_BUCKET_PUBLIC_RULE.config_paths())
+        assert replace(S3BucketPublic, config_paths=None).input_paths() is None
+
+    @pytest.mark.parametrize('definition,config,compliant', [
+        (S3BucketVersioningDisabled, {'Versioning': 'Enabled'}, True),
+        (S3BucketVersioningDisabled, {'Versioning': 'Suspended'}, False),
+        (S3BucketEncryptionDisabled, {'Encryption': {'Rules': [
+            {'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}]}}, True),
+        (S3BucketEncryptionDisabled, {'Encryption': None}, False),
+        (S3BucketMfaDeleteDisabled, {'Versioning': 'Disabled'}, True),
+        (S3BucketMfaDeleteDisabled, {'Versioning': 'Enabled', 'MFADelete': 'Enabled'}, True),
+        (S3BucketMfaDeleteDisabled, {'Versioning': 'Enabled', 'MFADelete': 'Disabled'}, False),
+    ])
+    def test_s3_rules(self, definition, config, compliant, mocker):
+        """S3 rule policies evaluate describe_resource configurations"""
+        mocker.patch('data_access.findings_manager.FindingsManager')
+        evaluator = compile_rule_evaluator(definition)(definition.policy_id, definition.severity, ScopeConfig())
+
+        result = evaluator.evaluate('arn:aws:s3:::my-bucket', {'Name': 'my-bucket', **config}, 0)
+
+        assert result['scoped'] and result['compliant'] is compliant
+        assert result['evidence']['bucket_name'] == 'my-bucket'
+        assert 'my-bucket' in result['message']
@@ -0,0 +1,96 @@
+"""
+Unit tests for the per-account API rate governor.
+"""
+import pytest
+import boto3
+import sys
+import os
+from types import SimpleNamespace
+from moto import mock_aws
+from unittest.mock import patch
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from common.rate_governor import RateGovernor, TokenBucket, parse_rate_limits, govern_client, govern_session
+
+
+class FakeClock:
+    """Monotonic clock advanced only by sleep()"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch('common.rate_governor.time', fake):
+        yield fake
+
+
+class TestRateGovernor:
+    """Test suite for token buckets, API families and metrics"""
+
+    def test_bucket_allows_burst_then_paces(self, clock):
+        """Calls within the burst are immediate; later calls wait for the refill rate"""
+        bucket = TokenBucket(rate=10, burst=3)
+
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.acquire() == pytest.approx(0.1)
+
+        bucket.drain()
+        assert bucket.acquire() == pytest.approx(0.1)
+
+    def test_buckets_per_account_and_family(self, clock):
+        """Accounts and API families have independent buckets; operations can be split out"""
+        governor = RateGovernor({'s3': (1, 1), 's3.GetBucketLocation': (1, 1), 'default': (0, 0)})
+
+        assert governor.acquire('111111111111', 's3', 'GetBucketVersioning') == 0.0
+        assert governor.acquire('222222222222', 's3', 'GetBucketVersioning') == 0.0
+        assert governor.acquire('111111111111', 's3', 'GetBucketLocation') == 0.0
+        assert governor.acquire('111111111111', 'iam', 'ListUsers') == 0.0  # Rate 0: ungoverned
+        assert governor.acquire('111111111111', 's3', 'GetBucketEncryption') == pytest.approx(1.0)
+
+        stats = governor.stats()
+        assert stats['s3']['calls'] == 3 and stats['s3']['delayed_calls'] == 1
+        assert stats['s3']['max_wait_ms'] == pytest.approx(1000)
+        assert stats['s3.GetBucketLocation']['calls'] == 1
+
+    def test_parse_rate_limits(self):
+        """Overrides parse as family=rate[:burst]"""
+        assert parse_rate_limits('s3=50:100, iam=5,') == {'s3': (50.0, 100.0), 'iam': (5.0, 10.0)}
+        assert parse_rate_limits('') == {}
+        with pytest.raises(ValueError):
+            parse_rate_limits('s3')
+
+    @mock_aws
+    def test_governed_clients_wait_before_calls(self, clock):
+        """Governed clients and session clients acquire a token per call; throttling drains the bucket"""
+        governor = RateGovernor({'s3': (1000, 1), 'default': (0, 0)})
+        client = govern_client(boto3.client('s3', region_name='us-east-1'), '123456789012', governor)
+
+        client.list_buckets()
+        client.list_buckets()
+        assert governor.stats()['s3']['calls'] == 2
+        assert governor.stats()['s3']['delayed_calls'] == 1
+
+        # Same arguments botocore passes after a throttled attempt (its own retry handler runs after ours)
+        client.meta.events.emit(
+            'needs-retry.s3.ListBuckets',
+            response=(SimpleNamespace(status_code=503, headers={}), {'Error': {'Code': 'SlowDown'}}),
+            attempts=1, caught_exception=None, request_dict={'context': {}},
+            operation=client.meta.service_model.operation_model('ListBuckets'))
+        assert governor.stats()['s3']['throttle_errors'] == 1
+
+        session = govern_session(boto3.Session(region_name='us-east-1'), '123456789012', governor)
+        session.client('s3').list_buckets()
+        assert governor.stats()['s3']['calls'] == 3
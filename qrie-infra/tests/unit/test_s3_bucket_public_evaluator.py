@@ -227,3 +227,93 @@ class TestS3BucketPublicEvaluator:
         assert 'block_public_policy' in evidence
         assert 'restrict_public_buckets' in evidence
         assert evidence['bucket_name'] == 'test-bucket'
+    
+    def test_evaluate_batch_matches_evaluate(self, evaluator, mocker):
+        """Test that the vectorized batch path gives the same results as evaluate()"""
+        mocker.patch('data_access.findings_manager.FindingsManager')
+        
+        blocks = [
+            {},
+            {'BlockPublicAcls': True, 'IgnorePublicAcls': True, 'BlockPublicPolicy': True, 'RestrictPublicBuckets': True},
+            {'BlockPublicAcls': True, 'IgnorePublicAcls': False, 'BlockPublicPolicy': True, 'RestrictPublicBuckets': True},
+        ]
+        resources = [
+            {'ARN': f'arn:aws:s3:::bucket-{i}', 'Configuration': {'PublicAccessBlockConfiguration': block},
+             'DescribeTime': 1000 + i}
+            for i, block in enumerate(blocks)
+        ]
+        
+        batch_results = evaluator.evaluate_batch(resources, 0)
+        single_results = [evaluator.evaluate(r['ARN'], r['Configuration'], r['DescribeTime']) for r in resources]
+        
+        assert batch_results == single_results
+        assert [r['compliant'] for r in batch_results] == [False, True, False]
+    
+    def test_described_bucket_without_public_access_block_flagged(self, evaluator, mocker):
+        """Buckets described with no PAB (PublicAccessBlockConfiguration: None) are flagged, not errors"""
+        import boto3
+        from moto import mock_aws
+        from services import s3_support
+        mocker.patch('data_access.findings_manager.FindingsManager')
+        
+        with mock_aws():
+            client = boto3.client('s3', region_name='us-east-1')
+            client.create_bucket(Bucket='no-pab')
+            config = s3_support.describe_resource('arn:aws:s3:::no-pab', '123456789012', client)
+        assert config['PublicAccessBlockConfiguration'] is None
+        
+        single = evaluator.evaluate('arn:aws:s3:::no-pab', config, 1000)
+        batch = evaluator.evaluate_batch([{'ARN': 'arn:aws:s3:::no-pab', 'Configuration': config}], 1000)
+        
+        assert single['compliant'] is False
+        assert single['evidence']['public_access_block_configuration'] == {}
+        assert batch == [single]
+    
+    def test_evaluate_batch_amortizes_scope_and_persistence(self, evaluator, mocker):
+        """Test that scope is resolved once per account and one FindingsManager serves the batch"""
+        mock_manager_class = mocker.patch('data_access.findings_manager.FindingsManager')
+        scope_check = mocker.patch('scoping.should_evaluate_resource', return_value=True)
+        
+        resources = [{'ARN': f'arn:aws:s3:::bucket-{i}', 'Configuration': {}} for i in range(50)]
+        results = evaluator.evaluate_batch(resources, 1000)
+        
+        assert len(results) == 50
+        assert scope_check.call_count == 1
+        mock_manager_class.assert_called_once()
+        assert mock_manager_class.return_value.put_finding.call_count == 50
+        put_kwargs = mock_manager_class.return_value.put_finding.call_args.kwargs
+        assert put_kwargs['describe_time_ms'] == 1000
+    
+    def test_evaluate_batch_isolates_bad_resources(self, evaluator, mocker):
+        """Test that a malformed configuration fails only its own result"""
+        mocker.patch('data_access.findings_manager.FindingsManager')
+        
+        resources = [
+            {'ARN': 'arn:aws:s3:::good', 'Configuration': {}},
+            {'ARN': 'arn:aws:s3:::bad', 'Configuration': None},
+        ]
+        results = evaluator.evaluate_batch(resources, 1000)
+        
+        assert results[0]['compliant'] is False
+        assert 'error' in results[1]
+    
+    def test_default_evaluate_batch_loops_evaluate(self, mocker):
+        """Test the base-class batch implementation delegates to evaluate()"""
+        from policy_definition import PolicyEvaluator
+        
+        class LoopEvaluator(PolicyEvaluator):
+            def evaluate(self, resource_arn, config, describe_time_ms):
+                if config.get('raise'):
+                    raise RuntimeError("boom")
+                return {'scoped': True, 'compliant': True, 'describe_time_ms': describe_time_ms}
+        
+        evaluator = LoopEvaluator("Loop", 10, ScopeConfig())
+        results = evaluator.evaluate_batch([
+            {'ARN': 'arn:aws:iam::123456789012:user/a', 'Configuration': {}, 'DescribeTime': 5},
+            {'ARN': 'arn:aws:iam::123456789012:user/b', 'Configuration': {'raise': True}},
+            {'ARN': 'arn:aws:iam::123456789012:user/c', 'Configuration': {}},
+        ], 7)
+        
+        assert results[0]['describe_time_ms'] == 5
+        assert results[1] == {'error': 'boom'}
+        assert results[2]['describe_time_ms'] == 7
@@ -0,0 +1,201 @@
+"""
+Unit tests for S3 service support (section-level describes).
+"""
+import pytest
+import sys
+import os
+from moto import mock_aws
+from unittest.mock import MagicMock, patch
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from services import s3_support, get_event_sections
+
+
+@pytest.fixture
+def s3_client():
+    """S3 client mock returning a versioned, unencrypted bucket"""
+    client = MagicMock()
+    client.get_bucket_location.return_value = {'LocationConstraint': 'eu-west-1'}
+    client.get_public_access_block.return_value = {'PublicAccessBlockConfiguration': {'BlockPublicAcls': True}}
+    client.get_bucket_versioning.return_value = {'Status': 'Enabled'}
+    client.get_bucket_encryption.return_value = {'ServerSideEncryptionConfiguration': {'Rules': []}}
+    client.get_bucket_logging.return_value = {}
+    return client
+
+
+class TestS3Sections:
+    """Test suite for event-driven partial describes"""
+
+    def test_full_describe_covers_every_section(self, s3_client):
+        """Default describe issues one call per section"""
+        config = s3_support.describe_resource('arn:aws:s3:::bucket', '123456789012', s3_client)
+
+        assert config['Location'] == 'eu-west-1'
+        assert config['Versioning'] == 'Enabled' and config['MFADelete'] == 'Disabled'
+        assert {'PublicAccessBlockConfiguration', 'Encryption', 'Logging'} <= set(config)
+
+    def test_partial_describe_calls_only_requested_sections(self, s3_client):
+        """A versioning refresh makes one API call and returns only that section"""
+        config = s3_support.describe_resource('arn:aws:s3:::bucket', '123456789012', s3_client,
+                                              sections={'Versioning'})
+
+        assert config == {'Name': 'bucket', 'ARN': 'arn:aws:s3:::bucket', 'Versioning': 'Enabled', 'MFADelete': 'Disabled'}
+        s3_client.get_bucket_versioning.assert_called_once()
+        s3_client.get_bucket_location.assert_not_called()
+        s3_client.get_public_access_block.assert_not_called()
+        s3_client.get_bucket_encryption.assert_not_called()
+        s3_client.get_bucket_logging.assert_not_called()
+
+        with pytest.raises(ValueError):
+            s3_support.describe_resource('arn:aws:s3:::bucket', '123456789012', s3_client, sections={'Tags'})
+
+    def test_event_sections(self):
+        """Events map to known sections; unmapped events need a full describe"""
+        for sections in s3_support.EVENT_SECTIONS.values():
+            assert set(sections) <= set(s3_support.CONFIG_SECTIONS)
+
+        assert get_event_sections('s3', ['PutBucketVersioning', 'PutBucketEncryption']) == {'Versioning', 'Encryption'}
+        assert get_event_sections('s3', ['PutBucketPolicy']) == set()
+        assert get_event_sections('s3', ['PutBucketVersioning', 'CreateBucket']) is None
+        assert get_event_sections('s3', []) is None
+        assert get_event_sections('ec2', ['AuthorizeSecurityGroupIngress']) is None
+
+
+class TestS3Inventory:
+    """Test suite for the concurrent bucket describe pipeline"""
+
+    def test_failures_isolated_per_bucket(self, s3_client):
+        """A failing call fails only its bucket, counted once; others keep list_buckets order"""
+        s3_client.list_buckets.return_value = {'Buckets': [{'Name': f"bucket-{i}"} for i in range(6)]}
+
+        def versioning(Bucket):
+            if Bucket == 'bucket-2':
+                raise RuntimeError("Access Denied")
+            return {'Status': 'Enabled'}
+        def location(Bucket):
+            if Bucket == 'bucket-4':
+                raise RuntimeError("Slow Down")
+            return {'LocationConstraint': 'eu-west-1'}
+        s3_client.get_bucket_versioning.side_effect = versioning
+        s3_client.get_bucket_location.side_effect = location
+
+        result = s3_support.list_resources('123456789012', s3_client, concurrency=4)
+
+        assert result['failed_count'] == 2
+        assert [bucket['Name'] for bucket in result['resources']] == ['bucket-0', 'bucket-1', 'bucket-3', 'bucket-5']
+        assert result['resources'][0] == s3_support.describe_resource('arn:aws:s3:::bucket-0', '123456789012', s3_client)
+
+    def test_calls_fan_out_across_buckets_and_sections(self, s3_client):
+        """Calls of different buckets and sections overlap on the bounded pool"""
+        import threading
+        s3_client.list_buckets.return_value = {'Buckets': [{'Name': 'a'}, {'Name': 'b'}]}
+        barrier = threading.Barrier(4, timeout=5)  # Times out unless 4 calls run at once
+
+        def location(Bucket):
+            barrier.wait()
+            return {}
+        def versioning(Bucket):
+            barrier.wait()
+            return {'Status': 'Enabled'}
+        s3_client.get_bucket_location.side_effect = location
+        s3_client.get_bucket_versioning.side_effect = versioning
+
+        result = s3_support.list_resources('123456789012', s3_client, concurrency=4)
+
+        assert result['failed_count'] == 0
+        assert [bucket['Location'] for bucket in result['resources']] == ['us-east-1', 'us-east-1']
+
+    @mock_aws
+    def test_unconfigured_settings_described_as_none(self):
+        """Buckets without a public access block or encryption describe cleanly (S3 error codes, not client exceptions)"""
+        import boto3
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='plain')
+
+        result = s3_support.list_resources('123456789012', client)
+
+        assert result['failed_count'] == 0
+        assert result['resources'][0]['PublicAccessBlockConfiguration'] is None
+        assert result['resources'][0]['Location'] == 'us-east-1'
+
+
+def _pooled_clients(s3_client):
+    """Stand-in for the pooled cross-account clients: a us-east-1 default and per-region clients"""
+    default = MagicMock()
+    default.meta.region_name = 'us-east-1'
+    default.get_bucket_location.return_value = {'LocationConstraint': 'EU'}
+    clients = {None: default}
+
+    def get_client(account_id, region=None):
+        return clients.setdefault(region, s3_client)
+    return clients, get_client
+
+
+class TestS3Regions:
+    """Test suite for routing describes through the bucket's regional client"""
+
+    def test_partial_describe_routed_by_stored_location(self, s3_client):
+        """Event refreshes use the stored Location: no lookup, calls sent to the regional client"""
+        clients, get_client = _pooled_clients(s3_client)
+        before = dict(s3_support.REGION_STATS)
+        with patch.object(s3_support, '_get_cross_account_s3_client', side_effect=get_client):
+            config = s3_support.describe_resource('arn:aws:s3:::logs', '123456789012', sections=['Versioning'],
+                                                  stored_config={'Location': 'eu-west-1', 'Versioning': 'Suspended'})
+
+        assert config == {'Name': 'logs', 'ARN': 'arn:aws:s3:::logs', 'Versioning': 'Enabled', 'MFADelete': 'Disabled'}
+        assert clients['eu-west-1'] is s3_client
+        clients[None].get_bucket_location.assert_not_called()
+        assert s3_support.REGION_STATS['redirects_avoided'] == before['redirects_avoided'] + 1
+        assert s3_support.REGION_STATS['lookups'] == before['lookups']
+
+    def test_full_describe_looks_up_region_first(self, s3_client):
+        """Without a stored Location, GetBucketLocation (the Location section) picks the client"""
+        clients, get_client = _pooled_clients(s3_client)
+        with patch.object(s3_support, '_get_cross_account_s3_client', side_effect=get_client):
+            config = s3_support.describe_resource('arn:aws:s3:::logs', '123456789012')
+
+        assert list(config)[:3] == ['Name', 'ARN', 'Location']
+        assert config['Location'] == 'eu-west-1'  # Legacy EU constraint normalized
+        clients[None].get_bucket_location.assert_called_once_with(Bucket='logs')
+        s3_client.get_bucket_location.assert_not_called()
+        s3_client.get_bucket_versioning.assert_called_once_with(Bucket='logs')
+
+    def test_inventory_uses_list_buckets_regions(self, s3_client):
+        """BucketRegion from ListBuckets replaces GetBucketLocation during inventory"""
+        clients, get_client = _pooled_clients(s3_client)
+        clients[None].list_buckets.return_value = {'Buckets': [
+            {'Name': 'local', 'BucketRegion': 'us-east-1'},
+            {'Name': 'remote', 'BucketRegion': 'eu-west-1'},
+            {'Name': 'legacy'},
+        ]}
+        before = dict(s3_support.REGION_STATS)
+        with patch.object(s3_support, '_get_cross_account_s3_client', side_effect=get_client):
+            result = s3_support.list_resources('123456789012')
+
+        assert result['failed_count'] == 0
+        assert [bucket['Location'] for bucket in result['resources']] == ['us-east-1', 'eu-west-1', 'eu-west-1']
+        clients[None].get_bucket_location.assert_called_once_with(Bucket='legacy')
+        assert clients[None].get_bucket_versioning.call_count == 1
+        assert s3_client.get_bucket_versioning.call_count == 2
+        assert s3_support.REGION_STATS['redirects_avoided'] == before['redirects_avoided'] + 2
+        assert s3_support.REGION_STATS['lookups'] == before['lookups'] + 1
+
+    @mock_aws
+    def test_regional_clients_share_one_session(self):
+        """Cross-account inventory builds a client per bucket region on a single assumed role"""
+        import boto3
+        from common.client_pool import CLIENT_POOL
+        from common.credential_cache import CREDENTIAL_CACHE
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='home')
+        boto3.client('s3', region_name='eu-central-1').create_bucket(
+            Bucket='away', CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'})
+
+        result = s3_support.list_resources('123456789012')
+
+        assert result['failed_count'] == 0
+        assert {bucket['Name']: bucket['Location'] for bucket in result['resources']} == \
+            {'home': 'us-east-1', 'away': 'eu-central-1'}
+        assert CREDENTIAL_CACHE.stats()['misses'] == 1
+        assert CLIENT_POOL.stats()['created'] == 2
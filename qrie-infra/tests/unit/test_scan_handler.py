@@ -0,0 +1,547 @@
+"""
+Unit tests for the policy scanner (scan_processor.scan_handler).
+Tests work unit fan-out, concurrency handling and metrics aggregation.
+"""
+import pytest
+import boto3
+import json
+import sys
+import os
+from moto import mock_aws
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+# Add lambda directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lambda'))
+
+from policy_definition import Policy, PolicyEvaluator, ScopeConfig
+from scan_processor import scan_handler
+from scan_processor.shard_dispatch import InProcessShardDispatcher
+from data_access.findings_writer import FindingsFlushError
+
+
+def _launched_policy(policy_id, service):
+    return Policy(
+        policy_id=policy_id,
+        description=f"{policy_id} description",
+        service=service,
+        category="security",
+        severity=50,
+        remediation="",
+        evaluation_module=policy_id.lower(),
+        scope=ScopeConfig(),
+        status="active",
+        created_at="2025-01-01T00:00:00+00:00",
+        updated_at="2025-01-01T00:00:00+00:00"
+    )
+
+
+class FakeEvaluator(PolicyEvaluator):
+    """Evaluator stand-in: non-compliant when config has Public=True"""
+
+    def __init__(self, policy_id):
+        super().__init__(policy_id, 50, ScopeConfig())
+
+    def evaluate(self, resource_arn, config, describe_time_ms):
+        if config.get('Broken'):
+            raise RuntimeError("evaluation failed")
+        if config.get('OutOfScope'):
+            return {'scoped': False, 'compliant': True}
+        return {'scoped': True, 'compliant': not config.get('Public', False)}
+
+
+@pytest.fixture
+def scan_env():
+    """Patch managers and accounts with in-memory fakes"""
+    policies = [
+        _launched_policy('S3PolicyA', 's3'),
+        _launched_policy('S3PolicyB', 's3'),
+        _launched_policy('IAMPolicy', 'iam'),
+        _launched_policy('NoEvaluator', 'iam'),
+    ]
+    inventory = {
+        '111111111111_s3': [
+            {'ARN': 'arn:aws:s3:::a-public', 'Configuration': {'Public': True}, 'DescribeTime': 1},
+            {'ARN': 'arn:aws:s3:::a-private', 'Configuration': {}, 'DescribeTime': 1},
+        ],
+        '222222222222_s3': [
+            {'ARN': 'arn:aws:s3:::b-broken', 'Configuration': {'Broken': True}, 'DescribeTime': 1},
+            {'ARN': 'arn:aws:s3:::b-excluded', 'Configuration': {'OutOfScope': True}, 'DescribeTime': 1},
+        ],
+        '111111111111_iam': [
+            {'ARN': 'arn:aws:iam::111111111111:user/alice', 'Configuration': {'Public': True}},
+        ],
+    }
+
+    policy_manager = MagicMock()
+    policy_manager.list_launched_policies.return_value = policies
+
+    def create_evaluator(policy_id, launched_policy, context=None):
+        if policy_id == 'NoEvaluator':
+            raise ValueError("No evaluator class found")
+        return FakeEvaluator(policy_id)
+
+    policy_manager.create_policy_evaluator.side_effect = create_evaluator
+
+    def iter_resource_pages(account_service, exclusive_start_key=None, page_size=None):
+        # Serve one resource per page to exercise multi-page streaming
+        items = inventory.get(account_service, [])
+        start = 0
+        if exclusive_start_key:
+            start = [item['ARN'] for item in items].index(exclusive_start_key['ARN']) + 1
+        for i in range(start, len(items)):
+            yield [items[i]], ({'ARN': items[i]['ARN']} if i < len(items) - 1 else None)
+
+    def set_evaluation_fingerprints(account_service, arn, fingerprints):
+        for item in inventory.get(account_service, []):
+            if item['ARN'] == arn:
+                item['EvaluationFingerprints'] = fingerprints
+        return True
+
+    inventory_manager = MagicMock()
+    inventory_manager.iter_resource_pages.side_effect = iter_resource_pages
+    inventory_manager.set_evaluation_fingerprints.side_effect = set_evaluation_fingerprints
+
+    accounts = [{'account_id': '111111111111'}, {'account_id': '222222222222'}, {'name': 'no-id'}]
+
+    with patch.object(scan_handler, 'PolicyManager', return_value=policy_manager), \
+         patch.object(scan_handler, 'InventoryManager', return_value=inventory_manager), \
+         patch.object(scan_handler, 'get_customer_accounts', return_value=accounts), \
+         patch.object(scan_handler, 'get_summary_table') as mock_summary, \
+         patch.object(scan_handler, 'FindingsWriter') as mock_writer:
+        mock_writer.return_value.flush.return_value = {'puts': 0, 'closes': 0}
+        yield {
+            'policies': policies,
+            'inventory': inventory,
+            'policy_manager': policy_manager,
+            'inventory_manager': inventory_manager,
+            'summary_table': mock_summary.return_value,
+            'findings_writer': mock_writer.return_value
+        }
+
+
+class TestScanPolicy:
+    """Test suite for scan_policy"""
+
+    @pytest.mark.parametrize('concurrency', [1, 4])
+    def test_metrics_aggregated_across_units(self, scan_env, concurrency):
+        """Metrics are identical regardless of worker pool width"""
+        result = scan_handler.scan_policy({'concurrency': concurrency}, None)
+        body = result['body']
+
+        # 2 s3 policies x 2 resources in account 1, 1 iam policy x 1 resource in account 1
+        assert body['processed_resources'] == 5
+        assert body['findings_created'] == 3
+        assert body['findings_closed'] == 2
+        # 2 broken evaluations in account 2 + NoEvaluator once per account
+        assert body['skipped_resources'] == 4
+        assert body['accounts_processed'] == 3
+        assert body['policies_evaluated'] == 4
+        assert body['concurrency'] == concurrency
+
+    def test_partition_read_once_per_account_service(self, scan_env):
+        """Each AccountService partition is streamed once, not once per policy"""
+        scan_handler.scan_policy({}, None)
+
+        read_partitions = sorted(
+            c.args[0] for c in scan_env['inventory_manager'].iter_resource_pages.call_args_list
+        )
+        assert read_partitions == ['111111111111_iam', '111111111111_s3', '222222222222_iam', '222222222222_s3']
+
+    def test_pages_evaluated_as_batches(self, scan_env):
+        """Each page is handed to each evaluator as one batch"""
+        batches = []
+        original = FakeEvaluator.evaluate_batch
+
+        def record(self, resources, default_describe_time_ms):
+            batches.append((self.policy_id, [r['ARN'] for r in resources]))
+            return original(self, resources, default_describe_time_ms)
+
+        # Serve each partition as a single page
+        scan_env['inventory_manager'].iter_resource_pages.side_effect = \
+            lambda account_service, exclusive_start_key=None, page_size=None: \
+            iter([(scan_env['inventory'].get(account_service, []), None)])
+
+        with patch.object(FakeEvaluator, 'evaluate_batch', record):
+            body = scan_handler.scan_policy({'concurrency': 1, 'policy_id': 'S3PolicyA'}, None)['body']
+
+        assert sorted(batches) == [
+            ('S3PolicyA', ['arn:aws:s3:::a-public', 'arn:aws:s3:::a-private']),
+            ('S3PolicyA', ['arn:aws:s3:::b-broken', 'arn:aws:s3:::b-excluded']),
+        ]
+        # The broken resource fails alone without losing the rest of its batch
+        assert body['processed_resources'] == 2
+        assert body['skipped_resources'] == 1
+
+    def test_evaluators_share_buffered_writer(self, scan_env):
+        """All evaluators are bound to one context whose writer is flushed once"""
+        scan_handler.scan_policy({}, None)
+
+        contexts = {id(c.kwargs['context']) for c in scan_env['policy_manager'].create_policy_evaluator.call_args_list}
+        assert len(contexts) == 1
+        context = scan_env['policy_manager'].create_policy_evaluator.call_args.kwargs['context']
+        assert context.findings_writer is scan_env['findings_writer']
+        scan_env['findings_writer'].flush.assert_called_once()
+
+    def test_finding_state_preloaded_by_findings_partition(self, scan_env):
+        """State is preloaded where findings are written - S3 bucket ARNs carry no account"""
+        scan_handler.scan_policy({}, None)
+
+        loader = scan_env['findings_writer'].findings_manager.get_finding_states_for_account_service
+        loaded = sorted(c.args[0] for c in loader.call_args_list)
+        assert loaded == ['111111111111_iam', '_s3']
+
+    def test_concurrency_defaults_and_bounds(self):
+        """Concurrency falls back to default and is clamped to the maximum"""
+        assert scan_handler._resolve_concurrency(None) == min(scan_handler.DEFAULT_SCAN_CONCURRENCY,
+                                                              scan_handler.MAX_SCAN_CONCURRENCY)
+        assert scan_handler._resolve_concurrency(0) == 1
+        assert scan_handler._resolve_concurrency('3') == 3
+        assert scan_handler._resolve_concurrency(10_000) == scan_handler.MAX_SCAN_CONCURRENCY
+        assert scan_handler._resolve_concurrency('bogus') == min(scan_handler.DEFAULT_SCAN_CONCURRENCY,
+                                                                 scan_handler.MAX_SCAN_CONCURRENCY)
+
+    def test_anti_entropy_saves_metrics(self, scan_env):
+        """Anti-entropy scans persist aggregated metrics to the summary table"""
+        scan_handler.scan_policy({'scan_type': 'anti-entropy', 'concurrency': 2}, None)
+
+        item = scan_env['summary_table'].put_item.call_args.kwargs['Item']
+        assert item['Type'] == 'last_policy_scan'
+        assert item['processed_resources'] == 5
+        assert item['skipped_resources'] == 4
+        assert item['concurrency'] == 2
+
+    def test_service_filter(self, scan_env):
+        """Only policies for the requested service are scanned"""
+        policy_defs = {'S3PolicyA': 's3', 'S3PolicyB': 's3', 'IAMPolicy': 'iam', 'NoEvaluator': 'iam'}
+        scan_env['policy_manager'].get_policy_definition.side_effect = \
+            lambda pid: MagicMock(service=policy_defs[pid])
+
+        result = scan_handler.scan_policy({'service': 'iam'}, None)
+
+        assert result['body']['policies_evaluated'] == 2
+        assert result['body']['processed_resources'] == 1
+
+
+class TestIncrementalScan:
+    """Test suite for fingerprint-based incremental scans"""
+
+    def test_incremental_skips_unchanged_pairs(self, scan_env):
+        """After a full scan, an incremental scan evaluates nothing"""
+        scan_handler.scan_policy({'mode': 'full'}, None)
+        # The broken resource never gets a fingerprint for the failed evaluations
+        fingerprints = scan_env['inventory']['111111111111_s3'][0]['EvaluationFingerprints']
+        assert set(fingerprints) == {'S3PolicyA', 'S3PolicyB'}
+
+        result = scan_handler.scan_policy({'mode': 'incremental'}, None)
+        body = result['body']
+
+        assert body['scan_mode'] == 'incremental'
+        assert body['processed_resources'] == 0
+        # 5 in-scope pairs + 2 out-of-scope pairs recorded; broken pairs are retried
+        assert body['unchanged_evaluations'] == 7
+        assert body['skipped_resources'] == 4
+
+    def test_incremental_evaluates_config_delta(self, scan_env):
+        """Only resources whose configuration changed are re-evaluated"""
+        scan_handler.scan_policy({}, None)
+        scan_env['inventory']['111111111111_s3'][1]['Configuration'] = {'Public': True}
+
+        body = scan_handler.scan_policy({'mode': 'incremental'}, None)['body']
+
+        assert body['processed_resources'] == 2
+        assert body['findings_created'] == 2
+        assert body['unchanged_evaluations'] == 5
+
+    def test_incremental_evaluates_policy_change(self, scan_env):
+        """A launched policy update invalidates that policy's fingerprints only"""
+        scan_handler.scan_policy({}, None)
+        policies = scan_env['policies']
+        policies[0] = replace(policies[0], severity=10, updated_at="2025-02-01T00:00:00+00:00")
+
+        body = scan_handler.scan_policy({'mode': 'incremental'}, None)['body']
+
+        # S3PolicyA re-evaluated against both account-1 buckets plus the out-of-scope bucket
+        assert body['processed_resources'] == 2
+        assert body['unchanged_evaluations'] == 4
+
+    def test_full_mode_ignores_fingerprints(self, scan_env):
+        """Full scans re-evaluate everything and write no fingerprints when unchanged"""
+        scan_handler.scan_policy({}, None)
+        scan_env['inventory_manager'].set_evaluation_fingerprints.reset_mock()
+
+        body = scan_handler.scan_policy({'mode': 'full'}, None)['body']
+
+        assert body['processed_resources'] == 5
+        assert body['unchanged_evaluations'] == 0
+        scan_env['inventory_manager'].set_evaluation_fingerprints.assert_not_called()
+
+    def test_fingerprints_saved_after_flush(self, scan_env):
+        """Fingerprints are only recorded once the scan's findings are flushed"""
+        calls = []
+        scan_env['findings_writer'].flush.side_effect = lambda: calls.append('flush') or {}
+        scan_env['inventory_manager'].set_evaluation_fingerprints.side_effect = \
+            lambda account_service, arn, fingerprints: calls.append('fingerprints')
+
+        scan_handler.scan_policy({}, None)
+
+        assert calls[0] == 'flush'
+        assert calls.count('fingerprints') == 4
+
+    def test_unwritten_findings_fail_unit(self, scan_env):
+        """A unit with unwritten findings records no fingerprints and is re-evaluated next time"""
+        scan_env['findings_writer'].flush.side_effect = FindingsFlushError(
+            [('arn:aws:s3:::a-public', 'S3PolicyA')], {'errors': 1}
+        )
+
+        body = scan_handler.scan_policy({}, None)['body']
+
+        assert body['failed_units'] == 1
+        saved = {c.args[0] for c in scan_env['inventory_manager'].set_evaluation_fingerprints.call_args_list}
+        assert saved == {'111111111111_iam', '222222222222_s3'}
+
+        scan_env['findings_writer'].flush.side_effect = None
+        body = scan_handler.scan_policy({'mode': 'incremental'}, None)['body']
+        assert body['processed_resources'] == 4
+        assert body['failed_units'] == 0
+
+    def test_unit_error_counted_as_failed(self, scan_env):
+        """A unit whose partition read raises is reported as failed, not silently dropped"""
+        pages = scan_env['inventory_manager'].iter_resource_pages.side_effect
+
+        def iter_resource_pages(account_service, exclusive_start_key=None, page_size=None):
+            if account_service == '222222222222_s3':
+                raise RuntimeError("partition read failed")
+            return pages(account_service, exclusive_start_key, page_size)
+
+        scan_env['inventory_manager'].iter_resource_pages.side_effect = iter_resource_pages
+
+        body = scan_handler.scan_policy({}, None)['body']
+
+        assert body['failed_units'] == 1
+        assert body['processed_resources'] == 5
+
+    def test_invalid_mode_falls_back_to_full(self, scan_env):
+        """Unknown modes run a full scan"""
+        body = scan_handler.scan_policy({'mode': 'bogus'}, None)['body']
+        assert body['scan_mode'] == 'full'
+        assert body['processed_resources'] == 5
+
+
+@pytest.fixture
+def summary_table():
+    """Mock summary table for sharded scan state"""
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='test-summary',
+            KeySchema=[{'AttributeName': 'Type', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'Type', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield table
+
+
+class TestShardedScan:
+    """Test suite for coordinator/shard fan-out"""
+
+    @pytest.fixture
+    def sharded_env(self, scan_env, summary_table):
+        with patch.object(scan_handler, 'get_summary_table', return_value=summary_table):
+            yield {**scan_env, 'summary_table': summary_table}
+
+    @pytest.mark.parametrize('shard_size,max_inflight', [(1, 1), (1, 5), (10, 2)])
+    def test_in_process_fan_out_matches_standalone(self, sharded_env, shard_size, max_inflight):
+        """Aggregated shard metrics equal a single-invocation scan"""
+        result = scan_handler.scan_policy({
+            'role': 'coordinator', 'scan_type': 'anti-entropy',
+            'shard_size': shard_size, 'max_inflight_shards': max_inflight
+        }, None)
+        body = result['body']
+        expected_shards = 2 if shard_size == 1 else 1
+        assert body['shard_count'] == expected_shards
+        assert body['shards_dispatched'] == min(max_inflight, expected_shards)
+
+        table = sharded_env['summary_table']
+        summary = table.get_item(Key={'Type': 'last_policy_scan'})['Item']
+        assert summary['scan_id'] == body['scan_id']
+        assert summary['processed_resources'] == 5
+        assert summary['findings_created'] == 3
+        assert summary['findings_closed'] == 2
+        assert summary['skipped_resources'] == 4
+        assert summary['accounts_processed'] == 2
+        assert summary['shard_count'] == expected_shards
+
+        state = table.get_item(Key={'Type': f"policy_scan#{body['scan_id']}"})['Item']
+        assert state['status'] == 'complete'
+        assert len(state['completed_shards']) == expected_shards
+
+    def test_lambda_dispatcher_respects_max_inflight(self, sharded_env):
+        """With a Lambda context the coordinator invokes only the first wave of shards"""
+        context = SimpleNamespace(function_name='qrie_policy_scanner')
+        with patch('scan_processor.shard_dispatch.boto3.client') as mock_client:
+            body = scan_handler.scan_policy({
+                'role': 'coordinator', 'shard_size': 1, 'max_inflight_shards': 1,
+                'mode': 'incremental', 'concurrency': 2
+            }, context)['body']
+
+        invoke = mock_client.return_value.invoke
+        invoke.assert_called_once()
+        assert invoke.call_args.kwargs['FunctionName'] == 'qrie_policy_scanner'
+        assert invoke.call_args.kwargs['InvocationType'] == 'Event'
+        payload = json.loads(invoke.call_args.kwargs['Payload'])
+        assert payload == {
+            'scan_type': 'bootstrap', 'mode': 'incremental', 'concurrency': 2,
+            'role': 'shard', 'scan_id': body['scan_id'], 'shard_index': 0,
+            'accounts': ['111111111111']
+        }
+
+    def test_finishing_shard_dispatches_next(self, sharded_env):
+        """A completing shard dispatches the next pending shard with JSON-safe parameters"""
+        context = SimpleNamespace(function_name='qrie_policy_scanner')
+        with patch('scan_processor.shard_dispatch.boto3.client') as mock_client:
+            body = scan_handler.scan_policy({
+                'role': 'coordinator', 'shard_size': 1, 'max_inflight_shards': 1, 'concurrency': 2
+            }, context)['body']
+            first = json.loads(mock_client.return_value.invoke.call_args.kwargs['Payload'])
+            scan_handler.scan_policy(first, context)
+
+        payload = json.loads(mock_client.return_value.invoke.call_args.kwargs['Payload'])
+        assert payload['shard_index'] == 1
+        assert payload['accounts'] == ['222222222222']
+        assert payload['scan_id'] == body['scan_id']
+        assert payload['concurrency'] == 2
+
+    def test_shard_completion_is_idempotent(self, sharded_env):
+        """A retried shard is not counted twice"""
+        context = SimpleNamespace(function_name='qrie_policy_scanner')
+        with patch('scan_processor.shard_dispatch.boto3.client'):
+            body = scan_handler.scan_policy({'role': 'coordinator', 'shard_size': 1}, context)['body']
+            shard_event = {'role': 'shard', 'scan_id': body['scan_id'], 'shard_index': 0,
+                           'accounts': ['111111111111']}
+            scan_handler.scan_policy(shard_event, context)
+            scan_handler.scan_policy(shard_event, context)
+
+        state = sharded_env['summary_table'].get_item(Key={'Type': f"policy_scan#{body['scan_id']}"})['Item']
+        assert state['processed_resources'] == 5
+        assert state['status'] == 'running'
+
+
+    def test_failed_shard_dispatches_next_and_finalizes(self, sharded_env):
+        """A shard that exhausts its retries is recorded and the scan still finishes"""
+        context = SimpleNamespace(function_name='qrie_policy_scanner')
+        scanner_arn = 'arn:aws:lambda:us-east-1:123456789012:function:qrie_policy_scanner:$LATEST'
+        with patch('scan_processor.shard_dispatch.boto3.client') as mock_client:
+            body = scan_handler.scan_policy({
+                'role': 'coordinator', 'scan_type': 'anti-entropy', 'shard_size': 1, 'max_inflight_shards': 1
+            }, context)['body']
+            first = json.loads(mock_client.return_value.invoke.call_args.kwargs['Payload'])
+
+            # Destination record for the first shard after its retries are exhausted
+            scan_handler.handle_shard_failure({
+                'requestContext': {'functionArn': scanner_arn, 'condition': 'RetriesExhausted'},
+                'requestPayload': first,
+                'responsePayload': {'errorMessage': 'Task timed out after 900.00 seconds'}
+            }, None)
+
+            invoke = mock_client.return_value.invoke.call_args.kwargs
+            assert invoke['FunctionName'] == scanner_arn
+            second = json.loads(invoke['Payload'])
+            assert second['shard_index'] == 1
+            scan_handler.scan_policy(second, context)
+
+        table = sharded_env['summary_table']
+        state = table.get_item(Key={'Type': f"policy_scan#{body['scan_id']}"})['Item']
+        assert state['status'] == 'partial'
+        assert state['failed_shards'] == {0}
+        summary = table.get_item(Key={'Type': 'last_policy_scan'})['Item']
+        assert summary['scan_id'] == body['scan_id']
+        assert summary['failed_shards'] == 1
+        assert summary['accounts_processed'] == 1
+
+    def test_failure_of_non_shard_invocation_is_logged_only(self, sharded_env):
+        """Failed standalone/coordinator invocations have no scan state to update"""
+        result = scan_handler.handle_shard_failure({
+            'requestContext': {'condition': 'RetriesExhausted'},
+            'requestPayload': {'scan_type': 'anti-entropy'}
+        }, None)
+
+        assert result['body'] == "Not a shard invocation"
+        assert 'Item' not in sharded_env['summary_table'].get_item(Key={'Type': 'last_policy_scan'})
+
+class FakeLambdaContext:
+    """Lambda context whose remaining time runs out after a number of checks"""
+
+    function_name = None
+
+    def __init__(self, checks_before_deadline, shard_dispatcher):
+        self.checks_left = checks_before_deadline
+        self.shard_dispatcher = shard_dispatcher
+
+    def get_remaining_time_in_millis(self):
+        self.checks_left -= 1
+        return 900_000 if self.checks_left >= 0 else 1_000
+
+
+class TestCheckpointResume:
+    """Test suite for checkpointing near the Lambda deadline"""
+
+    @pytest.fixture
+    def resumable_env(self, scan_env, summary_table):
+        with patch.object(scan_handler, 'get_summary_table', return_value=summary_table), \
+             patch('data_access.checkpoint_manager.get_summary_table', return_value=summary_table):
+            yield {**scan_env, 'summary_table': summary_table}
+
+    @pytest.mark.parametrize('checks_before_deadline', [0, 1, 3, 5])
+    def test_scan_completes_across_invocations(self, resumable_env, checks_before_deadline):
+        """A scan interrupted at any point completes with the same totals and scan_id"""
+        dispatcher = InProcessShardDispatcher(scan_handler.scan_policy)
+        context = FakeLambdaContext(checks_before_deadline, dispatcher)
+
+        result = scan_handler.scan_policy({'scan_type': 'anti-entropy', 'concurrency': 1}, context)
+        assert result['statusCode'] == 202
+        scan_id = result['body']['scan_id']
+
+        continuation = dispatcher.dispatched[0]
+        assert continuation['resume'] is True
+        assert continuation['scan_id'] == scan_id
+
+        dispatcher.drain()
+
+        table = resumable_env['summary_table']
+        summary = table.get_item(Key={'Type': 'last_policy_scan'})['Item']
+        assert summary['scan_id'] == scan_id
+        assert summary['processed_resources'] == 5
+        assert summary['findings_created'] == 3
+        assert summary['findings_closed'] == 2
+        assert summary['skipped_resources'] == 4
+        assert summary['accounts_processed'] == 2
+        assert 'Item' not in table.get_item(Key={'Type': f"policy_scan_checkpoint#{scan_id}"})
+
+    def test_partition_resumes_from_last_evaluated_key(self, resumable_env):
+        """A unit stopped between pages resumes after the last processed page"""
+        dispatcher = InProcessShardDispatcher(scan_handler.scan_policy)
+        # Start check for the first unit passes, the check after its first page hits the deadline
+        context = FakeLambdaContext(1, dispatcher)
+
+        with patch.object(scan_handler, 'get_customer_accounts', return_value=[{'account_id': '111111111111'}]):
+            result = scan_handler.scan_policy({'service': None, 'policy_id': 'S3PolicyA', 'concurrency': 1}, context)
+
+        scan_id = result['body']['scan_id']
+        cursor = resumable_env['summary_table'].get_item(
+            Key={'Type': f"policy_scan_checkpoint#{scan_id}"})['Item']['cursor']
+        assert cursor['units'] == [['111111111111', 's3', {'ARN': 'arn:aws:s3:::a-public'}]]
+        assert cursor['metrics']['processed_count'] == 1
+
+        dispatcher.drain()
+        pages = [c.kwargs.get('exclusive_start_key')
+                 for c in resumable_env['inventory_manager'].iter_resource_pages.call_args_list]
+        assert pages == [None, {'ARN': 'arn:aws:s3:::a-public'}]
+
+    def test_resume_without_checkpoint_is_noop(self, resumable_env):
+        """A duplicate continuation after completion does nothing"""
+        result = scan_handler.scan_policy({'scan_id': 'missing', 'resume': True}, None)
+
+        assert result['body'] == "No checkpoint to resume"
+        resumable_env['inventory_manager'].iter_resource_pages.assert_not_called()